@@ -1,7 +1,9 @@
 from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import asynccontextmanager
 import httpx
 import os
 import sys
@@ -24,9 +26,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
     from shared.security.auth import JWTManager, SecurityConfig
     from shared.security.middleware import (
-        RateLimitMiddleware, SecurityHeadersMiddleware,
-        InputValidationMiddleware, IPWhitelistMiddleware
+        SecurityHeadersMiddleware, InputValidationMiddleware, IPWhitelistMiddleware
     )
+    from shared.middleware.rate_limiting import RateLimitMiddleware
     from shared.security.encryption import data_masking
     from shared.models import UserRole
 
@@ -63,12 +65,37 @@ except ImportError as e:
     data_masking = DataMasking()
     jwt_manager = None
 
+from shared.networking.http_pool import UpstreamClientPool, HTTPPoolConfig
+from shared.security.token_cache import VerifiedTokenCache
+from shared.security.policy_engine import PolicyEngine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: open long-lived pooled clients to every backend
+    await upstream_pool.start()
+
+    # Keep the verified-token cache in sync with user-service revocations
+    revocation_task = asyncio.create_task(token_cache.listen_for_revocations(REDIS_URL))
+
+    yield
+
+    # Shutdown
+    revocation_task.cancel()
+    try:
+        await revocation_task
+    except asyncio.CancelledError:
+        pass
+    await upstream_pool.close()
+
+
 app = FastAPI(
     title="Oxygen Supply Platform API Gateway",
     description="Secure Central API Gateway for the Oxygen Supply Platform",
     version="1.0.0",
     docs_url="/docs" if os.getenv("ENVIRONMENT") != "production" else None,
-    redoc_url="/redoc" if os.getenv("ENVIRONMENT") != "production" else None
+    redoc_url="/redoc" if os.getenv("ENVIRONMENT") != "production" else None,
+    lifespan=lifespan
 )
 
 # Security Configuration
@@ -76,13 +103,57 @@ ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://loc
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 ADMIN_IP_WHITELIST = os.getenv("ADMIN_IP_WHITELIST", "").split(",") if os.getenv("ADMIN_IP_WHITELIST") else []
 
+# Verified token cache (bounded LRU, entries capped by token exp and TOKEN_CACHE_TTL)
+token_cache = VerifiedTokenCache(
+    max_size=int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000")),
+    ttl=int(os.getenv("TOKEN_CACHE_TTL", "60"))
+)
+
+def user_data_from_payload(payload: dict) -> dict:
+    """User data the gateway caches and forwards for a verified JWT payload."""
+    return {
+        "user_id": payload["sub"],
+        "role": payload["role"],
+        "permissions": payload.get("permissions", []),
+        "token_id": payload.get("jti"),
+        "issued_at": payload.get("iat"),
+        "expires_at": payload.get("exp")
+    }
+
+
+def rate_limit_identity(scope: dict):
+    """Rate-limit callers by the verified JWT subject, else by client IP.
+
+    Tokens not yet in the cache are verified locally (and cached for
+    verify_token), so a fresh or evicted token is not counted against its IP.
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            if authorization.startswith("Bearer "):
+                token = authorization[7:]
+                user_data = token_cache.get(token)
+                if user_data is None and SECURITY_MODULES_AVAILABLE and jwt_manager:
+                    try:
+                        user_data = user_data_from_payload(jwt_manager.verify_token(token))
+                    except Exception:
+                        # Invalid tokens are limited by IP; verify_token rejects them later
+                        user_data = None
+                    else:
+                        token_cache.set(token, user_data)
+                if user_data:
+                    return str(user_data["user_id"]), str(user_data["role"]).replace("UserRole.", "")
+            break
+    return None, None
+
+
 # Add security middleware (order matters!)
 if SECURITY_MODULES_AVAILABLE:
     logger.info("Adding security middleware...")
     app.add_middleware(IPWhitelistMiddleware, whitelist=ADMIN_IP_WHITELIST, admin_only=True)
     app.add_middleware(SecurityHeadersMiddleware)
     app.add_middleware(InputValidationMiddleware, max_request_size=10 * 1024 * 1024)  # 10MB
-    app.add_middleware(RateLimitMiddleware, redis_url=REDIS_URL, default_rate_limit=60)
+    app.add_middleware(RateLimitMiddleware, identify=rate_limit_identity)
     logger.info("Security middleware enabled")
 else:
     logger.warning("Security middleware disabled - shared security modules not available")
@@ -292,6 +363,9 @@ SERVICE_URLS = {
     "admin": get_service_url("admin", 8011),
 }
 
+# Shared per-upstream connection pools (keep-alive limits and HTTP/2 via GATEWAY_POOL_* env vars)
+upstream_pool = UpstreamClientPool(SERVICE_URLS, HTTPPoolConfig.from_env("GATEWAY_POOL_"))
+
 # Role-based access control configuration
 ROLE_PERMISSIONS = {
     UserRole.ADMIN: {
@@ -310,6 +384,9 @@ ROLE_PERMISSIONS = {
     }
 }
 
+# Compiled RBAC policy (path-segment trie); GATEWAY_POLICY_FILE may override ROLE_PERMISSIONS
+policy_engine = PolicyEngine(ROLE_PERMISSIONS, config_path=os.getenv("GATEWAY_POLICY_FILE"))
+
 
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Verify JWT token with enhanced security validation."""
@@ -321,6 +398,11 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    # Serve recently verified tokens from the in-process cache
+    cached_user_data = token_cache.get(credentials.credentials)
+    if cached_user_data is not None:
+        return cached_user_data
+
     try:
         # Try local JWT verification first if security modules are available
         if SECURITY_MODULES_AVAILABLE and jwt_manager:
@@ -328,19 +410,13 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
                 payload = jwt_manager.verify_token(credentials.credentials)
 
                 # Extract user information
-                user_data = {
-                    "user_id": payload["sub"],
-                    "role": payload["role"],
-                    "permissions": payload.get("permissions", []),
-                    "token_id": payload.get("jti"),
-                    "issued_at": payload.get("iat"),
-                    "expires_at": payload.get("exp")
-                }
+                user_data = user_data_from_payload(payload)
 
                 # Log successful authentication (with masked token)
                 masked_token = credentials.credentials[:10] + "..." + credentials.credentials[-10:]
                 logger.info(f"Token verified locally for user {user_data['user_id']} with role {user_data['role']} (token: {masked_token})")
 
+                token_cache.set(credentials.credentials, user_data)
                 return user_data
 
             except Exception as jwt_error:
@@ -348,23 +424,26 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
                 logger.warning(f"Local JWT verification failed: {str(jwt_error)}, trying user service fallback")
 
         # Fallback to user service verification
-        async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.post(
-                    f"{SERVICE_URLS['user']}/auth/verify-token",
-                    headers={"Authorization": f"Bearer {credentials.credentials}"}
-                )
-
-                if response.status_code == 200:
-                    user_data = response.json()
-                    logger.info(f"Token verified via user service for user {user_data.get('user_id')}")
-                    return user_data
-                else:
-                    logger.warning(f"Token verification failed via user service: {response.status_code}")
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid authentication credentials",
-                        headers={"WWW-Authenticate": "Bearer"}
-                    )
+        response = await upstream_pool.request(
+            "user",
+            "POST",
+            "/auth/verify-token",
+            headers={"Authorization": f"Bearer {credentials.credentials}"},
+            timeout=5.0
+        )
+
+        if response.status_code == 200:
+            user_data = response.json()
+            logger.info(f"Token verified via user service for user {user_data.get('user_id')}")
+            token_cache.set(credentials.credentials, user_data)
+            return user_data
+        else:
+            logger.warning(f"Token verification failed via user service: {response.status_code}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
 
     except httpx.TimeoutException:
         logger.error("Authentication service timeout")
@@ -389,38 +468,7 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
 
 def check_role_permissions(user_role: str, service: str, method: str, path: str) -> bool:
     """Check if user role has permission to access the service/endpoint."""
-
-    try:
-        role = UserRole(user_role)
-    except ValueError:
-        logger.warning(f"Invalid user role: {user_role}")
-        return False
-
-    permissions = ROLE_PERMISSIONS.get(role)
-    if not permissions:
-        return False
-
-    # Check if admin (full access)
-    if role == UserRole.ADMIN:
-        return True
-
-    # Check allowed services
-    allowed_services = permissions.get("allowed_services", [])
-    if "*" not in allowed_services and service not in allowed_services:
-        return False
-
-    # Check allowed methods
-    allowed_methods = permissions.get("allowed_methods", [])
-    if "*" not in allowed_methods and method not in allowed_methods:
-        return False
-
-    # Check restricted endpoints
-    restricted_endpoints = permissions.get("restricted_endpoints", [])
-    for restricted in restricted_endpoints:
-        if path.startswith(restricted):
-            return False
-
-    return True
+    return policy_engine.is_allowed(user_role, service, method, path)
 
 
 async def log_security_event(event_type: str, user_id: str, details: dict, request: Request):
@@ -488,7 +536,7 @@ async def proxy_request(service: str, path: str, request: Request, user_data: Op
 
     # Copy safe headers only
     safe_headers = {
-        "content-type", "accept", "accept-language", "accept-encoding",
+        "content-type", "content-length", "accept", "accept-language", "accept-encoding",
         "user-agent", "x-requested-with", "x-forwarded-for", "x-real-ip"
     }
 
@@ -507,56 +555,57 @@ async def proxy_request(service: str, path: str, request: Request, user_data: Op
     headers["X-Gateway-Version"] = "1.0.0"
     headers["X-Request-Time"] = str(int(time.time()))
 
-    # Get request body
+    # Stream the request body through instead of buffering it
     body = None
     if request.method in ["POST", "PUT", "PATCH"]:
-        body = await request.body()
+        body = request.stream()
 
     try:
-        timeout = httpx.Timeout(30.0, connect=5.0)  # 30s total, 5s connect
-
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            # Log request for audit (mask sensitive data)
-            if user_data:
-                await log_security_event(
-                    "api_request",
-                    user_data["user_id"],
-                    {
-                        "service": service,
-                        "method": request.method,
-                        "path": path,
-                        "body_size": len(body) if body else 0
-                    },
-                    request
-                )
-
-            response = await client.request(
-                method=request.method,
-                url=url,
-                headers=headers,
-                params=request.query_params,
-                content=body
+        # Log request for audit (mask sensitive data)
+        if user_data:
+            await log_security_event(
+                "api_request",
+                user_data["user_id"],
+                {
+                    "service": service,
+                    "method": request.method,
+                    "path": path,
+                    "body_size": int(request.headers.get("content-length", 0) or 0)
+                },
+                request
             )
 
-            # Filter response headers for security
-            response_headers = {}
-            safe_response_headers = {
-                "content-type", "content-length", "cache-control",
-                "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"
-            }
+        client = upstream_pool.get_client(service)
+        upstream_request = client.build_request(
+            method=request.method,
+            url=path,
+            headers=headers,
+            params=request.query_params,
+            content=body
+        )
+        response = await upstream_pool.send(service, upstream_request, stream=True)
 
-            for key, value in response.headers.items():
-                if key.lower() in safe_response_headers:
-                    response_headers[key] = value
+        # Filter response headers for security
+        response_headers = {}
+        safe_response_headers = {
+            "content-type", "content-length", "content-encoding", "cache-control",
+            "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"
+        }
 
-            # Add security headers to response
-            response_headers.update(SecurityConfig.SECURITY_HEADERS)
+        for key, value in response.headers.items():
+            if key.lower() in safe_response_headers:
+                response_headers[key] = value
 
-            return JSONResponse(
-                content=response.json() if response.content else {},
-                status_code=response.status_code,
-                headers=response_headers
-            )
+        # Add security headers to response
+        response_headers.update(SecurityConfig.SECURITY_HEADERS)
+
+        # Relay the upstream body as-is; the connection returns to the pool once it is drained
+        return StreamingResponse(
+            response.aiter_raw(),
+            status_code=response.status_code,
+            headers=response_headers,
+            background=BackgroundTask(response.aclose)
+        )
 
     except httpx.TimeoutException:
         logger.error(f"Timeout proxying request to {service}: {url}")
@@ -598,15 +647,14 @@ HEALTH_CACHE_TTL = 30  # Cache for 30 seconds
 async def check_service_health(service_name: str, service_url: str) -> dict:
     """Check health of a single service."""
     try:
-        async with httpx.AsyncClient(timeout=2.0) as client:  # Reduced timeout
-            start_time = time.time()
-            response = await client.get(f"{service_url}/health")
-            response_time = time.time() - start_time
-
-            return {
-                "status": "healthy" if response.status_code == 200 else "unhealthy",
-                "response_time": response_time
-            }
+        start_time = time.time()
+        response = await upstream_pool.request(service_name, "GET", "/health", timeout=2.0)  # Reduced timeout
+        response_time = time.time() - start_time
+
+        return {
+            "status": "healthy" if response.status_code == 200 else "unhealthy",
+            "response_time": response_time
+        }
     except Exception as e:
         return {
             "status": "unreachable",
@@ -696,6 +744,36 @@ async def quick_health_check():
     }
 
 
+@app.get("/health/upstreams")
+async def upstream_pool_stats():
+    """Per-service connection pool, request and token cache statistics."""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "upstreams": upstream_pool.get_stats(),
+        "token_cache": token_cache.get_stats()
+    }
+
+
+@app.post("/gateway/policy/reload")
+async def reload_access_policy(request: Request, user_data: dict = Depends(verify_token)):
+    """Recompile the access policy from GATEWAY_POLICY_FILE (admin only)."""
+    if user_data.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    reloaded = policy_engine.reload(force=True)
+    await log_security_event(
+        "policy_reload",
+        user_data["user_id"],
+        {"reloaded": reloaded, "config_path": policy_engine.config_path},
+        request
+    )
+    return {
+        "reloaded": reloaded,
+        "config_path": policy_engine.config_path,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 # Authentication routes (no auth required)
 @app.post("/auth/register")
 async def register(request: Request):
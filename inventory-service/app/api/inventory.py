@@ -15,7 +15,7 @@ from app.schemas.inventory import (
     InventoryCreate, InventoryUpdate, InventoryResponse,
     StockCreate, StockUpdate, StockResponse,
     StockMovementCreate, StockMovementResponse,
-    StockReservationCreate, StockReservationResponse,
+    StockReservationCreate, StockReservationResponse, BulkStockReservationCreate,
     VendorInventoryResponse, InventorySearchResult,
     InventoryLocationCreate, InventoryLocationResponse,
     InventoryFilters, PaginatedInventoryResponse,
@@ -329,7 +329,7 @@ async def create_reservation(
                 "inventory_id": str(reservation.inventory_id),
                 "order_id": str(reservation.order_id),
                 "quantity": reservation.quantity,
-                "status": reservation.status,
+                "status": "active",
                 "expires_at": reservation.expires_at.isoformat() if reservation.expires_at else None
             }
         )
@@ -345,6 +345,63 @@ async def create_reservation(
         raise HTTPException(status_code=500, detail="Failed to create reservation")
 
 
+@router.post("/reservations/bulk", response_model=APIResponse)
+async def create_bulk_reservation(
+    reservation_data: BulkStockReservationCreate,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Reserve all lines of an order atomically.
+
+    Either every line is reserved or none is. Retrying with the same
+    Idempotency-Key returns the original reservations.
+    """
+    try:
+        reservations = await inventory_service.create_bulk_reservation(
+            db, reservation_data, current_user["user_id"], idempotency_key
+        )
+
+        # Broadcast reservation updates
+        for reservation in reservations:
+            background_tasks.add_task(
+                websocket_service.broadcast_reservation_update,
+                {
+                    "reservation_id": str(reservation.id),
+                    "inventory_id": str(reservation.inventory_id),
+                    "order_id": str(reservation.order_id),
+                    "quantity": reservation.quantity,
+                    "status": "active" if reservation.is_active else "inactive",
+                    "expires_at": reservation.expires_at.isoformat() if reservation.expires_at else None
+                }
+            )
+
+        return APIResponse(
+            success=True,
+            message="Reservations created successfully",
+            data={
+                "order_id": reservation_data.order_id,
+                "reservations": [
+                    {
+                        "reservation_id": str(reservation.id),
+                        "stock_id": str(reservation.stock_id),
+                        "cylinder_size": reservation.cylinder_size,
+                        "quantity": reservation.quantity,
+                        "is_active": reservation.is_active,
+                        "expires_at": reservation.expires_at.isoformat() if reservation.expires_at else None
+                    }
+                    for reservation in reservations
+                ]
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Failed to create reservations")
+
+
 @router.get("/reservations/{reservation_id}", response_model=StockReservationResponse)
 async def get_reservation(
     reservation_id: str,
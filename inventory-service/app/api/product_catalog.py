@@ -35,14 +35,15 @@ async def search_product_catalog(
         if current_user["role"] != UserRole.HOSPITAL:
             raise HTTPException(status_code=403, detail="Only hospitals can search the product catalog")
 
-        catalog_items = await catalog_service.search_catalog(
+        catalog_items, total_items = await catalog_service.search_catalog(
             db=db,
-            request=catalog_request
+            request=catalog_request,
+            user_context=current_user
         )
 
         return ProductCatalogResponse(
             items=catalog_items,
-            total=len(catalog_items),
+            total=total_items,
             search_radius_km=catalog_request.max_distance_km,
             hospital_location={
                 "latitude": catalog_request.hospital_latitude,
@@ -92,7 +93,8 @@ async def get_nearby_products(
             db=db,
             request=catalog_request,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            user_context=current_user
         )
 
         return ProductCatalogResponse(
@@ -156,7 +158,8 @@ async def bulk_check_availability(
 
         results = await catalog_service.bulk_check_availability(
             db=db,
-            bulk_check=bulk_check
+            bulk_check=bulk_check,
+            user_context=current_user
         )
 
         return results
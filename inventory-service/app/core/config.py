@@ -35,6 +35,10 @@ class Settings(BaseSettings):
     QUALITY_CHECK_FREQUENCY_DAYS: int = int(os.getenv("QUALITY_CHECK_FREQUENCY_DAYS", "90"))
     QUALITY_CHECK_PASS_THRESHOLD: float = float(os.getenv("QUALITY_CHECK_PASS_THRESHOLD", "95.0"))
 
+    # User Service Integration
+    USER_SERVICE_URL: str = os.getenv("USER_SERVICE_URL", "http://localhost:8001")
+    USER_SERVICE_API_KEY: Optional[str] = os.getenv("USER_SERVICE_API_KEY")
+
     # Pricing Integration
     PRICING_SERVICE_URL: str = os.getenv("PRICING_SERVICE_URL", "http://pricing-service:8006")
     PRICING_SERVICE_TIMEOUT: int = int(os.getenv("PRICING_SERVICE_TIMEOUT", "30"))
@@ -14,7 +14,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 from shared.database.service_init import create_service_init_function
 from app.models.inventory import Inventory, CylinderStock, StockMovement, StockReservation
 from app.models.cylinder import (
-    Cylinder, CylinderMaintenance, CylinderQualityCheck, 
+    Cylinder, CylinderMaintenance, CylinderQualityCheck, CylinderQualitySummary,
     CylinderLifecycleEvent, CylinderUsageLog
 )
 
@@ -33,6 +33,7 @@ INVENTORY_SERVICE_INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_cylinder_stock_size ON cylinder_stock(cylinder_size)",
     "CREATE INDEX IF NOT EXISTS idx_cylinder_stock_availability ON cylinder_stock(available_quantity)",
     "CREATE INDEX IF NOT EXISTS idx_cylinder_stock_threshold ON cylinder_stock(minimum_threshold)",
+    "CREATE INDEX IF NOT EXISTS idx_cylinder_stock_search ON cylinder_stock(inventory_id, cylinder_size, available_quantity)",
     
     # Stock movement indexes
     "CREATE INDEX IF NOT EXISTS idx_stock_movements_stock_id ON stock_movements(stock_id)",
@@ -45,6 +46,7 @@ INVENTORY_SERVICE_INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_stock_reservations_order_id ON stock_reservations(order_id)",
     "CREATE INDEX IF NOT EXISTS idx_stock_reservations_status ON stock_reservations(status)",
     "CREATE INDEX IF NOT EXISTS idx_stock_reservations_expires ON stock_reservations(expires_at)",
+    "CREATE INDEX IF NOT EXISTS idx_stock_reservations_active_expires ON stock_reservations(expires_at) WHERE is_active = true",
     
     # Cylinder indexes
     "CREATE INDEX IF NOT EXISTS idx_cylinders_vendor ON cylinders(vendor_id)",
@@ -74,6 +76,7 @@ INVENTORY_SERVICE_INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_quality_vendor ON cylinder_quality_checks(vendor_id)",
     "CREATE INDEX IF NOT EXISTS idx_quality_type ON cylinder_quality_checks(check_type)",
     "CREATE INDEX IF NOT EXISTS idx_quality_date ON cylinder_quality_checks(check_date)",
+    "CREATE INDEX IF NOT EXISTS idx_quality_vendor_date ON cylinder_quality_checks(vendor_id, check_date DESC)",
     "CREATE INDEX IF NOT EXISTS idx_quality_status ON cylinder_quality_checks(overall_status)",
     "CREATE INDEX IF NOT EXISTS idx_quality_follow_up ON cylinder_quality_checks(follow_up_required)",
     
@@ -202,6 +205,59 @@ async def create_inventory_enum_types(engine):
         logger.error(f"❌ Failed to create enum types: {e}")
         raise
 
+async def relax_reservation_order_uniqueness(engine):
+    """Allow one reservation row per order line (previously one per order)"""
+    from sqlalchemy import text
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "ALTER TABLE stock_reservations DROP CONSTRAINT IF EXISTS stock_reservations_order_id_key"
+            ))
+            logger.info("✅ Stock reservations allow multiple lines per order")
+
+    except Exception as e:
+        logger.error(f"❌ Failed to update stock reservation constraints: {e}")
+        raise
+
+async def add_reservation_idempotency_key(engine):
+    """Add the idempotency key used by bulk reservations to existing tables"""
+    from sqlalchemy import text
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "ALTER TABLE stock_reservations ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR"
+            ))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_stock_reservations_idempotency_key "
+                "ON stock_reservations(idempotency_key) WHERE idempotency_key IS NOT NULL"
+            ))
+            logger.info("✅ Stock reservations accept idempotency keys")
+
+    except Exception as e:
+        logger.error(f"❌ Failed to add stock reservation idempotency key: {e}")
+        raise
+
+async def backfill_cylinder_quality_summaries(engine):
+    """Build quality summaries from existing check history (first run only)"""
+    from sqlalchemy import select
+    from app.services.quality_summary import summary_backfill_statement
+
+    try:
+        async with engine.begin() as conn:
+            result = await conn.execute(select(CylinderQualitySummary.cylinder_id).limit(1))
+            if result.first():
+                logger.info("ℹ️ Cylinder quality summaries already populated")
+                return
+
+            result = await conn.execute(summary_backfill_statement())
+            logger.info(f"✅ Backfilled {result.rowcount} cylinder quality summaries")
+
+    except Exception as e:
+        logger.error(f"❌ Failed to backfill cylinder quality summaries: {e}")
+        raise
+
 async def seed_sample_inventory_data(engine):
     """Seed sample inventory data for testing"""
     from sqlalchemy.ext.asyncio import AsyncSession
@@ -228,13 +284,15 @@ async def seed_sample_inventory_data(engine):
 initialize_inventory_database = create_service_init_function(
     service_name="inventory",
     models=[Inventory, CylinderStock, StockMovement, StockReservation, 
-            Cylinder, CylinderMaintenance, CylinderQualityCheck, 
+            Cylinder, CylinderMaintenance, CylinderQualityCheck, CylinderQualitySummary,
             CylinderLifecycleEvent, CylinderUsageLog],
     indexes=INVENTORY_SERVICE_INDEXES,
     constraints=INVENTORY_SERVICE_CONSTRAINTS,
     extensions=INVENTORY_SERVICE_EXTENSIONS,
     enum_data=INVENTORY_SERVICE_ENUM_DATA,
-    custom_functions=[create_inventory_enum_types, seed_sample_inventory_data]
+    custom_functions=[create_inventory_enum_types, relax_reservation_order_uniqueness,
+                      add_reservation_idempotency_key, backfill_cylinder_quality_summaries,
+                      seed_sample_inventory_data]
 )
 
 async def init_inventory_database() -> bool:
@@ -135,6 +135,7 @@ class Cylinder(Base):
     inventory_location = relationship("Inventory", back_populates="cylinders")
     maintenance_records = relationship("CylinderMaintenance", back_populates="cylinder", cascade="all, delete-orphan")
     quality_checks = relationship("CylinderQualityCheck", back_populates="cylinder", cascade="all, delete-orphan")
+    quality_summary = relationship("CylinderQualitySummary", back_populates="cylinder", uselist=False, cascade="all, delete-orphan")
     lifecycle_events = relationship("CylinderLifecycleEvent", back_populates="cylinder", cascade="all, delete-orphan")
     usage_logs = relationship("CylinderUsageLog", back_populates="cylinder", cascade="all, delete-orphan")
 
@@ -236,6 +237,35 @@ class CylinderQualityCheck(Base):
         return f"<CylinderQualityCheck(id={self.id}, cylinder_id={self.cylinder_id}, status={self.overall_status})>"
 
 
+class CylinderQualitySummary(Base):
+    """Rolling quality summary per cylinder, maintained as checks are evaluated."""
+    __tablename__ = "cylinder_quality_summaries"
+
+    cylinder_id = Column(UUID(as_uuid=True), ForeignKey("cylinders.id"), primary_key=True)
+
+    # Latest evaluated check
+    last_check_date = Column(DateTime(timezone=True), nullable=False, index=True)
+    last_status = Column(SQLEnum(QualityCheckStatus), nullable=False, index=True)
+    last_passed_date = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    # Time-decayed check counts and the pass rate (0-100) derived from them
+    check_weight = Column(Float, nullable=False, default=0.0)
+    passed_weight = Column(Float, nullable=False, default=0.0)
+    pass_rate = Column(Float, nullable=False, default=0.0, index=True)
+    total_checks = Column(Integer, nullable=False, default=0)
+
+    # Last passed date per check type, e.g. {"pressure": "2024-01-31T10:00:00+00:00"}
+    passed_check_types = Column(JSONB, nullable=False, default=dict)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    cylinder = relationship("Cylinder", back_populates="quality_summary")
+
+    def __repr__(self):
+        return f"<CylinderQualitySummary(cylinder_id={self.cylinder_id}, pass_rate={self.pass_rate}, last_status={self.last_status})>"
+
+
 class CylinderLifecycleEvent(Base):
     """Track all lifecycle events and state changes."""
     __tablename__ = "cylinder_lifecycle_events"
@@ -86,11 +86,12 @@ class StockReservation(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     inventory_id = Column(UUID(as_uuid=True), ForeignKey("inventory_locations.id"), nullable=False)
     stock_id = Column(UUID(as_uuid=True), ForeignKey("cylinder_stock.id"), nullable=False)
-    order_id = Column(UUID(as_uuid=True), nullable=False, unique=True)
+    order_id = Column(UUID(as_uuid=True), nullable=False)  # One row per reserved line
     cylinder_size = Column(SQLEnum(CylinderSize), nullable=False)
     quantity = Column(Integer, nullable=False)
     reserved_by = Column(UUID(as_uuid=True), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     is_active = Column(Boolean, default=True)
+    idempotency_key = Column(String, nullable=True)  # Shared by every line of a bulk reservation
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -147,6 +147,18 @@ class StockReservationCreate(BaseModel):
     order_id: str
 
 
+class StockReservationLine(BaseModel):
+    cylinder_size: CylinderSize
+    quantity: int = Field(..., gt=0)
+
+
+class BulkStockReservationCreate(BaseModel):
+    """Every line of an order, reserved together at one inventory location."""
+    order_id: str
+    inventory_id: str
+    lines: List[StockReservationLine] = Field(..., min_length=1, max_length=100)
+
+
 class StockReservationResponse(BaseModel):
     id: str
     inventory_id: str
@@ -304,7 +316,7 @@ class AvailabilityResponse(BaseModel):
 
 
 class BulkAvailabilityCheck(BaseModel):
-    checks: List[AvailabilityCheck]
+    checks: List[AvailabilityCheck] = Field(..., min_length=1, max_length=500)
 
 
 class BulkAvailabilityResponse(BaseModel):
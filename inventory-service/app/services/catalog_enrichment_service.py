@@ -0,0 +1,196 @@
+"""
+Batched vendor and pricing enrichment for catalog results.
+Dedupes vendor IDs, serves what it can from a shared TTL cache, and fetches
+the rest with one bulk request per upstream (chunked, bounded concurrency)
+over pooled HTTP clients.
+"""
+
+import asyncio
+import os
+import sys
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+import logging
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from app.core.config import get_settings
+from shared.networking.http_pool import UpstreamClientPool, HTTPPoolConfig
+from shared.networking.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_VENDOR = {"name": "Unknown Vendor", "rating": None}
+
+
+class CatalogEnrichmentService:
+    """Fetches vendor profiles and pricing for many vendors at once."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.batch_size = int(os.getenv("CATALOG_ENRICHMENT_BATCH_SIZE", "100"))
+        self.max_concurrency = int(os.getenv("CATALOG_ENRICHMENT_MAX_CONCURRENCY", "4"))
+        self.cache = TTLCache(
+            max_size=int(os.getenv("CATALOG_ENRICHMENT_CACHE_SIZE", "5000")),
+            ttl=float(os.getenv("CATALOG_ENRICHMENT_CACHE_TTL", "60"))
+        )
+        self.pool = UpstreamClientPool(
+            {
+                "user": self.settings.USER_SERVICE_URL,
+                "pricing": self.settings.PRICING_SERVICE_URL
+            },
+            HTTPPoolConfig.from_env("INVENTORY_UPSTREAM_")
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Statistics
+        self.bulk_requests = 0
+        self.bulk_failures = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _chunks(self, ids: List[str]) -> Iterable[List[str]]:
+        for start in range(0, len(ids), self.batch_size):
+            yield ids[start:start + self.batch_size]
+
+    def _service_headers(self, user_context: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Headers for pricing-service, which trusts gateway-style user headers."""
+        headers = {"User-Agent": "inventory-service/1.0"}
+        if user_context and user_context.get("user_id"):
+            role = user_context.get("role")
+            headers["X-User-ID"] = str(user_context["user_id"])
+            headers["X-User-Role"] = getattr(role, "value", str(role))
+        return headers
+
+    async def _post(self, service: str, path: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """POST one bulk request under the concurrency limit; None on any failure."""
+        async with self._get_semaphore():
+            self.bulk_requests += 1
+            try:
+                response = await self.pool.request(service, "POST", path, json=payload, headers=headers)
+                if response.status_code == 200:
+                    return response.json()
+                logger.warning(f"Bulk {service} enrichment returned {response.status_code} for {path}")
+            except Exception as e:
+                logger.warning(f"Bulk {service} enrichment failed for {path}: {str(e)}")
+            self.bulk_failures += 1
+            return None
+
+    async def _fetch_vendor_profiles(self, vendor_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch profiles from user-service; found and confirmed-missing vendors are cached."""
+        headers = {"User-Agent": "inventory-service/1.0"}
+        if self.settings.USER_SERVICE_API_KEY:
+            headers["X-API-Key"] = self.settings.USER_SERVICE_API_KEY
+
+        body = await self._post("user", "/internal/vendor-profiles/bulk", {"user_ids": vendor_ids}, headers)
+        if body is None:
+            return {}
+
+        profiles = (body.get("data") or {}).get("profiles", {})
+        fetched = {
+            vendor_id: {**UNKNOWN_VENDOR, **profiles[vendor_id]} if vendor_id in profiles else dict(UNKNOWN_VENDOR)
+            for vendor_id in vendor_ids
+        }
+        self.cache.set_many({("vendor", vendor_id): info for vendor_id, info in fetched.items()})
+        return fetched
+
+    async def _fetch_pricing(
+        self,
+        vendor_ids: List[str],
+        user_context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch pricing summaries from pricing-service; vendors without pricing are cached as empty."""
+        body = await self._post(
+            "pricing", "/api/v1/pricing/vendors/summary",
+            {"vendor_user_ids": vendor_ids}, self._service_headers(user_context)
+        )
+        if body is None:
+            return {}
+
+        summaries = body.get("vendors", {})
+        fetched = {}
+        for vendor_id in vendor_ids:
+            summary = summaries.get(vendor_id) or {}
+            fetched[vendor_id] = {
+                "rating": float(summary["average_rating"]) if summary.get("average_rating") is not None else None,
+                "pricing": {
+                    cylinder_size: {
+                        "unit_price": float(item["unit_price"]),
+                        "delivery_fee": float(item["delivery_fee"]),
+                        "emergency_surcharge": float(item["emergency_surcharge"]),
+                        "minimum_order_quantity": item["minimum_order_quantity"],
+                        "maximum_order_quantity": item.get("maximum_order_quantity"),
+                        "estimated_delivery_time_hours": item.get("estimated_delivery_time_hours", 24)
+                    }
+                    for cylinder_size, item in summary.get("pricing", {}).items()
+                }
+            }
+        self.cache.set_many({("pricing", vendor_id): info for vendor_id, info in fetched.items()})
+        return fetched
+
+    async def enrich(
+        self,
+        vendor_ids: Iterable[Any],
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Dict[str, Any]]]]:
+        """
+        Get vendor info and pricing for a set of vendors.
+
+        Returns:
+            tuple: ({vendor_id: vendor_info}, {vendor_id: {cylinder_size: pricing}})
+        """
+        unique_ids = list(dict.fromkeys(str(vendor_id) for vendor_id in vendor_ids))
+        if not unique_ids:
+            return {}, {}
+
+        cached_vendors, missing_vendors = self.cache.get_many(("vendor", vendor_id) for vendor_id in unique_ids)
+        cached_pricing, missing_pricing = self.cache.get_many(("pricing", vendor_id) for vendor_id in unique_ids)
+
+        vendor_ids_to_fetch = [key[1] for key in missing_vendors]
+        pricing_ids_to_fetch = [key[1] for key in missing_pricing]
+        fetches = [self._fetch_vendor_profiles(chunk) for chunk in self._chunks(vendor_ids_to_fetch)]
+        vendor_fetch_count = len(fetches)
+        fetches += [self._fetch_pricing(chunk, user_context) for chunk in self._chunks(pricing_ids_to_fetch)]
+        results = await asyncio.gather(*fetches) if fetches else []
+
+        vendors = {key[1]: value for key, value in cached_vendors.items()}
+        pricing = {key[1]: value for key, value in cached_pricing.items()}
+        for result in results[:vendor_fetch_count]:
+            vendors.update(result)
+        for result in results[vendor_fetch_count:]:
+            pricing.update(result)
+
+        vendor_info = {}
+        pricing_info = {}
+        for vendor_id in unique_ids:
+            vendor_pricing = pricing.get(vendor_id) or {}
+            info = dict(vendors.get(vendor_id) or UNKNOWN_VENDOR)
+            # Ratings live in pricing-service's vendor records
+            if info.get("rating") is None:
+                info["rating"] = vendor_pricing.get("rating")
+            vendor_info[vendor_id] = info
+            pricing_info[vendor_id] = vendor_pricing.get("pricing", {})
+
+        return vendor_info, pricing_info
+
+    async def close(self):
+        """Release pooled upstream connections."""
+        await self.pool.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get enrichment statistics."""
+        return {
+            "bulk_requests": self.bulk_requests,
+            "bulk_failures": self.bulk_failures,
+            "max_concurrency": self.max_concurrency,
+            "batch_size": self.batch_size,
+            "cache": self.cache.get_stats(),
+            "upstreams": self.pool.get_stats()
+        }
+
+
+# Global catalog enrichment service instance
+catalog_enrichment_service = CatalogEnrichmentService()
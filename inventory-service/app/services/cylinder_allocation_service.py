@@ -1,10 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, text
+from sqlalchemy import select, and_, or_, func, text, distinct, column, literal
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import selectinload, joinedload
 from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import logging
+import uuid
 import sys
 import os
 
@@ -12,11 +14,14 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 from app.models.cylinder import (
-    Cylinder, CylinderQualityCheck, CylinderLifecycleState, CylinderCondition, QualityCheckStatus
+    Cylinder, CylinderQualityCheck, CylinderQualitySummary, CylinderLifecycleState, CylinderCondition, QualityCheckStatus
 )
 from app.models.inventory import Inventory, CylinderStock, StockMovement
+from app.services.quality_summary import passed_type_since
+from app.services.cylinder_scoring import CONDITION_SCORES, score_cylinders, top_k_indices
 from app.schemas.cylinder import CylinderAllocationRequest, CylinderAllocationOption, CylinderAllocationResponse
 from shared.models import CylinderSize
+from shared.networking.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,10 @@ class CylinderAllocationService:
             'quality': 0.2,
             'availability': 0.1
         }
+        self.reliability_cache = TTLCache(
+            max_size=int(os.getenv("ALLOCATION_RELIABILITY_CACHE_SIZE", "2000")),
+            ttl=float(os.getenv("ALLOCATION_RELIABILITY_CACHE_TTL", "60"))
+        )
 
     async def allocate_cylinders_advanced(
         self, 
@@ -88,7 +97,7 @@ class CylinderAllocationService:
         # Base query for available cylinders
         query = select(Cylinder).options(
             joinedload(Cylinder.inventory_location),
-            selectinload(Cylinder.quality_checks),
+            selectinload(Cylinder.quality_summary),
             selectinload(Cylinder.maintenance_records)
         ).where(
             and_(
@@ -110,18 +119,14 @@ class CylinderAllocationService:
 
         # Quality requirements filter
         if allocation_request.quality_requirements:
-            # Subquery for cylinders with recent passing quality checks
-            quality_subquery = select(CylinderQualityCheck.cylinder_id).where(
-                and_(
-                    CylinderQualityCheck.overall_status == QualityCheckStatus.PASSED,
-                    CylinderQualityCheck.check_date >= datetime.now(datetime.timezone.utc) - timedelta(days=90),
-                    CylinderQualityCheck.check_type.in_(allocation_request.quality_requirements)
-                )
-            ).group_by(CylinderQualityCheck.cylinder_id).having(
-                func.count(CylinderQualityCheck.id) >= len(allocation_request.quality_requirements)
+            # Every required check type passed within 90 days, read from the quality summary
+            since = datetime.now(timezone.utc) - timedelta(days=90)
+            query = query.join(
+                CylinderQualitySummary, CylinderQualitySummary.cylinder_id == Cylinder.id
+            ).where(
+                CylinderQualitySummary.last_passed_date >= since,
+                *[passed_type_since(check_type, since) for check_type in allocation_request.quality_requirements]
             )
-            
-            query = query.where(Cylinder.id.in_(quality_subquery))
 
         # Condition filter (exclude damaged/unsafe cylinders)
         query = query.where(
@@ -172,6 +177,9 @@ class CylinderAllocationService:
         """Calculate allocation options with detailed scoring."""
         
         allocation_options = []
+
+        # Score every candidate vendor up front instead of once per option
+        reliability_scores = await self._calculate_reliability_scores(db, list(vendor_groups))
         
         for vendor_id, locations in vendor_groups.items():
             for location_id, location_data in locations.items():
@@ -200,7 +208,8 @@ class CylinderAllocationService:
                 
                 # Calculate comprehensive metrics
                 metrics = await self._calculate_option_metrics(
-                    db, selected_cylinders, distance, allocation_request
+                    db, selected_cylinders, distance, allocation_request,
+                    reliability_score=reliability_scores[vendor_id]
                 )
                 
                 allocation_option = {
@@ -224,18 +233,12 @@ class CylinderAllocationService:
     ) -> List[Cylinder]:
         """Select the best cylinders using multi-criteria scoring."""
         
-        # Score each cylinder
-        scored_cylinders = []
-        for cylinder in cylinders:
-            score = self._calculate_cylinder_score(cylinder, is_emergency)
-            scored_cylinders.append((cylinder, score))
-        
-        # Sort by score (highest first) and select top cylinders
-        scored_cylinders.sort(key=lambda x: x[1], reverse=True)
-        return [cylinder for cylinder, score in scored_cylinders[:quantity]]
+        # Score all cylinders at once and take the top ones without a full sort
+        scores = score_cylinders(cylinders, is_emergency)
+        return [cylinders[i] for i in top_k_indices(quantity, scores)]
 
     def _calculate_cylinder_score(self, cylinder: Cylinder, is_emergency: bool) -> float:
-        """Calculate a comprehensive score for cylinder selection."""
+        """Calculate a comprehensive score for a single cylinder (see score_cylinders for the batch form)."""
         
         score = 0.0
         
@@ -244,24 +247,16 @@ class CylinderAllocationService:
         score += fill_score
         
         # Condition score (0-25 points)
-        condition_scores = {
-            CylinderCondition.EXCELLENT: 25,
-            CylinderCondition.GOOD: 20,
-            CylinderCondition.FAIR: 10,
-            CylinderCondition.POOR: 5,
-            CylinderCondition.DAMAGED: 0,
-            CylinderCondition.UNSAFE: 0
-        }
-        score += condition_scores.get(cylinder.condition, 0)
+        score += CONDITION_SCORES.get(cylinder.condition, 0)
         
         # Age score (0-20 points) - newer cylinders get higher scores
-        days_since_manufacture = (datetime.now(datetime.timezone.utc) - cylinder.manufacture_date).days
+        days_since_manufacture = (datetime.now(timezone.utc) - cylinder.manufacture_date).days
         age_score = max(0, 20 - (days_since_manufacture / 365) * 2)  # 2 points per year
         score += age_score
         
         # Maintenance score (0-15 points)
         if cylinder.last_inspection_date:
-            days_since_inspection = (datetime.now(datetime.timezone.utc) - cylinder.last_inspection_date).days
+            days_since_inspection = (datetime.now(timezone.utc) - cylinder.last_inspection_date).days
             maintenance_score = max(0, 15 - (days_since_inspection / 30))  # Decrease over time
             score += maintenance_score
         
@@ -276,7 +271,8 @@ class CylinderAllocationService:
         db: AsyncSession, 
         cylinders: List[Cylinder], 
         distance_km: Decimal, 
-        allocation_request: CylinderAllocationRequest
+        allocation_request: CylinderAllocationRequest,
+        reliability_score: Optional[float] = None
     ) -> Dict[str, Any]:
         """Calculate comprehensive metrics for an allocation option."""
         
@@ -296,7 +292,8 @@ class CylinderAllocationService:
         delivery_time = self._estimate_delivery_time(distance_km, allocation_request.is_emergency)
         
         # Reliability score (based on vendor history)
-        reliability_score = await self._calculate_reliability_score(db, cylinders[0].vendor_id)
+        if reliability_score is None:
+            reliability_score = await self._calculate_reliability_score(db, cylinders[0].vendor_id)
         
         return {
             'total_capacity_liters': total_capacity,
@@ -408,19 +405,14 @@ class CylinderAllocationService:
         return max(60, int(base_time))
 
     async def _calculate_quality_score(self, db: AsyncSession, cylinders: List[Cylinder]) -> float:
-        """Calculate quality score based on recent quality checks."""
+        """Calculate quality score from each cylinder's rolling quality summary."""
         total_score = 0.0
+        since = datetime.now(timezone.utc) - timedelta(days=90)
         
         for cylinder in cylinders:
-            # Get recent quality checks
-            recent_checks = [
-                qc for qc in cylinder.quality_checks
-                if qc.check_date >= datetime.now(datetime.timezone.utc) - timedelta(days=90)
-            ]
-            
-            if recent_checks:
-                passed_checks = sum(1 for qc in recent_checks if qc.overall_status == QualityCheckStatus.PASSED)
-                cylinder_score = (passed_checks / len(recent_checks)) * 100
+            summary = cylinder.quality_summary
+            if summary and summary.last_check_date >= since:
+                cylinder_score = summary.pass_rate
             else:
                 cylinder_score = 70  # Default score if no recent checks
             
@@ -430,187 +422,183 @@ class CylinderAllocationService:
 
     async def _calculate_reliability_score(self, db: AsyncSession, vendor_id: str) -> float:
         """Calculate vendor reliability score based on vendor performance metrics."""
-        try:
-            # Import vendor models (assuming they're available via HTTP calls to pricing service)
-            # For now, we'll calculate based on available inventory data and simulate vendor metrics
-
-            # Base score
-            reliability_score = 50.0
-
-            # Factor 1: Inventory availability and consistency (30% weight)
-            availability_score = await self._calculate_availability_score(db, vendor_id)
-            reliability_score += availability_score * 0.3
+        scores = await self._calculate_reliability_scores(db, [vendor_id])
+        return scores[str(vendor_id)]
 
-            # Factor 2: Stock movement consistency (25% weight)
-            consistency_score = await self._calculate_stock_consistency_score(db, vendor_id)
-            reliability_score += consistency_score * 0.25
+    async def _calculate_reliability_scores(self, db: AsyncSession, vendor_ids: List[str]) -> Dict[str, float]:
+        """Reliability scores for many vendors: cached ones are reused, the rest come from one query."""
+        vendor_ids = list(dict.fromkeys(str(vendor_id) for vendor_id in vendor_ids))
+        cached, missing = self.reliability_cache.get_many(vendor_ids)
+        scores = dict(cached)
+        if not missing:
+            return scores
 
-            # Factor 3: Response time and active status (20% weight)
-            responsiveness_score = await self._calculate_responsiveness_score(db, vendor_id)
-            reliability_score += responsiveness_score * 0.2
-
-            # Factor 4: Quality metrics from cylinder checks (25% weight)
-            quality_score = await self._calculate_vendor_quality_score(db, vendor_id)
-            reliability_score += quality_score * 0.25
-
-            # Ensure score is within valid range
-            return max(0.0, min(100.0, reliability_score))
-
-        except Exception as e:
-            logger.error(f"Error calculating reliability score for vendor {vendor_id}: {e}")
-            # Return a conservative default score on error
-            return 75.0
-
-    async def _calculate_availability_score(self, db: AsyncSession, vendor_id: str) -> float:
-        """Calculate score based on inventory availability."""
         try:
-            # Get vendor's inventory locations and stock levels
-            result = await db.execute(
-                select(Inventory, CylinderStock)
-                .join(CylinderStock, Inventory.id == CylinderStock.inventory_id)
-                .where(and_(
-                    Inventory.vendor_id == vendor_id,
-                    Inventory.is_active == True
-                ))
-            )
-
-            inventories = result.fetchall()
-            if not inventories:
-                return 0.0
-
-            # Calculate availability metrics
-            total_locations = len(set(inv.Inventory.id for inv in inventories))
-            locations_with_stock = len(set(
-                inv.Inventory.id for inv in inventories
-                if inv.CylinderStock.available_quantity > 0
-            ))
-
-            # Calculate stock adequacy (above minimum threshold)
-            adequate_stock_count = sum(
-                1 for inv in inventories
-                if inv.CylinderStock.available_quantity > inv.CylinderStock.minimum_threshold
-            )
-
-            # Availability score based on active locations and stock levels
-            location_score = (locations_with_stock / total_locations) * 50 if total_locations > 0 else 0
-            stock_score = (adequate_stock_count / len(inventories)) * 50 if inventories else 0
-
-            return location_score + stock_score
+            result = await db.execute(self._reliability_components_query(missing))
+            fetched = {}
+            for row in result:
+                # Base score plus weighted components
+                reliability_score = 50.0
+                reliability_score += self._calculate_availability_score(
+                    row.total_locations, row.locations_with_stock, row.adequate_stock, row.stock_rows
+                ) * 0.3
+                reliability_score += self._calculate_stock_consistency_score(
+                    row.movements, row.inbound_movements, row.outbound_movements
+                ) * 0.25
+                reliability_score += self._calculate_responsiveness_score(
+                    row.active_locations, row.recent_updates
+                ) * 0.2
+                reliability_score += self._calculate_vendor_quality_score(
+                    row.quality_checks, row.passed_quality_checks
+                ) * 0.25
+
+                # Ensure score is within valid range
+                fetched[str(row.vendor_id)] = max(0.0, min(100.0, reliability_score))
+
+            self.reliability_cache.set_many(fetched)
+            scores.update(fetched)
 
         except Exception as e:
-            logger.error(f"Error calculating availability score: {e}")
-            return 30.0
-
-    async def _calculate_stock_consistency_score(self, db: AsyncSession, vendor_id: str) -> float:
-        """Calculate score based on stock movement patterns and consistency."""
-        try:
-            # Get recent stock movements for this vendor (last 30 days)
-            thirty_days_ago = datetime.now(datetime.timezone.utc) - timedelta(days=30)
-
-            result = await db.execute(
-                select(StockMovement)
-                .join(CylinderStock, StockMovement.stock_id == CylinderStock.id)
-                .join(Inventory, CylinderStock.inventory_id == Inventory.id)
-                .where(and_(
-                    Inventory.vendor_id == vendor_id,
-                    StockMovement.created_at >= thirty_days_ago
-                ))
-                .order_by(StockMovement.created_at.desc())
-            )
+            logger.error(f"Error calculating reliability scores for {len(missing)} vendors: {e}")
+
+        # Conservative default for anything the query could not score
+        for vendor_id in missing:
+            scores.setdefault(vendor_id, 75.0)
+        return scores
+
+    def _reliability_components_query(self, vendor_ids: List[str]):
+        """Aggregate every reliability input for a set of vendors in a single statement."""
+        ids = [uuid.UUID(vendor_id) for vendor_id in vendor_ids]
+        now = datetime.now(timezone.utc)
+
+        vendors = func.unnest(
+            literal(ids, ARRAY(UUID(as_uuid=True)))
+        ).table_valued(column("vendor_id", UUID(as_uuid=True))).render_derived(name="vendors")
+
+        # Inventory availability: locations and stock rows of active locations
+        availability = select(
+            Inventory.vendor_id,
+            func.count(distinct(Inventory.id)).label("total_locations"),
+            func.count(distinct(Inventory.id)).filter(CylinderStock.available_quantity > 0).label("locations_with_stock"),
+            func.count().filter(CylinderStock.available_quantity > CylinderStock.minimum_threshold).label("adequate_stock"),
+            func.count().label("stock_rows")
+        ).join(
+            CylinderStock, Inventory.id == CylinderStock.inventory_id
+        ).where(and_(
+            Inventory.vendor_id.in_(ids),
+            Inventory.is_active == True
+        )).group_by(Inventory.vendor_id).subquery("availability")
+
+        # Stock movement consistency over the last 30 days
+        movements = select(
+            Inventory.vendor_id,
+            func.count().label("movements"),
+            func.count().filter(StockMovement.movement_type.in_(['received', 'restocked'])).label("inbound_movements"),
+            func.count().filter(StockMovement.movement_type.in_(['sold', 'reserved'])).label("outbound_movements")
+        ).select_from(StockMovement).join(
+            CylinderStock, StockMovement.stock_id == CylinderStock.id
+        ).join(
+            Inventory, CylinderStock.inventory_id == Inventory.id
+        ).where(and_(
+            Inventory.vendor_id.in_(ids),
+            StockMovement.created_at >= now - timedelta(days=30)
+        )).group_by(Inventory.vendor_id).subquery("movements")
+
+        # Responsiveness: active locations and locations updated in the last 7 days
+        responsiveness = select(
+            Inventory.vendor_id,
+            func.count().filter(Inventory.is_active == True).label("active_locations"),
+            func.count().filter(Inventory.updated_at >= now - timedelta(days=7)).label("recent_updates")
+        ).where(Inventory.vendor_id.in_(ids)).group_by(Inventory.vendor_id).subquery("responsiveness")
+
+        # Quality: each vendor's latest 100 checks from the last 90 days
+        ranked_checks = select(
+            CylinderQualityCheck.vendor_id,
+            CylinderQualityCheck.overall_status,
+            func.row_number().over(
+                partition_by=CylinderQualityCheck.vendor_id,
+                order_by=CylinderQualityCheck.check_date.desc()
+            ).label("check_rank")
+        ).where(and_(
+            CylinderQualityCheck.vendor_id.in_(ids),
+            CylinderQualityCheck.check_date >= now - timedelta(days=90)
+        )).subquery("ranked_checks")
+        quality = select(
+            ranked_checks.c.vendor_id,
+            func.count().label("quality_checks"),
+            func.count().filter(ranked_checks.c.overall_status == QualityCheckStatus.PASSED).label("passed_quality_checks")
+        ).where(ranked_checks.c.check_rank <= 100).group_by(ranked_checks.c.vendor_id).subquery("quality")
+
+        return select(
+            vendors.c.vendor_id,
+            func.coalesce(availability.c.total_locations, 0).label("total_locations"),
+            func.coalesce(availability.c.locations_with_stock, 0).label("locations_with_stock"),
+            func.coalesce(availability.c.adequate_stock, 0).label("adequate_stock"),
+            func.coalesce(availability.c.stock_rows, 0).label("stock_rows"),
+            func.coalesce(movements.c.movements, 0).label("movements"),
+            func.coalesce(movements.c.inbound_movements, 0).label("inbound_movements"),
+            func.coalesce(movements.c.outbound_movements, 0).label("outbound_movements"),
+            func.coalesce(responsiveness.c.active_locations, 0).label("active_locations"),
+            func.coalesce(responsiveness.c.recent_updates, 0).label("recent_updates"),
+            func.coalesce(quality.c.quality_checks, 0).label("quality_checks"),
+            func.coalesce(quality.c.passed_quality_checks, 0).label("passed_quality_checks")
+        ).select_from(vendors).outerjoin(
+            availability, availability.c.vendor_id == vendors.c.vendor_id
+        ).outerjoin(
+            movements, movements.c.vendor_id == vendors.c.vendor_id
+        ).outerjoin(
+            responsiveness, responsiveness.c.vendor_id == vendors.c.vendor_id
+        ).outerjoin(
+            quality, quality.c.vendor_id == vendors.c.vendor_id
+        )
 
-            movements = result.fetchall()
-            if not movements:
-                return 40.0  # Neutral score for no recent activity
+    def _calculate_availability_score(
+        self, total_locations: int, locations_with_stock: int, adequate_stock: int, stock_rows: int
+    ) -> float:
+        """Calculate score based on inventory availability."""
+        if not stock_rows:
+            return 0.0
 
-            # Analyze movement patterns
-            inbound_movements = [m for m in movements if m.movement_type in ['received', 'restocked']]
-            outbound_movements = [m for m in movements if m.movement_type in ['sold', 'reserved']]
+        # Availability score based on active locations and stock levels (above minimum threshold)
+        location_score = (locations_with_stock / total_locations) * 50 if total_locations > 0 else 0
+        stock_score = (adequate_stock / stock_rows) * 50
+        return location_score + stock_score
 
-            # Score based on regular restocking patterns
-            restocking_score = min(50.0, len(inbound_movements) * 5)  # Up to 50 points for regular restocking
+    def _calculate_stock_consistency_score(self, movements: int, inbound: int, outbound: int) -> float:
+        """Calculate score based on stock movement patterns over the last 30 days."""
+        if not movements:
+            return 40.0  # Neutral score for no recent activity
 
-            # Score based on order fulfillment (outbound activity)
-            fulfillment_score = min(50.0, len(outbound_movements) * 2)  # Up to 50 points for active sales
+        # Score based on regular restocking patterns
+        restocking_score = min(50.0, inbound * 5)  # Up to 50 points for regular restocking
 
-            return restocking_score + fulfillment_score
+        # Score based on order fulfillment (outbound activity)
+        fulfillment_score = min(50.0, outbound * 2)  # Up to 50 points for active sales
 
-        except Exception as e:
-            logger.error(f"Error calculating stock consistency score: {e}")
-            return 35.0
+        return restocking_score + fulfillment_score
 
-    async def _calculate_responsiveness_score(self, db: AsyncSession, vendor_id: str) -> float:
+    def _calculate_responsiveness_score(self, active_locations: int, recent_updates: int) -> float:
         """Calculate score based on vendor responsiveness and activity."""
-        try:
-            # Check if vendor has active inventory locations
-            result = await db.execute(
-                select(func.count(Inventory.id))
-                .where(and_(
-                    Inventory.vendor_id == vendor_id,
-                    Inventory.is_active == True
-                ))
-            )
+        # Base score for having active locations
+        activity_score = min(60.0, active_locations * 15)  # Up to 60 points for multiple active locations
 
-            active_locations = result.scalar() or 0
+        # Recent inventory updates (last 7 days)
+        update_score = min(40.0, recent_updates * 10)  # Up to 40 points for recent updates
 
-            # Base score for having active locations
-            activity_score = min(60.0, active_locations * 15)  # Up to 60 points for multiple active locations
+        return activity_score + update_score
 
-            # Check recent inventory updates (last 7 days)
-            seven_days_ago = datetime.now(datetime.timezone.utc) - timedelta(days=7)
-            result = await db.execute(
-                select(func.count(Inventory.id))
-                .where(and_(
-                    Inventory.vendor_id == vendor_id,
-                    Inventory.updated_at >= seven_days_ago
-                ))
-            )
-
-            recent_updates = result.scalar() or 0
-            update_score = min(40.0, recent_updates * 10)  # Up to 40 points for recent updates
+    def _calculate_vendor_quality_score(self, quality_checks: int, passed_checks: int) -> float:
+        """Calculate score based on the vendor's recent cylinder quality checks."""
+        if not quality_checks:
+            return 60.0  # Neutral score if no quality data
 
-            return activity_score + update_score
+        quality_rate = (passed_checks / quality_checks) * 100
 
-        except Exception as e:
-            logger.error(f"Error calculating responsiveness score: {e}")
-            return 45.0
-
-    async def _calculate_vendor_quality_score(self, db: AsyncSession, vendor_id: str) -> float:
-        """Calculate score based on quality of cylinders from this vendor."""
-        try:
-            # Get quality check results for cylinders from this vendor's inventory
-            result = await db.execute(
-                select(CylinderQualityCheck)
-                .join(Cylinder, CylinderQualityCheck.cylinder_id == Cylinder.id)
-                .join(Inventory, Cylinder.current_location_id == Inventory.id)
-                .where(and_(
-                    Inventory.vendor_id == vendor_id,
-                    CylinderQualityCheck.check_date >= datetime.now(datetime.timezone.utc) - timedelta(days=90)
-                ))
-                .order_by(CylinderQualityCheck.check_date.desc())
-                .limit(100)  # Limit to recent 100 checks
-            )
-
-            quality_checks = result.fetchall()
-            if not quality_checks:
-                return 60.0  # Neutral score if no quality data
-
-            # Calculate quality metrics
-            passed_checks = sum(
-                1 for qc in quality_checks
-                if qc.overall_status == QualityCheckStatus.PASSED
-            )
-
-            quality_rate = (passed_checks / len(quality_checks)) * 100
-
-            # Bonus for excellent quality (>95%)
-            if quality_rate > 95:
-                return 100.0
-            elif quality_rate > 85:
-                return quality_rate
-            else:
-                # Penalty for poor quality
-                return max(20.0, quality_rate * 0.8)
-
-        except Exception as e:
-            logger.error(f"Error calculating vendor quality score: {e}")
-            return 55.0
+        # Bonus for excellent quality (>95%)
+        if quality_rate > 95:
+            return 100.0
+        elif quality_rate > 85:
+            return quality_rate
+        else:
+            # Penalty for poor quality
+            return max(20.0, quality_rate * 0.8)
@@ -0,0 +1,88 @@
+"""
+Vectorized cylinder scoring and top-k selection.
+Pulls the handful of columns cylinder selection depends on into NumPy arrays,
+scores every candidate in one pass and picks the best k with argpartition
+instead of sorting the whole list. Rankings match a stable descending sort,
+so ties keep their input order.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.models.cylinder import CylinderCondition
+
+SECONDS_PER_DAY = 86400
+
+# Condition score (0-25 points)
+CONDITION_SCORES = {
+    CylinderCondition.EXCELLENT: 25,
+    CylinderCondition.GOOD: 20,
+    CylinderCondition.FAIR: 10,
+    CylinderCondition.POOR: 5,
+    CylinderCondition.DAMAGED: 0,
+    CylinderCondition.UNSAFE: 0
+}
+
+
+def _elapsed_days(timestamps: np.ndarray, now: datetime) -> np.ndarray:
+    """Whole days between each timestamp and now, like timedelta.days."""
+    return np.floor((now.timestamp() - timestamps) / SECONDS_PER_DAY)
+
+
+def score_cylinders(cylinders: Sequence, is_emergency: bool, now: Optional[datetime] = None) -> np.ndarray:
+    """Selection score of every cylinder; same formula as the per-cylinder loop."""
+    now = now or datetime.now(timezone.utc)
+    count = len(cylinders)
+
+    fill = np.fromiter((float(c.fill_level_percentage) for c in cylinders), dtype=np.float64, count=count)
+    condition = np.fromiter((CONDITION_SCORES.get(c.condition, 0) for c in cylinders), dtype=np.float64, count=count)
+    manufactured = np.fromiter((c.manufacture_date.timestamp() for c in cylinders), dtype=np.float64, count=count)
+    inspected = np.fromiter(
+        (c.last_inspection_date.timestamp() if c.last_inspection_date else np.nan for c in cylinders),
+        dtype=np.float64, count=count
+    )
+
+    # Fill level score (0-30 points)
+    scores = fill * 0.3
+    scores += condition
+
+    # Age score (0-20 points) - 2 points per year
+    scores += np.maximum(0, 20 - (_elapsed_days(manufactured, now) / 365) * 2)
+
+    # Maintenance score (0-15 points), nothing for never-inspected cylinders
+    maintenance = np.maximum(0, 15 - (_elapsed_days(inspected, now) / 30))
+    scores += np.where(np.isnan(inspected), 0.0, maintenance)
+
+    # Emergency readiness bonus (0-10 points)
+    if is_emergency:
+        ready = np.fromiter((bool(c.is_emergency_ready) for c in cylinders), dtype=bool, count=count)
+        scores += np.where(ready, 10.0, 0.0)
+
+    return scores
+
+
+def top_k_indices(k: int, *keys: np.ndarray) -> np.ndarray:
+    """
+    Indices of the k best rows, best first.
+
+    Rows are ordered by keys descending, most significant key first, with
+    ties kept in input order, exactly like sorted(..., reverse=True)[:k].
+    argpartition finds the k-th best primary key; only rows at or above it
+    are sorted.
+    """
+    primary = keys[0]
+    count = len(primary)
+    if k <= 0 or count == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < count:
+        kth = np.argpartition(primary, count - k)[count - k]
+        candidates = np.flatnonzero(primary >= primary[kth])
+    else:
+        candidates = np.arange(count)
+
+    # lexsort sorts by its last key first; the row index breaks remaining ties
+    order = np.lexsort((candidates,) + tuple(-key[candidates] for key in reversed(keys)))
+    return candidates[order[:k]]
@@ -9,11 +9,13 @@ import logging
 import sys
 import os
 
+import numpy as np
+
 # Add parent directory to path for shared imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 from app.models.cylinder import (
-    Cylinder, CylinderMaintenance, CylinderQualityCheck, CylinderLifecycleEvent,
+    Cylinder, CylinderMaintenance, CylinderQualityCheck, CylinderQualitySummary, CylinderLifecycleEvent,
     CylinderUsageLog, CylinderBatch, CylinderBatchItem,
     CylinderLifecycleState, CylinderCondition, MaintenanceType, QualityCheckStatus
 )
@@ -28,6 +30,8 @@ from app.schemas.cylinder import (
 )
 from shared.models import CylinderSize, UserRole
 from app.services.event_service import event_service
+from app.services.cylinder_scoring import top_k_indices
+from app.services.quality_summary import summary_upsert_statement
 
 logger = logging.getLogger(__name__)
 
@@ -329,14 +333,10 @@ class CylinderService:
 
             # Add quality requirements filter
             if allocation_request.quality_requirements:
-                # Filter based on recent quality checks
-                subquery = select(CylinderQualityCheck.cylinder_id).where(
-                    and_(
-                        CylinderQualityCheck.overall_status == QualityCheckStatus.PASSED,
-                        CylinderQualityCheck.check_date >= datetime.utcnow() - timedelta(days=30)
-                    )
-                )
-                query = query.where(Cylinder.id.in_(subquery))
+                # Filter based on the last passed check in the quality summary
+                query = query.join(
+                    CylinderQualitySummary, CylinderQualitySummary.cylinder_id == Cylinder.id
+                ).where(CylinderQualitySummary.last_passed_date >= datetime.utcnow() - timedelta(days=30))
 
             result = await db.execute(query)
             available_cylinders = result.scalars().all()
@@ -380,11 +380,15 @@ class CylinderService:
                             continue
 
                         # Select best cylinders (highest fill level, newest)
-                        selected_cylinders = sorted(
-                            cylinders,
-                            key=lambda c: (c.fill_level_percentage, c.created_at),
-                            reverse=True
-                        )[:allocation_request.quantity]
+                        fill_levels = np.fromiter(
+                            (float(c.fill_level_percentage) for c in cylinders), dtype=np.float64, count=len(cylinders)
+                        )
+                        created = np.fromiter(
+                            (c.created_at.timestamp() for c in cylinders), dtype=np.float64, count=len(cylinders)
+                        )
+                        selected_cylinders = [
+                            cylinders[i] for i in top_k_indices(allocation_request.quantity, fill_levels, created)
+                        ]
 
                         # Calculate estimated delivery time and cost
                         delivery_time = self._estimate_delivery_time(distance, allocation_request.is_emergency)
@@ -834,4 +838,7 @@ class CylinderService:
         else:
             quality_check.overall_status = QualityCheckStatus.PASSED
 
+        # Fold the result into the cylinder's rolling quality summary
+        await db.execute(summary_upsert_statement(quality_check))
+
         await db.commit()
@@ -1,7 +1,7 @@
 import json
 import asyncio
 import aio_pika
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import sys
 import os
@@ -437,6 +437,18 @@ class EventService:
             }
         )
     
+    async def publish_reservations_expired(self, reservations: List[Dict[str, Any]]):
+        """Publish one event for every reservation released by an expiry sweep."""
+        await self.publish_event(
+            EventType.INVENTORY_UPDATED,
+            {
+                "action": "reservations_expired",
+                "reservation_count": len(reservations),
+                "total_quantity": sum(item["quantity"] for item in reservations),
+                "reservations": reservations
+            }
+        )
+    
     async def process_events(self):
         """Process events from the queue (background task)."""
         while True:
@@ -13,13 +13,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 from app.models.inventory import Inventory, CylinderStock, StockMovement, StockReservation
 from app.schemas.inventory import (
     InventoryCreate, InventoryUpdate, StockCreate, StockUpdate,
-    StockMovementCreate, InventorySearchResult
+    StockMovementCreate, StockReservationCreate, BulkStockReservationCreate, InventorySearchResult
 )
+from app.services.reservation_engine import reservation_engine, ReservationLine, InsufficientStockError
 from shared.models import CylinderSize, UserRole
 
 
 class InventoryService:
     """Service for managing inventory operations."""
+
+    # Locations tried by create_reservation before giving up
+    RESERVATION_CANDIDATES = 5
     
     async def create_inventory_location(
         self, 
@@ -201,51 +205,15 @@ class InventoryService:
         user_id: str
     ) -> bool:
         """Reserve stock for an order."""
-        # Get the stock record
-        result = await db.execute(
-            select(CylinderStock)
-            .where(and_(
-                CylinderStock.inventory_id == inventory_id,
-                CylinderStock.cylinder_size == cylinder_size
-            ))
-        )
-        stock = result.scalar_one_or_none()
-        
-        if not stock or stock.available_quantity < quantity:
+        try:
+            await reservation_engine.reserve(
+                db,
+                [ReservationLine(uuid.UUID(str(inventory_id)), cylinder_size, quantity)],
+                order_id=order_id,
+                user_id=user_id
+            )
+        except InsufficientStockError:
             return False
-        
-        # Update stock quantities
-        stock.available_quantity -= quantity
-        stock.reserved_quantity += quantity
-        
-        # Create reservation record
-        reservation = StockReservation(
-            inventory_id=inventory_id,
-            stock_id=stock.id,
-            order_id=order_id,
-            cylinder_size=cylinder_size,
-            quantity=quantity,
-            reserved_by=user_id,
-            expires_at=datetime.utcnow() + timedelta(hours=24)  # 24-hour expiry
-        )
-        db.add(reservation)
-        
-        # Create stock movement record
-        movement = StockMovement(
-            inventory_id=inventory_id,
-            stock_id=stock.id,
-            cylinder_size=cylinder_size,
-            movement_type="reserved",
-            quantity=quantity,
-            previous_quantity=stock.available_quantity + quantity,
-            new_quantity=stock.available_quantity,
-            order_id=order_id,
-            notes=f"Reserved for order {order_id}",
-            created_by=user_id
-        )
-        db.add(movement)
-        
-        await db.commit()
         return True
 
     async def create_reservation(
@@ -255,56 +223,51 @@ class InventoryService:
         user_id: str
     ) -> "StockReservation":
         """Create a stock reservation from reservation data."""
-        from app.schemas.inventory import StockReservationCreate
-        from app.models.inventory import StockReservation
-
-        # Find the inventory location that has stock for this cylinder size
-        # For now, we'll need to get the inventory_id from the first available location
-        # In a real implementation, this should be passed or determined by business logic
+        # The request does not name a location, so try the best-stocked
+        # candidates; losing a race on one moves on to the next
         result = await db.execute(
-            select(CylinderStock)
+            select(CylinderStock.inventory_id)
             .join(Inventory, CylinderStock.inventory_id == Inventory.id)
             .where(and_(
+                Inventory.is_active == True,
                 CylinderStock.cylinder_size == reservation_data.cylinder_size,
                 CylinderStock.available_quantity >= reservation_data.quantity
             ))
-            .limit(1)
+            .order_by(CylinderStock.available_quantity.desc())
+            .limit(self.RESERVATION_CANDIDATES)
         )
-        stock = result.scalar_one_or_none()
-
-        if not stock:
-            raise ValueError(f"No available stock found for {reservation_data.cylinder_size} with quantity {reservation_data.quantity}")
+        candidates = result.scalars().all()
 
-        # Use the existing reserve_stock method
-        success = await self.reserve_stock(
-            db=db,
-            inventory_id=str(stock.inventory_id),
-            cylinder_size=reservation_data.cylinder_size,
-            quantity=reservation_data.quantity,
-            order_id=reservation_data.order_id,
-            user_id=user_id
-        )
+        for inventory_id in candidates:
+            try:
+                reservations = await reservation_engine.reserve(
+                    db,
+                    [ReservationLine(inventory_id, reservation_data.cylinder_size, reservation_data.quantity)],
+                    order_id=reservation_data.order_id,
+                    user_id=user_id
+                )
+                return reservations[0]
+            except InsufficientStockError:
+                continue
 
-        if not success:
-            raise ValueError("Failed to reserve stock")
+        raise ValueError(f"No available stock found for {reservation_data.cylinder_size} with quantity {reservation_data.quantity}")
 
-        # Get the created reservation
-        result = await db.execute(
-            select(StockReservation)
-            .where(and_(
-                StockReservation.order_id == reservation_data.order_id,
-                StockReservation.cylinder_size == reservation_data.cylinder_size,
-                StockReservation.is_active == True
-            ))
-            .order_by(StockReservation.created_at.desc())
-            .limit(1)
+    async def create_bulk_reservation(
+        self,
+        db: AsyncSession,
+        reservation_data: "BulkStockReservationCreate",
+        user_id: str,
+        idempotency_key: Optional[str] = None
+    ) -> List["StockReservation"]:
+        """Reserve every line of an order at one location, all or nothing."""
+        inventory_id = uuid.UUID(reservation_data.inventory_id)
+        return await reservation_engine.reserve(
+            db,
+            [ReservationLine(inventory_id, line.cylinder_size, line.quantity) for line in reservation_data.lines],
+            order_id=reservation_data.order_id,
+            user_id=user_id,
+            idempotency_key=idempotency_key
         )
-        reservation = result.scalar_one_or_none()
-
-        if not reservation:
-            raise ValueError("Reservation was created but could not be retrieved")
-
-        return reservation
 
     async def release_reservation(
         self,
@@ -314,7 +277,7 @@ class InventoryService:
         user_id: str
     ) -> bool:
         """Release stock reservation."""
-        # Get the reservation
+        # Lock the order's reservation lines so the expiry sweeper cannot release them concurrently
         result = await db.execute(
             select(StockReservation)
             .where(and_(
@@ -322,41 +285,47 @@ class InventoryService:
                 StockReservation.order_id == order_id,
                 StockReservation.is_active == True
             ))
+            .order_by(StockReservation.stock_id)
+            .with_for_update()
         )
-        reservation = result.scalar_one_or_none()
+        reservations = result.scalars().all()
         
-        if not reservation:
+        if not reservations:
             return False
         
-        # Get the stock record
+        # Lock stock rows in id order, as the reservation engine does
         result = await db.execute(
             select(CylinderStock)
-            .where(CylinderStock.id == reservation.stock_id)
+            .where(CylinderStock.id.in_([reservation.stock_id for reservation in reservations]))
+            .order_by(CylinderStock.id)
+            .with_for_update()
         )
-        stock = result.scalar_one_or_none()
+        stocks = {stock.id: stock for stock in result.scalars().all()}
         
-        if stock:
-            # Update stock quantities
-            stock.available_quantity += reservation.quantity
-            stock.reserved_quantity -= reservation.quantity
+        for reservation in reservations:
+            stock = stocks.get(reservation.stock_id)
+            if stock:
+                # Update stock quantities
+                stock.available_quantity += reservation.quantity
+                stock.reserved_quantity -= reservation.quantity
+                
+                # Create stock movement record
+                movement = StockMovement(
+                    inventory_id=inventory_id,
+                    stock_id=stock.id,
+                    cylinder_size=reservation.cylinder_size,
+                    movement_type="released",
+                    quantity=reservation.quantity,
+                    previous_quantity=stock.available_quantity - reservation.quantity,
+                    new_quantity=stock.available_quantity,
+                    order_id=order_id,
+                    notes=f"Released reservation for order {order_id}",
+                    created_by=user_id
+                )
+                db.add(movement)
             
-            # Create stock movement record
-            movement = StockMovement(
-                inventory_id=inventory_id,
-                stock_id=stock.id,
-                cylinder_size=reservation.cylinder_size,
-                movement_type="released",
-                quantity=reservation.quantity,
-                previous_quantity=stock.available_quantity - reservation.quantity,
-                new_quantity=stock.available_quantity,
-                order_id=order_id,
-                notes=f"Released reservation for order {order_id}",
-                created_by=user_id
-            )
-            db.add(movement)
-        
-        # Deactivate reservation
-        reservation.is_active = False
+            # Deactivate reservation
+            reservation.is_active = False
         
         await db.commit()
         return True
@@ -1,10 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, desc
+from sqlalchemy import select, and_, or_, func, asc, desc, cast, column, literal, String
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import selectinload
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-import httpx
+import heapq
 import math
+import uuid
 import sys
 import os
 import logging
@@ -18,8 +20,9 @@ from app.schemas.inventory import (
     AvailabilityCheck, AvailabilityResponse, BulkAvailabilityCheck, BulkAvailabilityResponse
 )
 from app.core.config import get_settings
+from app.services.catalog_enrichment_service import catalog_enrichment_service
+from shared.database.spatial import bbox_filter, haversine_distance_km
 from shared.models import CylinderSize
-from shared.utils import calculate_distance_km
 
 logger = logging.getLogger(__name__)
 
@@ -33,89 +36,146 @@ class ProductCatalogService:
         db: AsyncSession,
         request: ProductCatalogRequest,
         page: int = 1,
-        page_size: int = 20
+        page_size: int = 20,
+        user_context: Optional[Dict[str, Any]] = None
     ) -> tuple[List[ProductCatalogItem], int]:
         """Search product catalog with location-based filtering and pricing."""
         try:
-            # Get inventory locations within radius
-            query = select(Inventory).options(
-                selectinload(Inventory.stock)
-            ).where(
-                and_(
-                    Inventory.is_active == True,
-                    func.ST_DWithin(
-                        func.ST_Point(Inventory.longitude, Inventory.latitude),
-                        func.ST_Point(request.hospital_longitude, request.hospital_latitude),
-                        request.max_distance_km * 1000  # Convert km to meters
-                    )
-                )
-            )
-
-            result = await db.execute(query)
-            locations = result.scalars().all()
+            query, distance = self._catalog_rows_query(request)
+            offset = (page - 1) * page_size
+
+            if request.sort_by in ("distance", "delivery_time"):
+                # Delivery time only grows with distance, so both orderings are
+                # resolved, paginated and counted by the database
+                direction = desc if request.sort_order == "desc" else asc
+                page_query = query.add_columns(
+                    func.count().over().label("total_count")
+                ).order_by(
+                    direction(distance), Inventory.id, CylinderStock.cylinder_size
+                ).offset(offset).limit(page_size)
+
+                rows = (await db.execute(page_query)).all()
+                if rows:
+                    total_items = rows[0].total_count
+                elif offset:
+                    # Past the last page: the window count is unavailable
+                    total_items = (await db.execute(
+                        select(func.count()).select_from(query.subquery())
+                    )).scalar()
+                else:
+                    total_items = 0
 
-            catalog_items = []
-            
-            for location in locations:
-                # Calculate distance
-                distance_km = calculate_distance_km(
-                    request.hospital_latitude, request.hospital_longitude,
-                    location.latitude, location.longitude
+                vendor_infos, pricing_infos = await catalog_enrichment_service.enrich(
+                    (row.vendor_id for row in rows), user_context
+                )
+            else:
+                # Price and rating come from upstream services, so rank the
+                # light (location, stock) rows here; ORM objects are never loaded
+                rows = (await db.execute(
+                    query.order_by(distance, Inventory.id, CylinderStock.cylinder_size)
+                )).all()
+                total_items = len(rows)
+
+                vendor_infos, pricing_infos = await catalog_enrichment_service.enrich(
+                    (row.vendor_id for row in rows), user_context
                 )
 
-                # Get vendor info and pricing
-                vendor_info = await self._get_vendor_info(location.vendor_id)
-                pricing_info = await self._get_pricing_info(location.vendor_id, location.id)
-
-                # Filter by cylinder size if specified
-                stock_items = location.stock
-                if request.cylinder_size:
-                    stock_items = [s for s in stock_items if s.cylinder_size == request.cylinder_size]
-
-                # Create catalog items for each cylinder size with stock
-                for stock in stock_items:
-                    if stock.available_quantity >= request.quantity:
-                        # Get pricing for this specific cylinder size
-                        cylinder_pricing = pricing_info.get(stock.cylinder_size.value, {})
-                        
-                        catalog_item = ProductCatalogItem(
-                            vendor_id=location.vendor_id,
-                            vendor_name=vendor_info.get("name", "Unknown Vendor"),
-                            location_id=location.id,
-                            location_name=location.location_name,
-                            address=location.address,
-                            city=location.city,
-                            state=location.state,
-                            latitude=location.latitude,
-                            longitude=location.longitude,
-                            distance_km=distance_km,
-                            cylinder_size=stock.cylinder_size,
-                            available_quantity=stock.available_quantity,
-                            unit_price=cylinder_pricing.get("unit_price", 0.0),
-                            delivery_fee=cylinder_pricing.get("delivery_fee", 0.0),
-                            emergency_surcharge=cylinder_pricing.get("emergency_surcharge", 0.0) if request.is_emergency else 0.0,
-                            minimum_order_quantity=cylinder_pricing.get("minimum_order_quantity", 1),
-                            maximum_order_quantity=cylinder_pricing.get("maximum_order_quantity"),
-                            estimated_delivery_time_hours=self._calculate_delivery_time(distance_km, request.is_emergency),
-                            vendor_rating=vendor_info.get("rating"),
-                            is_available=stock.available_quantity >= request.quantity
-                        )
-                        catalog_items.append(catalog_item)
+                if request.sort_by == "price":
+                    def sort_key(row):
+                        pricing = pricing_infos.get(str(row.vendor_id), {})
+                        return pricing.get(row.cylinder_size.value, {}).get("unit_price", 0.0)
+                else:
+                    def sort_key(row):
+                        return vendor_infos.get(str(row.vendor_id), {}).get("rating") or 0
 
-            # Sort results
-            catalog_items = self._sort_catalog_items(catalog_items, request.sort_by, request.sort_order)
+                select_top = heapq.nlargest if request.sort_order == "desc" else heapq.nsmallest
+                rows = select_top(offset + page_size, rows, key=sort_key)[offset:]
 
-            # Apply pagination
-            total_items = len(catalog_items)
-            start_index = (page - 1) * page_size
-            end_index = start_index + page_size
-            paginated_items = catalog_items[start_index:end_index]
+            catalog_items = [
+                self._build_catalog_item(
+                    row, request,
+                    vendor_infos.get(str(row.vendor_id), {}),
+                    pricing_infos.get(str(row.vendor_id), {})
+                )
+                for row in rows
+            ]
 
-            return paginated_items, total_items
+            return catalog_items, total_items
 
         except Exception as e:
             raise Exception(f"Failed to search catalog: {str(e)}")
 
+    def _catalog_rows_query(self, request: ProductCatalogRequest):
+        """Matching (location, stock) rows with their distance in km, computed in SQL."""
+        distance = haversine_distance_km(
+            Inventory.latitude, Inventory.longitude,
+            request.hospital_latitude, request.hospital_longitude
+        )
+
+        conditions = [
+            Inventory.is_active == True,
+            bbox_filter(
+                Inventory.latitude, Inventory.longitude,
+                request.hospital_latitude, request.hospital_longitude, request.max_distance_km
+            ),
+            distance <= request.max_distance_km,
+            CylinderStock.available_quantity >= request.quantity
+        ]
+        if request.cylinder_size:
+            conditions.append(CylinderStock.cylinder_size == request.cylinder_size)
+
+        query = select(
+            Inventory.id,
+            Inventory.vendor_id,
+            Inventory.location_name,
+            Inventory.address,
+            Inventory.city,
+            Inventory.state,
+            Inventory.latitude,
+            Inventory.longitude,
+            CylinderStock.cylinder_size,
+            CylinderStock.available_quantity,
+            distance.label("distance_km")
+        ).join(
+            CylinderStock, CylinderStock.inventory_id == Inventory.id
+        ).where(and_(*conditions))
+
+        return query, distance
+
+    def _build_catalog_item(
+        self,
+        row,
+        request: ProductCatalogRequest,
+        vendor_info: Dict[str, Any],
+        pricing_info: Dict[str, Dict[str, Any]]
+    ) -> ProductCatalogItem:
+        """Build a catalog item from one search row and its vendor's enrichment."""
+        cylinder_pricing = pricing_info.get(row.cylinder_size.value, {})
+        distance_km = float(row.distance_km)
+
+        return ProductCatalogItem(
+            vendor_id=str(row.vendor_id),
+            vendor_name=vendor_info.get("name", "Unknown Vendor"),
+            location_id=str(row.id),
+            location_name=row.location_name,
+            address=row.address,
+            city=row.city,
+            state=row.state,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            distance_km=distance_km,
+            cylinder_size=row.cylinder_size,
+            available_quantity=row.available_quantity,
+            unit_price=cylinder_pricing.get("unit_price", 0.0),
+            delivery_fee=cylinder_pricing.get("delivery_fee", 0.0),
+            emergency_surcharge=cylinder_pricing.get("emergency_surcharge", 0.0) if request.is_emergency else 0.0,
+            minimum_order_quantity=cylinder_pricing.get("minimum_order_quantity", 1),
+            maximum_order_quantity=cylinder_pricing.get("maximum_order_quantity"),
+            estimated_delivery_time_hours=self._calculate_delivery_time(distance_km, request.is_emergency),
+            vendor_rating=vendor_info.get("rating"),
+            is_available=row.available_quantity >= request.quantity
+        )
+
     async def check_availability(
         self,
         db: AsyncSession,
@@ -161,33 +221,95 @@ class ProductCatalogService:
     async def bulk_check_availability(
         self,
         db: AsyncSession,
-        bulk_check: BulkAvailabilityCheck
+        bulk_check: BulkAvailabilityCheck,
+        user_context: Optional[Dict[str, Any]] = None
     ) -> BulkAvailabilityResponse:
-        """Bulk check availability for multiple products."""
-        results = []
-        available_count = 0
-        unavailable_count = 0
-
-        for check in bulk_check.checks:
-            try:
-                availability = await self.check_availability(db, check)
-                if availability:
-                    results.append(availability)
-                    if availability.is_available:
-                        available_count += 1
-                    else:
-                        unavailable_count += 1
-                else:
-                    unavailable_count += 1
-            except Exception:
-                unavailable_count += 1
-
-        return BulkAvailabilityResponse(
-            results=results,
-            total_checked=len(bulk_check.checks),
-            available_count=available_count,
-            unavailable_count=unavailable_count
-        )
+        """Bulk check availability for multiple products in one query."""
+        try:
+            checks = bulk_check.checks
+            vendor_ids, location_ids, sizes, positions = [], [], [], []
+            for position, check in enumerate(checks):
+                try:
+                    vendor_ids.append(uuid.UUID(str(check.vendor_id)))
+                    location_ids.append(uuid.UUID(str(check.location_id)))
+                except ValueError:
+                    # Malformed ids can never match a location
+                    continue
+                sizes.append(check.cylinder_size.name)
+                positions.append(position)
+
+            stock_by_position = {}
+            if positions:
+                # One row per check; WITH ORDINALITY maps rows back to their position
+                check_rows = func.unnest(
+                    literal(vendor_ids, ARRAY(UUID(as_uuid=True))),
+                    literal(location_ids, ARRAY(UUID(as_uuid=True))),
+                    literal(sizes, ARRAY(String))
+                ).table_valued(
+                    column("vendor_id", UUID(as_uuid=True)),
+                    column("location_id", UUID(as_uuid=True)),
+                    column("cylinder_size", String),
+                    with_ordinality="ordinal"
+                ).render_derived(name="checks")
+
+                query = select(
+                    check_rows.c.ordinal,
+                    CylinderStock.available_quantity,
+                    CylinderStock.created_at,
+                    CylinderStock.updated_at
+                ).select_from(check_rows).join(
+                    Inventory,
+                    and_(
+                        Inventory.id == check_rows.c.location_id,
+                        Inventory.vendor_id == check_rows.c.vendor_id,
+                        Inventory.is_active == True
+                    )
+                ).join(
+                    CylinderStock,
+                    and_(
+                        CylinderStock.inventory_id == Inventory.id,
+                        CylinderStock.cylinder_size == cast(check_rows.c.cylinder_size, CylinderStock.cylinder_size.type)
+                    )
+                )
+
+                result = await db.execute(query)
+                stock_by_position = {positions[row.ordinal - 1]: row for row in result}
+
+            _, pricing_infos = await catalog_enrichment_service.enrich(
+                (checks[position].vendor_id for position in stock_by_position), user_context
+            )
+
+            results = []
+            available_count = 0
+            for position, check in enumerate(checks):
+                stock = stock_by_position.get(position)
+                if stock is None:
+                    continue
+
+                cylinder_pricing = pricing_infos.get(str(check.vendor_id), {}).get(check.cylinder_size.value, {})
+                is_available = stock.available_quantity >= check.quantity
+                available_count += is_available
+                results.append(AvailabilityResponse(
+                    vendor_id=check.vendor_id,
+                    location_id=check.location_id,
+                    cylinder_size=check.cylinder_size,
+                    available_quantity=stock.available_quantity,
+                    is_available=is_available,
+                    unit_price=cylinder_pricing.get("unit_price"),
+                    delivery_fee=cylinder_pricing.get("delivery_fee"),
+                    estimated_delivery_time_hours=cylinder_pricing.get("estimated_delivery_time_hours"),
+                    last_updated=stock.updated_at or stock.created_at
+                ))
+
+            return BulkAvailabilityResponse(
+                results=results,
+                total_checked=len(checks),
+                available_count=available_count,
+                unavailable_count=len(checks) - available_count
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to bulk check availability: {str(e)}")
 
     async def get_vendor_products(
         self,
@@ -321,44 +443,14 @@ class ProductCatalogService:
 
     async def _get_vendor_info(self, vendor_id: str) -> Dict[str, Any]:
         """Get vendor information from user service."""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.settings.USER_SERVICE_URL}/vendors/{vendor_id}/profile"
-                )
-                if response.status_code == 200:
-                    return response.json()
-                return {"name": "Unknown Vendor", "rating": None}
-        except Exception:
-            return {"name": "Unknown Vendor", "rating": None}
+        vendor_infos, _ = await catalog_enrichment_service.enrich([vendor_id])
+        return vendor_infos.get(str(vendor_id), {"name": "Unknown Vendor", "rating": None})
 
     async def _get_pricing_info(self, vendor_id: str, location_id: str = None) -> Dict[str, Dict[str, Any]]:
         """Get pricing information from pricing service."""
-        try:
-            async with httpx.AsyncClient() as client:
-                url = f"{self.settings.PRICING_SERVICE_URL}/products"
-                params = {"vendor_id": vendor_id}
-                if location_id:
-                    params["location_id"] = location_id
-                
-                response = await client.get(url, params=params)
-                if response.status_code == 200:
-                    pricing_data = response.json()
-                    # Convert to cylinder_size -> pricing_info mapping
-                    pricing_map = {}
-                    for item in pricing_data.get("items", []):
-                        pricing_map[item["cylinder_size"]] = {
-                            "unit_price": float(item["unit_price"]),
-                            "delivery_fee": float(item["delivery_fee"]),
-                            "emergency_surcharge": float(item["emergency_surcharge"]),
-                            "minimum_order_quantity": item["minimum_order_quantity"],
-                            "maximum_order_quantity": item["maximum_order_quantity"],
-                            "estimated_delivery_time_hours": 24  # Default
-                        }
-                    return pricing_map
-                return {}
-        except Exception:
-            return {}
+        # Pricing-service prices per vendor, not per inventory location
+        _, pricing_infos = await catalog_enrichment_service.enrich([vendor_id])
+        return pricing_infos.get(str(vendor_id), {})
 
     def _calculate_delivery_time(self, distance_km: float, is_emergency: bool = False) -> int:
         """Calculate estimated delivery time based on distance."""
@@ -0,0 +1,153 @@
+"""
+Incrementally maintained per-cylinder quality summaries.
+Every evaluated quality check is folded into its cylinder's
+cylinder_quality_summaries row with one INSERT ... ON CONFLICT DO UPDATE:
+last check date and status, last passed date overall and per check type, and
+a rolling pass rate from time-decayed check counts. Allocation filters and
+scores on these columns instead of scanning check history.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import select, func, case, literal, cast, and_, or_, exists, Float, DateTime
+from sqlalchemy.dialects.postgresql import insert, JSONB
+
+from app.models.cylinder import CylinderQualityCheck, CylinderQualitySummary, QualityCheckStatus
+
+# Weight of a check halves every HALF_LIFE_DAYS in the rolling pass rate
+HALF_LIFE_DAYS = 30
+HALF_LIFE_SECONDS = HALF_LIFE_DAYS * 86400
+
+# Only evaluated checks count towards the summary
+EVALUATED_STATUSES = [QualityCheckStatus.PASSED, QualityCheckStatus.FAILED]
+
+
+def _aware(value: datetime) -> datetime:
+    """Check dates are written as naive UTC; keep them comparable once serialized."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _decay(newer, older):
+    """Weight multiplier for a check made at `older`, seen from `newer`."""
+    elapsed = func.greatest(0, func.extract("epoch", newer - older))
+    return func.power(0.5, elapsed / HALF_LIFE_SECONDS)
+
+
+def summary_upsert_statement(quality_check: CylinderQualityCheck):
+    """Fold one evaluated check into its cylinder's summary atomically."""
+    check_date = _aware(quality_check.check_date)
+    passed = quality_check.overall_status == QualityCheckStatus.PASSED
+
+    stmt = insert(CylinderQualitySummary).values(
+        cylinder_id=quality_check.cylinder_id,
+        last_check_date=check_date,
+        last_status=quality_check.overall_status,
+        last_passed_date=check_date if passed else None,
+        check_weight=1.0,
+        passed_weight=1.0 if passed else 0.0,
+        pass_rate=100.0 if passed else 0.0,
+        total_checks=1,
+        passed_check_types={quality_check.check_type: check_date.isoformat()} if passed else {}
+    )
+    current = CylinderQualitySummary.__table__.c
+    new = stmt.excluded
+
+    # Weights are kept as of the latest check date: a newer check decays the
+    # stored weights up to its date, an older one arrives already decayed
+    current_decay = _decay(new.last_check_date, current.last_check_date)
+    new_decay = _decay(current.last_check_date, new.last_check_date)
+    check_weight = current.check_weight * current_decay + new.check_weight * new_decay
+    passed_weight = current.passed_weight * current_decay + new.passed_weight * new_decay
+
+    # Only let the check replace its type's last passed date if it is newer
+    type_passed_at = cast(current.passed_check_types[quality_check.check_type].astext, DateTime(timezone=True))
+
+    return stmt.on_conflict_do_update(
+        index_elements=[current.cylinder_id],
+        set_={
+            "check_weight": check_weight,
+            "passed_weight": passed_weight,
+            "pass_rate": passed_weight / check_weight * 100,
+            "total_checks": current.total_checks + 1,
+            "last_status": case(
+                (new.last_check_date >= current.last_check_date, new.last_status),
+                else_=current.last_status
+            ),
+            "last_check_date": func.greatest(current.last_check_date, new.last_check_date),
+            "last_passed_date": func.greatest(current.last_passed_date, new.last_passed_date),
+            "passed_check_types": case(
+                (or_(type_passed_at.is_(None), new.last_passed_date > type_passed_at),
+                 current.passed_check_types.op("||")(new.passed_check_types)),
+                else_=current.passed_check_types
+            ),
+            "updated_at": func.now()
+        }
+    )
+
+
+def summary_backfill_statement():
+    """Build summaries from check history for cylinders that do not have one yet."""
+    checks = CylinderQualityCheck.__table__.c
+    passed = checks.overall_status == QualityCheckStatus.PASSED
+
+    ranked = select(
+        checks.cylinder_id,
+        checks.check_date,
+        checks.overall_status,
+        func.max(checks.check_date).over(partition_by=checks.cylinder_id).label("last_check_date"),
+        func.row_number().over(partition_by=checks.cylinder_id, order_by=checks.check_date.desc()).label("check_rank")
+    ).where(and_(
+        checks.overall_status.in_(EVALUATED_STATUSES),
+        ~exists().where(CylinderQualitySummary.cylinder_id == checks.cylinder_id)
+    )).subquery("ranked")
+
+    weight = _decay(ranked.c.last_check_date, ranked.c.check_date)
+    ranked_passed = ranked.c.overall_status == QualityCheckStatus.PASSED
+    check_weight = func.sum(weight)
+    passed_weight = func.coalesce(func.sum(weight).filter(ranked_passed), 0.0)
+
+    rollup = select(
+        ranked.c.cylinder_id,
+        func.max(ranked.c.last_check_date).label("last_check_date"),
+        func.min(ranked.c.overall_status).filter(ranked.c.check_rank == 1).label("last_status"),
+        func.max(ranked.c.check_date).filter(ranked_passed).label("last_passed_date"),
+        cast(check_weight, Float).label("check_weight"),
+        cast(passed_weight, Float).label("passed_weight"),
+        cast(passed_weight / check_weight * 100, Float).label("pass_rate"),
+        func.count().label("total_checks")
+    ).group_by(ranked.c.cylinder_id).subquery("rollup")
+
+    # Last passed date per check type, folded into one JSON object per cylinder
+    type_dates = select(
+        checks.cylinder_id,
+        checks.check_type,
+        func.max(checks.check_date).label("passed_at")
+    ).where(passed).group_by(checks.cylinder_id, checks.check_type).subquery("type_dates")
+    passed_types = select(
+        type_dates.c.cylinder_id,
+        func.jsonb_object_agg(type_dates.c.check_type, type_dates.c.passed_at).label("passed_check_types")
+    ).group_by(type_dates.c.cylinder_id).subquery("passed_types")
+
+    source = select(
+        rollup.c.cylinder_id,
+        rollup.c.last_check_date,
+        rollup.c.last_status,
+        rollup.c.last_passed_date,
+        rollup.c.check_weight,
+        rollup.c.passed_weight,
+        rollup.c.pass_rate,
+        rollup.c.total_checks,
+        func.coalesce(passed_types.c.passed_check_types, cast(literal("{}"), JSONB))
+    ).select_from(rollup).outerjoin(passed_types, passed_types.c.cylinder_id == rollup.c.cylinder_id)
+
+    return insert(CylinderQualitySummary).from_select(
+        ["cylinder_id", "last_check_date", "last_status", "last_passed_date", "check_weight",
+         "passed_weight", "pass_rate", "total_checks", "passed_check_types"],
+        source
+    ).on_conflict_do_nothing(index_elements=["cylinder_id"])
+
+
+def passed_type_since(check_type: str, since: datetime):
+    """Summary condition: the cylinder passed a check of this type at or after `since`."""
+    passed_at = CylinderQualitySummary.passed_check_types[check_type].astext
+    return cast(passed_at, DateTime(timezone=True)) >= since
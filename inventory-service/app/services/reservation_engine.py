@@ -0,0 +1,237 @@
+"""
+Contention-safe stock reservation engine.
+Reserves every line of an order with one conditional UPDATE on cylinder_stock
+(available_quantity >= requested, enforced by the database under row locks),
+then writes the StockReservation and StockMovement rows in bulk. Either all
+lines are reserved or none are. Requests carrying an idempotency key are
+serialised on it, and a retry returns the reservations an earlier attempt
+made while they are still active; once they have expired or been released the
+key reserves again.
+"""
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Any
+import logging
+
+from sqlalchemy import select, update, insert, and_, cast, column, literal, func, text, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.inventory import Inventory, CylinderStock, StockMovement, StockReservation
+from shared.models import CylinderSize
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_TTL = timedelta(hours=24)
+
+
+@dataclass
+class ReservationLine:
+    """One (location, cylinder size, quantity) line of a reservation request."""
+    inventory_id: uuid.UUID
+    cylinder_size: CylinderSize
+    quantity: int
+
+
+class InsufficientStockError(ValueError):
+    """Raised when at least one line cannot be reserved; nothing is reserved."""
+
+    def __init__(self, shortages: List[ReservationLine]):
+        self.shortages = shortages
+        lines = ", ".join(f"{line.quantity} x {line.cylinder_size.value} at {line.inventory_id}" for line in shortages)
+        super().__init__(f"Insufficient stock for {lines}")
+
+
+class StockReservationEngine:
+    """Reserves multi-line orders atomically against cylinder_stock."""
+
+    def __init__(self):
+        # Statistics
+        self.reservations = 0
+        self.lines_reserved = 0
+        self.rejections = 0
+        self.replays = 0
+
+    def _merge_lines(self, lines: List[ReservationLine]) -> List[ReservationLine]:
+        """Combine lines hitting the same stock row; one UPDATE can touch a row only once."""
+        merged: Dict[Tuple[uuid.UUID, CylinderSize], int] = {}
+        for line in lines:
+            key = (line.inventory_id, line.cylinder_size)
+            merged[key] = merged.get(key, 0) + line.quantity
+        return [ReservationLine(inventory_id, size, quantity) for (inventory_id, size), quantity in merged.items()]
+
+    def _reserve_statement(self, lines: List[ReservationLine]):
+        """Single UPDATE ... FROM unnest(...) ... RETURNING for every line.
+
+        Stock rows are locked in id order first so concurrent multi-line
+        reservations cannot deadlock; the availability guard is re-checked by
+        PostgreSQL against the latest row version after any lock wait.
+        """
+        requested = func.unnest(
+            literal([line.inventory_id for line in lines], ARRAY(UUID(as_uuid=True))),
+            literal([line.cylinder_size.name for line in lines], ARRAY(String)),
+            literal([line.quantity for line in lines], ARRAY(Integer))
+        ).table_valued(
+            column("inventory_id", UUID(as_uuid=True)),
+            column("cylinder_size", String),
+            column("quantity", Integer)
+        ).render_derived(name="requested")
+
+        locked = select(
+            CylinderStock.id.label("stock_id"),
+            requested.c.quantity
+        ).select_from(requested).join(
+            CylinderStock,
+            and_(
+                CylinderStock.inventory_id == requested.c.inventory_id,
+                CylinderStock.cylinder_size == cast(requested.c.cylinder_size, CylinderStock.cylinder_size.type)
+            )
+        ).join(
+            Inventory,
+            and_(Inventory.id == CylinderStock.inventory_id, Inventory.is_active == True)
+        ).order_by(CylinderStock.id).with_for_update(of=CylinderStock).subquery("locked")
+
+        return update(CylinderStock).where(
+            CylinderStock.id == locked.c.stock_id,
+            CylinderStock.available_quantity >= locked.c.quantity
+        ).values(
+            available_quantity=CylinderStock.available_quantity - locked.c.quantity,
+            reserved_quantity=CylinderStock.reserved_quantity + locked.c.quantity,
+            updated_at=func.now()
+        ).returning(
+            CylinderStock.id,
+            CylinderStock.inventory_id,
+            CylinderStock.cylinder_size,
+            CylinderStock.available_quantity,
+            locked.c.quantity
+        ).execution_options(synchronize_session=False)
+
+    async def _replay(self, db: AsyncSession, idempotency_key: str, order_uuid: uuid.UUID) -> List[StockReservation]:
+        """Active reservations already made under this key, after waiting out any concurrent attempt."""
+        # Held until the transaction ends, so a concurrent retry sees this attempt's rows
+        await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": idempotency_key})
+
+        result = await db.execute(
+            select(StockReservation)
+            .where(StockReservation.idempotency_key == idempotency_key)
+            .order_by(StockReservation.stock_id)
+        )
+        existing = list(result.scalars().all())
+
+        if any(reservation.order_id != order_uuid for reservation in existing):
+            raise ValueError(f"Idempotency key {idempotency_key} was already used for another order")
+        # Expired or released rows are history; they don't stop the order reserving again
+        return [reservation for reservation in existing if reservation.is_active]
+
+    async def reserve(
+        self,
+        db: AsyncSession,
+        lines: List[ReservationLine],
+        order_id: str,
+        user_id: str,
+        expires_at: Optional[datetime] = None,
+        commit: bool = True,
+        idempotency_key: Optional[str] = None
+    ) -> List[StockReservation]:
+        """
+        Reserve all lines for an order in one transaction.
+
+        With an idempotency key, a repeated request returns the still active
+        reservations made under it instead of reserving again. If they have all
+        expired or been released, the request reserves afresh under the same key.
+
+        Raises:
+            InsufficientStockError: if any line lacks stock (the transaction is rolled back)
+            ValueError: if the idempotency key belongs to another order
+        """
+        lines = self._merge_lines(lines)
+        if not lines:
+            return []
+
+        order_uuid = uuid.UUID(str(order_id))
+        user_uuid = uuid.UUID(str(user_id))
+        expires_at = expires_at or datetime.utcnow() + RESERVATION_TTL
+
+        if idempotency_key:
+            try:
+                existing = await self._replay(db, idempotency_key, order_uuid)
+            except ValueError:
+                await db.rollback()
+                raise
+            if existing:
+                if commit:
+                    await db.commit()
+                self.replays += 1
+                return existing
+
+        result = await db.execute(self._reserve_statement(lines))
+        reserved = result.all()
+
+        if len(reserved) < len(lines):
+            await db.rollback()
+            self.rejections += 1
+            got = {(row.inventory_id, row.cylinder_size) for row in reserved}
+            raise InsufficientStockError([
+                line for line in lines if (line.inventory_id, line.cylinder_size) not in got
+            ])
+
+        reservations = (await db.scalars(
+            insert(StockReservation).returning(StockReservation),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "inventory_id": row.inventory_id,
+                    "stock_id": row.id,
+                    "order_id": order_uuid,
+                    "cylinder_size": row.cylinder_size,
+                    "quantity": row.quantity,
+                    "reserved_by": user_uuid,
+                    "expires_at": expires_at,
+                    "is_active": True,
+                    "idempotency_key": idempotency_key
+                }
+                for row in reserved
+            ]
+        )).all()
+
+        await db.execute(
+            insert(StockMovement),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "inventory_id": row.inventory_id,
+                    "stock_id": row.id,
+                    "cylinder_size": row.cylinder_size,
+                    "movement_type": "reserved",
+                    "quantity": row.quantity,
+                    "previous_quantity": row.available_quantity + row.quantity,
+                    "new_quantity": row.available_quantity,
+                    "order_id": order_uuid,
+                    "notes": f"Reserved for order {order_id}",
+                    "created_by": user_uuid
+                }
+                for row in reserved
+            ]
+        )
+
+        if commit:
+            await db.commit()
+
+        self.reservations += 1
+        self.lines_reserved += len(reserved)
+        return list(reservations)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reservation statistics."""
+        return {
+            "reservations": self.reservations,
+            "lines_reserved": self.lines_reserved,
+            "rejections": self.rejections,
+            "replays": self.replays
+        }
+
+
+# Global reservation engine instance
+reservation_engine = StockReservationEngine()
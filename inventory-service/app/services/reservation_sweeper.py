@@ -0,0 +1,219 @@
+"""
+Background expiry of stock reservations.
+Claims expired active reservations in bounded batches with
+FOR UPDATE SKIP LOCKED, so several replicas can sweep at once without
+blocking each other or double-releasing, returns their quantities to
+cylinder_stock with one set-based UPDATE per batch, writes the release
+movements in bulk and publishes one event per sweep.
+"""
+
+import asyncio
+import os
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Any, Optional
+import logging
+
+from sqlalchemy import select, update, insert, and_, column, literal, func, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from app.core.database import AsyncSessionLocal
+from app.models.inventory import CylinderStock, StockMovement, StockReservation
+from app.services.event_service import event_service
+
+logger = logging.getLogger(__name__)
+
+# Recorded as created_by on movements written by the sweeper
+SYSTEM_USER_ID = uuid.UUID(int=0)
+
+
+class ReservationExpirySweeper:
+    """Periodically releases reservations whose expires_at has passed."""
+
+    def __init__(self):
+        self.enabled = os.getenv("RESERVATION_SWEEPER_ENABLED", "true").lower() == "true"
+        self.interval = float(os.getenv("RESERVATION_SWEEPER_INTERVAL_SECONDS", "60"))
+        self.batch_size = int(os.getenv("RESERVATION_SWEEPER_BATCH_SIZE", "500"))
+        self.max_batches = int(os.getenv("RESERVATION_SWEEPER_MAX_BATCHES", "20"))
+
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.sweeps = 0
+        self.reservations_expired = 0
+        self.units_released = 0
+        self.sweep_errors = 0
+
+    def _claim_statement(self):
+        """Deactivate up to batch_size expired reservations no other sweeper holds."""
+        expired = select(StockReservation.id).where(and_(
+            StockReservation.is_active == True,
+            StockReservation.expires_at <= func.now()
+        )).order_by(
+            StockReservation.expires_at
+        ).limit(self.batch_size).with_for_update(skip_locked=True).cte("expired")
+
+        return update(StockReservation).where(
+            StockReservation.id == expired.c.id
+        ).values(
+            is_active=False,
+            updated_at=func.now()
+        ).returning(
+            StockReservation.id,
+            StockReservation.stock_id,
+            StockReservation.inventory_id,
+            StockReservation.order_id,
+            StockReservation.cylinder_size,
+            StockReservation.quantity
+        ).execution_options(synchronize_session=False)
+
+    def _restock_statement(self, quantities: Dict[uuid.UUID, int]):
+        """Return released quantities to their stock rows, locking in id order like reservations do."""
+        released = func.unnest(
+            literal(list(quantities), ARRAY(UUID(as_uuid=True))),
+            literal(list(quantities.values()), ARRAY(Integer))
+        ).table_valued(
+            column("stock_id", UUID(as_uuid=True)),
+            column("quantity", Integer)
+        ).render_derived(name="released")
+
+        locked = select(
+            CylinderStock.id.label("stock_id"),
+            released.c.quantity
+        ).select_from(released).join(
+            CylinderStock, CylinderStock.id == released.c.stock_id
+        ).order_by(CylinderStock.id).with_for_update(of=CylinderStock).subquery("locked")
+
+        return update(CylinderStock).where(
+            CylinderStock.id == locked.c.stock_id
+        ).values(
+            available_quantity=CylinderStock.available_quantity + locked.c.quantity,
+            reserved_quantity=CylinderStock.reserved_quantity - locked.c.quantity,
+            updated_at=func.now()
+        ).returning(
+            CylinderStock.id,
+            CylinderStock.available_quantity
+        ).execution_options(synchronize_session=False)
+
+    async def _sweep_batch(self) -> List[Dict[str, Any]]:
+        """Expire one batch in a single transaction; returns the released reservations."""
+        async with AsyncSessionLocal() as session:
+            claimed = (await session.execute(self._claim_statement())).all()
+            if not claimed:
+                await session.rollback()
+                return []
+
+            quantities: Dict[uuid.UUID, int] = defaultdict(int)
+            for row in claimed:
+                quantities[row.stock_id] += row.quantity
+
+            restocked = (await session.execute(self._restock_statement(quantities))).all()
+            available_after = {row.id: row.available_quantity for row in restocked}
+
+            # Walk each stock row's releases forward from its pre-sweep level
+            running = {
+                stock_id: available - quantities[stock_id]
+                for stock_id, available in available_after.items()
+            }
+            movements = []
+            for row in claimed:
+                if row.stock_id not in running:
+                    continue
+                previous = running[row.stock_id]
+                running[row.stock_id] = previous + row.quantity
+                movements.append({
+                    "id": uuid.uuid4(),
+                    "inventory_id": row.inventory_id,
+                    "stock_id": row.stock_id,
+                    "cylinder_size": row.cylinder_size,
+                    "movement_type": "released",
+                    "quantity": row.quantity,
+                    "previous_quantity": previous,
+                    "new_quantity": previous + row.quantity,
+                    "order_id": row.order_id,
+                    "notes": f"Reservation {row.id} expired",
+                    "created_by": SYSTEM_USER_ID
+                })
+            if movements:
+                await session.execute(insert(StockMovement), movements)
+
+            await session.commit()
+
+        return [
+            {
+                "reservation_id": str(row.id),
+                "inventory_id": str(row.inventory_id),
+                "order_id": str(row.order_id),
+                "cylinder_size": row.cylinder_size.value,
+                "quantity": row.quantity
+            }
+            for row in claimed
+        ]
+
+    async def sweep(self) -> int:
+        """
+        Expire reservations in batches until none are left or the per-sweep cap is hit.
+
+        Each batch is counted and published as soon as it commits, so a later
+        batch failing does not drop the events for releases already made.
+        """
+        self.sweeps += 1
+        expired = 0
+        for _ in range(self.max_batches):
+            batch = await self._sweep_batch()
+            if batch:
+                units = sum(item["quantity"] for item in batch)
+                expired += len(batch)
+                self.reservations_expired += len(batch)
+                self.units_released += units
+                await event_service.publish_reservations_expired(batch)
+                logger.info(f"Expired {len(batch)} stock reservations, released {units} units")
+            if len(batch) < self.batch_size:
+                break
+        return expired
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.sweep_errors += 1
+                logger.error(f"Reservation expiry sweep failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the background sweep task."""
+        if not self.enabled:
+            logger.info("Reservation expiry sweeper disabled")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background sweep task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sweeper statistics."""
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+            "sweeps": self.sweeps,
+            "reservations_expired": self.reservations_expired,
+            "units_released": self.units_released,
+            "sweep_errors": self.sweep_errors
+        }
+
+
+# Global reservation expiry sweeper instance
+reservation_sweeper = ReservationExpirySweeper()
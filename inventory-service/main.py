@@ -27,6 +27,8 @@ from app.api.product_catalog import router as product_catalog_router
 from app.api.cylinders import router as cylinders_router
 from app.api.vendors import router as vendors_router
 from app.services.event_service import event_service
+from app.services.catalog_enrichment_service import catalog_enrichment_service
+from app.services.reservation_sweeper import reservation_sweeper
 from shared.models import APIResponse
 
 
@@ -53,6 +55,9 @@ async def lifespan(app: FastAPI):
             logger.warning(f"⚠️ Event service startup warning: {e}")
             logger.info("📝 Inventory service will continue without RabbitMQ")
 
+        # Release expired stock reservations in the background
+        reservation_sweeper.start()
+
         logger.info("🎉 Inventory Service startup completed successfully!")
 
     except Exception as e:
@@ -63,12 +68,16 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("🛑 Shutting down Inventory Service...")
+    await reservation_sweeper.stop()
+
     try:
         await event_service.disconnect()
         logger.info("✅ Event service stopped")
     except Exception as e:
         logger.warning(f"⚠️ Error stopping event service: {e}")
 
+    await catalog_enrichment_service.close()
+
     logger.info("👋 Inventory Service shutdown completed")
 
 
@@ -148,6 +157,7 @@ async def health_check():
                 "url": rabbitmq_status["rabbitmq_url"]
             }
         },
+        "reservation_sweeper": reservation_sweeper.get_stats(),
         "issues": issues
     }
 
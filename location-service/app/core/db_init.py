@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 from shared.database.service_init import create_service_init_function
 from app.models.location import Location, EmergencyZone, ServiceArea
 from app.core.database import Base
+from shared.database import spatial
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,7 @@ LOCATION_SERVICE_INDEXES = [
     # Location table indexes
     "CREATE INDEX IF NOT EXISTS idx_locations_user_id ON locations(user_id)",
     "CREATE INDEX IF NOT EXISTS idx_locations_coordinates ON locations(latitude, longitude)",
+    "CREATE INDEX IF NOT EXISTS idx_locations_active_type_coords ON locations(location_type, latitude, longitude) WHERE is_active = true",
     "CREATE INDEX IF NOT EXISTS idx_locations_city_state ON locations(city, state)",
     "CREATE INDEX IF NOT EXISTS idx_locations_type ON locations(location_type)",
     "CREATE INDEX IF NOT EXISTS idx_locations_active ON locations(is_active)",
@@ -116,22 +118,24 @@ async def create_geospatial_indexes(engine):
             postgis_available = result.scalar()
             
             if postgis_available:
-                # Create spatial indexes using PostGIS
+                # Geography expression indexes; the same expressions are used by
+                # shared.database.spatial so ST_DWithin and <-> KNN can use them
                 await conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_locations_geom 
-                    ON locations USING GIST (ST_Point(longitude, latitude))
+                    CREATE INDEX IF NOT EXISTS idx_locations_geog
+                    ON locations USING GIST (geography(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)))
                 """))
                 
                 await conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_emergency_zones_geom 
-                    ON emergency_zones USING GIST (ST_Point(center_longitude, center_latitude))
+                    CREATE INDEX IF NOT EXISTS idx_emergency_zones_geog
+                    ON emergency_zones USING GIST (geography(ST_SetSRID(ST_MakePoint(center_longitude, center_latitude), 4326)))
                 """))
                 
                 await conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_service_areas_geom 
-                    ON service_areas USING GIST (ST_Point(center_longitude, center_latitude))
+                    CREATE INDEX IF NOT EXISTS idx_service_areas_geog
+                    ON service_areas USING GIST (geography(ST_SetSRID(ST_MakePoint(center_longitude, center_latitude), 4326)))
                 """))
                 
+                spatial.postgis_available = True
                 logger.info("✅ Created PostGIS spatial indexes")
             else:
                 logger.info("ℹ️ PostGIS not available, skipping spatial indexes")
@@ -115,6 +115,7 @@ class NearbySearchRequest(BaseModel):
     longitude: float = Field(..., ge=-180, le=180)
     radius_km: float = Field(50.0, gt=0)
     location_type: Optional[str] = None
+    limit: Optional[int] = Field(None, ge=1, le=1000)
 
 
 class NearbySearchResponse(BaseModel):
@@ -123,6 +124,7 @@ class NearbySearchResponse(BaseModel):
     search_radius_km: float
     center_latitude: float
     center_longitude: float
+    has_more: bool = False
 
     class Config:
         from_attributes = True
@@ -11,6 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 
 from app.models.location import EmergencyZone
 from app.schemas.location import EmergencyZoneCreate
+from shared.database import spatial
 
 
 class EmergencyService:
@@ -108,18 +109,16 @@ class EmergencyService:
         longitude: float
     ) -> List[EmergencyZone]:
         """Check if location is within any active emergency zones."""
-        # Calculate distance using Haversine formula (simplified)
-        distance_formula = func.sqrt(
-            func.pow(69.1 * (EmergencyZone.center_latitude - latitude), 2) +
-            func.pow(69.1 * (longitude - EmergencyZone.center_longitude) * 
-                    func.cos(EmergencyZone.center_latitude / 57.3), 2)
-        )
-        
         result = await db.execute(
             select(EmergencyZone)
             .where(and_(
                 EmergencyZone.is_active == True,
-                distance_formula <= EmergencyZone.radius_km
+                # Cheap latitude band before the exact great-circle check
+                func.abs(EmergencyZone.center_latitude - latitude) <= EmergencyZone.radius_km * spatial.DEGREES_PER_KM,
+                spatial.within_radius(
+                    EmergencyZone.center_latitude, EmergencyZone.center_longitude,
+                    latitude, longitude, EmergencyZone.radius_km
+                )
             ))
             .order_by(EmergencyZone.severity_level.desc())
         )
@@ -0,0 +1,345 @@
+"""
+In-memory grid index of active locations and service areas.
+Answers radius and service-area coverage queries without a database round
+trip. Kept current by write-through updates from LocationService, a polled
+change feed on created_at/updated_at, and a periodic full resync.
+"""
+
+import asyncio
+import heapq
+import math
+import os
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Any
+import logging
+
+from sqlalchemy import select, or_, func
+
+from app.core.database import AsyncSessionLocal
+from app.models.location import Location, ServiceArea
+from shared.database.spatial import bounding_box, haversine_km
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[int, int]
+
+
+@dataclass
+class IndexedLocation:
+    """Snapshot of a Location row held by the index."""
+    id: Any
+    user_id: Any
+    name: str
+    address: str
+    city: str
+    state: str
+    country: str
+    latitude: float
+    longitude: float
+    location_type: str
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+@dataclass
+class IndexedServiceArea:
+    """Snapshot of a ServiceArea row held by the index."""
+    id: Any
+    vendor_id: Any
+    name: str
+    center_latitude: float
+    center_longitude: float
+    radius_km: float
+    delivery_fee: float
+    minimum_order_amount: float
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+def _snapshot(cls, row):
+    return cls(**{field.name: getattr(row, field.name) for field in fields(cls)})
+
+
+class _GridState:
+    """One generation of the index; rebuilt from scratch on full resync."""
+
+    def __init__(self):
+        self.locations: Dict[Any, IndexedLocation] = {}
+        self.location_cells: Dict[Cell, Dict[Any, IndexedLocation]] = {}
+        self.areas: Dict[Any, IndexedServiceArea] = {}
+        self.area_cells: Dict[Cell, Dict[Any, IndexedServiceArea]] = {}
+        self.area_cell_keys: Dict[Any, List[Cell]] = {}
+        self.large_areas: Dict[Any, IndexedServiceArea] = {}
+
+
+class LocationGridIndex:
+    """Fixed lat/lng grid over active locations and service areas.
+
+    Locations live in the cell containing them. Service areas are registered
+    in every cell their bounding box overlaps, so a coverage lookup only
+    inspects one cell; areas spanning too many cells (or the antimeridian)
+    are kept in a short list checked on every lookup.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("LOCATION_INDEX_ENABLED", "true").lower() == "true"
+        self.cell_size = float(os.getenv("LOCATION_INDEX_CELL_DEGREES", "0.1"))
+        self.poll_interval = float(os.getenv("LOCATION_INDEX_POLL_SECONDS", "15"))
+        self.resync_interval = float(os.getenv("LOCATION_INDEX_RESYNC_SECONDS", "600"))
+        self.change_overlap = timedelta(seconds=float(os.getenv("LOCATION_INDEX_CHANGE_OVERLAP_SECONDS", "30")))
+        self.max_area_cells = int(os.getenv("LOCATION_INDEX_MAX_AREA_CELLS", "2500"))
+
+        self._state = _GridState()
+        self._watermark: Optional[datetime] = None
+        self._last_resync = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+
+        # Statistics
+        self.queries = 0
+        self.resyncs = 0
+        self.changes_applied = 0
+        self.sync_errors = 0
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        return math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size)
+
+    def _cells_for_box(self, latitude: float, longitude: float, radius_km: float) -> Optional[List[Cell]]:
+        """Cells overlapping the radius' bounding box, or None if it cannot be bounded."""
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+        if min_lng is None:
+            return None
+        lat_lo, lng_lo = self._cell(min_lat, min_lng)
+        lat_hi, lng_hi = self._cell(max_lat, max_lng)
+        if (lat_hi - lat_lo + 1) * (lng_hi - lng_lo + 1) > self.max_area_cells:
+            return None
+        return [
+            (lat_cell, lng_cell)
+            for lat_cell in range(lat_lo, lat_hi + 1)
+            for lng_cell in range(lng_lo, lng_hi + 1)
+        ]
+
+    # Write path
+
+    def _add_location(self, state: _GridState, entry: IndexedLocation):
+        self._remove_location(state, entry.id)
+        if not entry.is_active:
+            return
+        state.locations[entry.id] = entry
+        state.location_cells.setdefault(self._cell(entry.latitude, entry.longitude), {})[entry.id] = entry
+
+    def _remove_location(self, state: _GridState, location_id):
+        entry = state.locations.pop(location_id, None)
+        if entry is None:
+            return
+        cell = self._cell(entry.latitude, entry.longitude)
+        bucket = state.location_cells.get(cell)
+        if bucket is not None:
+            bucket.pop(location_id, None)
+            if not bucket:
+                del state.location_cells[cell]
+
+    def _add_area(self, state: _GridState, entry: IndexedServiceArea):
+        self._remove_area(state, entry.id)
+        if not entry.is_active:
+            return
+        state.areas[entry.id] = entry
+        cells = self._cells_for_box(entry.center_latitude, entry.center_longitude, entry.radius_km)
+        if cells is None:
+            state.large_areas[entry.id] = entry
+            return
+        state.area_cell_keys[entry.id] = cells
+        for cell in cells:
+            state.area_cells.setdefault(cell, {})[entry.id] = entry
+
+    def _remove_area(self, state: _GridState, area_id):
+        if state.areas.pop(area_id, None) is None:
+            return
+        state.large_areas.pop(area_id, None)
+        for cell in state.area_cell_keys.pop(area_id, []):
+            bucket = state.area_cells.get(cell)
+            if bucket is not None:
+                bucket.pop(area_id, None)
+                if not bucket:
+                    del state.area_cells[cell]
+
+    def upsert_location(self, location):
+        """Add, move or drop (if inactive) a location after a committed write."""
+        self._add_location(self._state, _snapshot(IndexedLocation, location))
+
+    def remove_location(self, location_id):
+        self._remove_location(self._state, location_id)
+
+    def upsert_service_area(self, service_area):
+        """Add, resize or drop (if inactive) a service area after a committed write."""
+        self._add_area(self._state, _snapshot(IndexedServiceArea, service_area))
+
+    def remove_service_area(self, area_id):
+        self._remove_area(self._state, area_id)
+
+    # Read path
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        location_type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[IndexedLocation, float]]:
+        """Active locations within radius_km, nearest first, with distances in km."""
+        self.queries += 1
+        state = self._state
+        cells = self._cells_for_box(latitude, longitude, radius_km)
+        if cells is None:
+            candidates = state.locations.values()
+        else:
+            candidates = (
+                entry
+                for cell in cells
+                for entry in state.location_cells.get(cell, {}).values()
+            )
+
+        matches = []
+        for entry in candidates:
+            if location_type and entry.location_type != location_type:
+                continue
+            distance = haversine_km(latitude, longitude, entry.latitude, entry.longitude)
+            if distance <= radius_km:
+                matches.append((distance, entry))
+
+        key = lambda match: match[0]
+        matches = heapq.nsmallest(limit, matches, key=key) if limit else sorted(matches, key=key)
+        return [(entry, distance) for distance, entry in matches]
+
+    def covering_service_areas(
+        self,
+        latitude: float,
+        longitude: float,
+        vendor_id: Optional[str] = None
+    ) -> List[Tuple[IndexedServiceArea, float]]:
+        """Active service areas whose radius covers the point, nearest centre first."""
+        self.queries += 1
+        state = self._state
+        candidates = list(state.area_cells.get(self._cell(latitude, longitude), {}).values())
+        candidates.extend(state.large_areas.values())
+
+        matches = []
+        for area in candidates:
+            if vendor_id and str(area.vendor_id) != str(vendor_id):
+                continue
+            distance = haversine_km(latitude, longitude, area.center_latitude, area.center_longitude)
+            if distance <= area.radius_km:
+                matches.append((area, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    # Synchronisation
+
+    async def resync(self):
+        """Reload every active row and swap in a fresh grid."""
+        async with AsyncSessionLocal() as session:
+            watermark = (await session.execute(select(func.now()))).scalar()
+            locations = (await session.execute(
+                select(Location).where(Location.is_active == True)
+            )).scalars().all()
+            areas = (await session.execute(
+                select(ServiceArea).where(ServiceArea.is_active == True)
+            )).scalars().all()
+
+        state = _GridState()
+        for location in locations:
+            self._add_location(state, _snapshot(IndexedLocation, location))
+        for area in areas:
+            self._add_area(state, _snapshot(IndexedServiceArea, area))
+
+        self._state = state
+        self._watermark = watermark
+        self._last_resync = time.monotonic()
+        self.resyncs += 1
+        self.ready = True
+        logger.info(f"Location index resynced: {len(state.locations)} locations, {len(state.areas)} service areas")
+
+    async def poll_changes(self) -> int:
+        """Apply rows created or updated since the last sync (including deactivations)."""
+        if self._watermark is None:
+            await self.resync()
+            return 0
+
+        since = self._watermark - self.change_overlap
+        async with AsyncSessionLocal() as session:
+            watermark = (await session.execute(select(func.now()))).scalar()
+            locations = (await session.execute(
+                select(Location).where(or_(Location.created_at > since, Location.updated_at > since))
+            )).scalars().all()
+            areas = (await session.execute(
+                select(ServiceArea).where(or_(ServiceArea.created_at > since, ServiceArea.updated_at > since))
+            )).scalars().all()
+
+        for location in locations:
+            self.upsert_location(location)
+        for area in areas:
+            self.upsert_service_area(area)
+
+        self._watermark = watermark
+        self.changes_applied += len(locations) + len(areas)
+        return len(locations) + len(areas)
+
+    async def _run(self):
+        """Initial load, then change-feed polls with a periodic full resync."""
+        while True:
+            try:
+                if not self.ready or time.monotonic() - self._last_resync >= self.resync_interval:
+                    await self.resync()
+                else:
+                    await self.poll_changes()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.sync_errors += 1
+                logger.error(f"Location index sync failed: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        """Start the background sync task."""
+        if not self.enabled:
+            logger.info("Location index disabled, nearby queries will use the database")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background sync task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        state = self._state
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "locations": len(state.locations),
+            "location_cells": len(state.location_cells),
+            "service_areas": len(state.areas),
+            "large_service_areas": len(state.large_areas),
+            "cell_size_degrees": self.cell_size,
+            "queries": self.queries,
+            "resyncs": self.resyncs,
+            "changes_applied": self.changes_applied,
+            "sync_errors": self.sync_errors,
+            "watermark": self._watermark.isoformat() if self._watermark else None
+        }
+
+
+# Global location index instance
+location_index = LocationGridIndex()
@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import uuid
 import sys
@@ -12,6 +12,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 
 from app.models.location import Location, EmergencyZone, ServiceArea
 from app.schemas.location import LocationCreate, LocationUpdate, NearbySearchRequest
+from app.services.location_index import location_index
+from shared.database import spatial
 from shared.models import UserRole
 
 
@@ -40,6 +42,7 @@ class LocationService:
         db.add(location)
         await db.commit()
         await db.refresh(location)
+        location_index.upsert_location(location)
         return location
     
     async def get_location(
@@ -53,81 +56,79 @@ class LocationService:
         )
         return result.scalar_one_or_none()
     
+    async def find_nearby(
+        self,
+        db: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius_km: float = 50.0,
+        location_type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[Location, float]]:
+        """Find active locations within radius_km, nearest first, with distances in km."""
+        if location_index.ready:
+            return location_index.nearby(latitude, longitude, radius_km, location_type, limit)
+
+        distance = spatial.distance_km(Location.latitude, Location.longitude, latitude, longitude)
+
+        query = select(Location, distance.label("distance_km")).where(
+            and_(
+                Location.is_active == True,
+                # Bounding box on the indexed columns narrows the scan before the exact check
+                spatial.bbox_filter(Location.latitude, Location.longitude, latitude, longitude, radius_km),
+                spatial.within_radius(Location.latitude, Location.longitude, latitude, longitude, radius_km)
+            )
+        )
+
+        if location_type:
+            query = query.where(Location.location_type == location_type)
+
+        query = query.order_by(spatial.knn_order(Location.latitude, Location.longitude, latitude, longitude))
+        if limit:
+            query = query.limit(limit)
+
+        result = await db.execute(query)
+        return [(location, float(distance_km)) for location, distance_km in result.all()]
+
     async def search_nearby_locations(
         self,
         db: AsyncSession,
         search_request: NearbySearchRequest
     ) -> List[Location]:
         """Search for nearby locations."""
-        # Calculate distance using Haversine formula (simplified)
-        distance_formula = func.sqrt(
-            func.pow(69.1 * (Location.latitude - search_request.latitude), 2) +
-            func.pow(69.1 * (search_request.longitude - Location.longitude) * 
-                    func.cos(Location.latitude / 57.3), 2)
-        )
-        
-        query = select(Location).where(
-            and_(
-                Location.is_active == True,
-                distance_formula <= search_request.radius_km
-            )
+        nearby = await self.find_nearby(
+            db,
+            search_request.latitude,
+            search_request.longitude,
+            search_request.radius_km,
+            location_type=search_request.location_type,
+            limit=search_request.limit
         )
-        
-        if search_request.location_type:
-            query = query.where(Location.location_type == search_request.location_type)
-        
-        result = await db.execute(query.order_by(distance_formula))
-        return result.scalars().all()
+        return [location for location, _ in nearby]
     
     async def get_nearby_vendors(
         self,
         db: AsyncSession,
         latitude: float,
         longitude: float,
-        radius_km: float = 50.0
+        radius_km: float = 50.0,
+        limit: Optional[int] = None
     ) -> List[Location]:
         """Get vendors within radius of location."""
-        distance_formula = func.sqrt(
-            func.pow(69.1 * (Location.latitude - latitude), 2) +
-            func.pow(69.1 * (longitude - Location.longitude) * 
-                    func.cos(Location.latitude / 57.3), 2)
-        )
-        
-        result = await db.execute(
-            select(Location)
-            .where(and_(
-                Location.is_active == True,
-                Location.location_type == 'vendor',
-                distance_formula <= radius_km
-            ))
-            .order_by(distance_formula)
-        )
-        return result.scalars().all()
+        nearby = await self.find_nearby(db, latitude, longitude, radius_km, location_type="vendor", limit=limit)
+        return [location for location, _ in nearby]
     
     async def get_nearby_hospitals(
         self,
         db: AsyncSession,
         latitude: float,
         longitude: float,
-        radius_km: float = 50.0
+        radius_km: float = 50.0,
+        limit: Optional[int] = None
     ) -> List[Location]:
         """Get hospitals within radius of location."""
-        distance_formula = func.sqrt(
-            func.pow(69.1 * (Location.latitude - latitude), 2) +
-            func.pow(69.1 * (longitude - Location.longitude) * 
-                    func.cos(Location.latitude / 57.3), 2)
-        )
-        
-        result = await db.execute(
-            select(Location)
-            .where(and_(
-                Location.is_active == True,
-                Location.location_type == 'hospital',
-                distance_formula <= radius_km
-            ))
-            .order_by(distance_formula)
-        )
-        return result.scalars().all()
+        nearby = await self.find_nearby(db, latitude, longitude, radius_km, location_type="hospital", limit=limit)
+        return [location for location, _ in nearby]
     
     async def update_location_coordinates(
         self,
@@ -151,6 +152,7 @@ class LocationService:
             location.longitude = longitude
             await db.commit()
             await db.refresh(location)
+            location_index.upsert_location(location)
         
         return location
     
@@ -189,4 +191,34 @@ class LocationService:
         db.add(service_area)
         await db.commit()
         await db.refresh(service_area)
+        location_index.upsert_service_area(service_area)
         return service_area
+
+    async def get_covering_service_areas(
+        self,
+        db: AsyncSession,
+        latitude: float,
+        longitude: float,
+        vendor_id: Optional[str] = None
+    ) -> List[Tuple[ServiceArea, float]]:
+        """Get active service areas covering a point, nearest centre first, with distances in km."""
+        if location_index.ready:
+            return location_index.covering_service_areas(latitude, longitude, vendor_id)
+
+        distance = spatial.distance_km(
+            ServiceArea.center_latitude, ServiceArea.center_longitude, latitude, longitude
+        )
+        query = select(ServiceArea, distance.label("distance_km")).where(
+            and_(
+                ServiceArea.is_active == True,
+                spatial.within_radius(
+                    ServiceArea.center_latitude, ServiceArea.center_longitude,
+                    latitude, longitude, ServiceArea.radius_km
+                )
+            )
+        )
+        if vendor_id:
+            query = query.where(ServiceArea.vendor_id == vendor_id)
+
+        result = await db.execute(query.order_by(distance))
+        return [(area, float(distance_km)) for area, distance_km in result.all()]
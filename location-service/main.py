@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Header
+from fastapi import FastAPI, HTTPException, Depends, status, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
@@ -21,6 +21,7 @@ from app.schemas.location import (
 )
 from app.services.location_service import LocationService
 from app.services.emergency_service import EmergencyService
+from app.services.location_index import location_index
 from shared.models import UserRole, APIResponse
 from shared.security.auth import get_current_user
 
@@ -58,6 +59,15 @@ async def startup_event():
             # Don't exit - let the service start but log the error
     else:
         logger.info("ℹ️ Database already initialized")
+    
+    # Load the in-memory location grid and keep it in sync
+    location_index.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks on shutdown."""
+    await location_index.stop()
 
 location_service = LocationService()
 emergency_service = EmergencyService()
@@ -84,7 +94,8 @@ async def locations_info():
             "POST /locations": "Create a new location (requires authentication)",
             "GET /locations/{location_id}": "Get location by ID (requires authentication)",
             "GET /vendors/nearby": "Find nearby vendors (requires authentication)",
-            "GET /hospitals/nearby": "Find nearby hospitals (requires authentication)"
+            "GET /hospitals/nearby": "Find nearby hospitals (requires authentication)",
+            "GET /service-areas/covering": "Find service areas covering a point (requires authentication)"
         },
         "authentication": "Required for all endpoints except this one",
         "documentation": "/docs"
@@ -96,7 +107,8 @@ async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "location_index": location_index.get_stats()
     }
 
 
@@ -164,23 +176,21 @@ async def search_nearby_locations(
 ):
     """Search for nearby locations."""
     try:
+        # Fetch one extra row to tell callers whether the limit cut the results
+        limit = search_request.limit
         results = await location_service.search_nearby_locations(
-            db, 
-            search_request.latitude,
-            search_request.longitude,
-            search_request.radius_km,
-            search_request.location_type,
-            search_request.user_role
+            db, search_request.model_copy(update={"limit": limit + 1}) if limit else search_request
         )
+        has_more = bool(limit) and len(results) > limit
+        results = results[:limit] if limit else results
         
         return NearbySearchResponse(
-            search_center={
-                "latitude": search_request.latitude,
-                "longitude": search_request.longitude
-            },
-            radius_km=search_request.radius_km,
-            results=results,
-            total_results=len(results)
+            locations=results,
+            total_count=len(results),
+            search_radius_km=search_request.radius_km,
+            center_latitude=search_request.latitude,
+            center_longitude=search_request.longitude,
+            has_more=has_more
         )
     except Exception as e:
         raise HTTPException(
@@ -343,6 +353,45 @@ async def get_vendor_service_areas(
         )
 
 
+@app.get("/service-areas/covering")
+async def get_covering_service_areas(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    vendor_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get service areas that cover a point."""
+    try:
+        covering = await location_service.get_covering_service_areas(
+            db, latitude, longitude, vendor_id
+        )
+        
+        return {
+            "location": {"latitude": latitude, "longitude": longitude},
+            "service_areas": [
+                {
+                    "area_id": str(area.id),
+                    "vendor_id": str(area.vendor_id),
+                    "name": area.name,
+                    "center_latitude": area.center_latitude,
+                    "center_longitude": area.center_longitude,
+                    "radius_km": area.radius_km,
+                    "delivery_fee": area.delivery_fee,
+                    "minimum_order_amount": area.minimum_order_amount,
+                    "distance_km": round(distance, 3)
+                }
+                for area, distance in covering
+            ],
+            "total": len(covering)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get covering service areas: {str(e)}"
+        )
+
+
 @app.post("/service-areas", response_model=APIResponse)
 async def create_service_area(
     area_data: ServiceAreaCreate,
@@ -358,7 +407,7 @@ async def create_service_area(
             )
         
         service_area = await location_service.create_service_area(
-            db, current_user["user_id"], area_data
+            db, current_user["user_id"], area_data.model_dump()
         )
         
         return APIResponse(
@@ -384,6 +433,7 @@ async def get_nearby_vendors(
     latitude: float,
     longitude: float,
     radius_km: float = 50.0,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -395,15 +445,19 @@ async def get_nearby_vendors(
                 detail="Only hospitals can search for vendors"
             )
         
+        # Fetch one extra row to tell callers whether the limit cut the results
         vendors = await location_service.get_nearby_vendors(
-            db, latitude, longitude, radius_km
+            db, latitude, longitude, radius_km, limit=limit + 1 if limit else None
         )
+        has_more = bool(limit) and len(vendors) > limit
+        vendors = vendors[:limit] if limit else vendors
         
         return {
             "search_location": {"latitude": latitude, "longitude": longitude},
             "radius_km": radius_km,
             "vendors": vendors,
-            "total": len(vendors)
+            "total": len(vendors),
+            "has_more": has_more
         }
     except HTTPException:
         raise
@@ -419,20 +473,25 @@ async def get_nearby_hospitals(
     latitude: float,
     longitude: float,
     radius_km: float = 50.0,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get hospitals within radius of location."""
     try:
+        # Fetch one extra row to tell callers whether the limit cut the results
         hospitals = await location_service.get_nearby_hospitals(
-            db, latitude, longitude, radius_km
+            db, latitude, longitude, radius_km, limit=limit + 1 if limit else None
         )
+        has_more = bool(limit) and len(hospitals) > limit
+        hospitals = hospitals[:limit] if limit else hospitals
         
         return {
             "search_location": {"latitude": latitude, "longitude": longitude},
             "radius_km": radius_km,
             "hospitals": hospitals,
-            "total": len(hospitals)
+            "total": len(hospitals),
+            "has_more": has_more
         }
     except Exception as e:
         raise HTTPException(
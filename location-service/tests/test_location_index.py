@@ -0,0 +1,66 @@
+import math
+import sys
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.services.location_index import LocationGridIndex
+from shared.database.spatial import EARTH_RADIUS_KM, haversine_km
+
+RADIUS_KM = 50.0
+# A point 49.99 km due north of the centre lands just past the 7.0 cell
+# boundary, beyond where a box sized at 111.32 km/deg would stop
+POINT = (7.0001, 3.4)
+CENTER = (POINT[0] - math.degrees(49.99 / EARTH_RADIUS_KM), 3.4)
+
+
+@pytest.fixture
+def index():
+    grid = LocationGridIndex()
+    grid.cell_size = 0.1
+    return grid
+
+
+def location(latitude, longitude, location_type="vendor"):
+    return SimpleNamespace(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), name="Depot", address="", city="", state="",
+        country="Nigeria", latitude=latitude, longitude=longitude, location_type=location_type,
+        is_active=True, created_at=None, updated_at=None
+    )
+
+
+def service_area(latitude, longitude, radius_km):
+    return SimpleNamespace(
+        id=uuid.uuid4(), vendor_id=uuid.uuid4(), name="Area", center_latitude=latitude,
+        center_longitude=longitude, radius_km=radius_km, delivery_fee=0.0,
+        minimum_order_amount=0.0, is_active=True, created_at=None, updated_at=None
+    )
+
+
+def test_edge_point_is_across_a_cell_boundary(index):
+    assert haversine_km(*CENTER, *POINT) < RADIUS_KM
+    assert index._cell(*POINT)[0] == index._cell(CENTER[0] + RADIUS_KM / 111.32, CENTER[1])[0] + 1
+
+
+def test_nearby_finds_location_in_cell_past_box_edge(index):
+    edge = location(*POINT)
+    index.upsert_location(edge)
+    index.upsert_location(location(CENTER[0] + 1.0, CENTER[1]))
+
+    results = index.nearby(*CENTER, RADIUS_KM)
+
+    assert [entry.id for entry, _ in results] == [edge.id]
+
+
+def test_service_area_registered_in_rim_cell(index):
+    area = service_area(*CENTER, RADIUS_KM)
+    index.upsert_service_area(area)
+
+    covering = index.covering_service_areas(*POINT)
+
+    assert [entry.id for entry, _ in covering] == [area.id]
@@ -31,6 +31,14 @@ ORDER_SERVICE_INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_orders_actual_delivery ON orders(actual_delivery_date)",
     "CREATE INDEX IF NOT EXISTS idx_orders_order_number ON orders(order_number)",
     "CREATE INDEX IF NOT EXISTS idx_orders_location ON orders(delivery_latitude, delivery_longitude)",
+
+    # Order listing: keyset pages on (created_at, id) per role, with and without a status filter
+    "CREATE INDEX IF NOT EXISTS idx_orders_hospital_listing ON orders(hospital_id, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_vendor_listing ON orders(vendor_id, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_listing ON orders(created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_hospital_status_listing ON orders(hospital_id, status, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_vendor_status_listing ON orders(vendor_id, status, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_status_listing ON orders(status, created_at DESC, id DESC)",
     
     # Order item indexes
     "CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id)",
@@ -2,12 +2,16 @@
 Service-to-Service Authentication Module
 Handles authentication for Order service to communicate with other microservices
 Uses header-based authentication as per Flow-Backend platform standards
+Upstream calls go through long-lived pooled clients and carry the remaining
+request deadline so upstreams can stop work the caller will not wait for
 """
 
 import os
+import time
+import asyncio
 import httpx
 import secrets
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 import logging
 import sys
 
@@ -16,9 +20,34 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 
 from shared.resilience.circuit_breaker import CircuitBreakerConfig, circuit_breaker_manager
 from shared.resilience.retry import RetryConfig, RetryHandler, RetryConfigs
+from shared.networking.http_pool import UpstreamClientPool, HTTPPoolConfig
+from shared.networking.ttl_cache import TTLCache
+from shared.networking.coalescing import SingleFlight, snap_to_grid
 
 logger = logging.getLogger(__name__)
 
+# Remaining time budget, in milliseconds, sent with every upstream request
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+# Default budget for one upstream call, retries included
+DEFAULT_REQUEST_TIMEOUT = 10.0
+
+# Nearby catalog lookups are made for the centre of a lat/lng grid cell
+# (0.01 degrees is roughly 1.1 km) and their results reused for a few seconds
+CATALOG_GRID_DEGREES = float(os.getenv("ORDER_CATALOG_GRID_DEGREES", "0.01"))
+CATALOG_CACHE_TTL = float(os.getenv("ORDER_CATALOG_CACHE_TTL_SECONDS", "2.0"))
+
+
+class DeadlineExceededError(Exception):
+    """Raised instead of sending a request whose deadline has already passed; not retried."""
+
+
+def deadline_after(timeout_ms: Optional[int]) -> Optional[float]:
+    """Absolute (monotonic) deadline for a time budget received from a caller, if any."""
+    if timeout_ms is None or timeout_ms <= 0:
+        return None
+    return time.monotonic() + timeout_ms / 1000
+
 
 class ServiceAuthManager:
     """Manages authentication for service-to-service communication using platform headers."""
@@ -36,6 +65,20 @@ class ServiceAuthManager:
             "notification": self.notification_service_url
         }
 
+        # One long-lived client per upstream; every idle connection is kept
+        # so bursts of order traffic reuse connections instead of reopening them
+        self.pool = UpstreamClientPool(
+            {**self.service_urls, "gateway": self.api_gateway_url},
+            HTTPPoolConfig.from_env(
+                "ORDER_UPSTREAM_POOL_",
+                max_connections=50,
+                max_keepalive_connections=50,
+                keepalive_expiry=60.0,
+                connect_timeout=2.0,
+                read_timeout=DEFAULT_REQUEST_TIMEOUT
+            )
+        )
+
         # Initialize resilience patterns
         self._setup_circuit_breakers()
         self.retry_handler = RetryHandler(RetryConfigs.HTTP)
@@ -55,6 +98,14 @@ class ServiceAuthManager:
         self.pricing_cb = circuit_breaker_manager.get_circuit_breaker("pricing-service", cb_config)
         self.notification_cb = circuit_breaker_manager.get_circuit_breaker("notification-service", cb_config)
 
+    async def start(self):
+        """Open the pooled upstream clients."""
+        await self.pool.start()
+
+    async def close(self):
+        """Close the pooled upstream clients."""
+        await self.pool.close()
+
     def get_authenticated_headers(self, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
         """
         Get headers for authenticated service calls using platform header-based authentication.
@@ -121,27 +172,34 @@ class ServiceAuthManager:
             service: Target service name (inventory, pricing, etc.)
             path: Service endpoint path
             user_context: User context for authentication headers
-            **kwargs: Additional arguments for httpx request
+            **kwargs: Additional arguments for httpx request; ``timeout`` is the
+                budget for the whole call, retries included
 
         Returns:
             httpx.Response: Response from the target service
         """
         # Get appropriate circuit breaker for the service
         circuit_breaker = self._get_circuit_breaker(service)
+        # Unknown services are reached through the API gateway
+        upstream = service if service in self.service_urls else "gateway"
+
+        # The timeout is the budget for the whole call, retries included,
+        # capped by the deadline of the request that triggered it
+        deadline = time.monotonic() + kwargs.pop("timeout", DEFAULT_REQUEST_TIMEOUT)
+        if user_context and user_context.get("deadline"):
+            deadline = min(deadline, user_context["deadline"])
 
         # Define the actual request function
         async def make_request():
+            remaining = max(deadline - time.monotonic(), 0.001)
+
             url = self.get_service_url(service, path)
             headers = self.get_authenticated_headers(user_context)
+            headers[DEADLINE_HEADER] = str(int(remaining * 1000))
 
             # Merge with any provided headers
             if "headers" in kwargs:
                 headers.update(kwargs["headers"])
-            kwargs["headers"] = headers
-
-            # Add timeout if not specified
-            if "timeout" not in kwargs:
-                kwargs["timeout"] = 10.0
 
             logger.info(
                 f"Making {method} request to {service} service: {path}",
@@ -154,40 +212,47 @@ class ServiceAuthManager:
                 }
             )
 
-            async with httpx.AsyncClient() as client:
-                response = await client.request(method, url, **kwargs)
-
-                if response.status_code >= 400:
-                    logger.warning(
-                        f"Request failed: {method} {url} -> {response.status_code}",
-                        extra={
-                            "service": service,
-                            "method": method,
-                            "path": path,
-                            "status_code": response.status_code,
-                            "response_text": response.text[:500]  # Limit response text
-                        }
+            response = await self.pool.request(
+                upstream, method, url, **{**kwargs, "headers": headers, "timeout": remaining}
+            )
+
+            if response.status_code >= 400:
+                logger.warning(
+                    f"Request failed: {method} {url} -> {response.status_code}",
+                    extra={
+                        "service": service,
+                        "method": method,
+                        "path": path,
+                        "status_code": response.status_code,
+                        "response_text": response.text[:500]  # Limit response text
+                    }
+                )
+                # Raise exception for 5xx errors to trigger circuit breaker
+                if response.status_code >= 500:
+                    raise httpx.HTTPStatusError(
+                        f"Server error: {response.status_code}",
+                        request=response.request,
+                        response=response
                     )
-                    # Raise exception for 5xx errors to trigger circuit breaker
-                    if response.status_code >= 500:
-                        raise httpx.HTTPStatusError(
-                            f"Server error: {response.status_code}",
-                            request=response.request,
-                            response=response
-                        )
-                else:
-                    logger.debug(f"Request successful: {method} {url} -> {response.status_code}")
+            else:
+                logger.debug(f"Request successful: {method} {url} -> {response.status_code}")
 
-                return response
+            return response
 
-        # Execute with circuit breaker and retry
-        try:
+        async def attempt():
+            # An exhausted budget is the caller's, not the upstream's fault, so
+            # fail before the circuit breaker can count it
+            if deadline <= time.monotonic():
+                raise DeadlineExceededError(f"Deadline exceeded before {method} {service}/{path}")
             if circuit_breaker:
                 # Use circuit breaker with retry
-                return await self.retry_handler.execute(circuit_breaker.call, make_request)
-            else:
-                # Use retry only
-                return await self.retry_handler.execute(make_request)
+                return await circuit_breaker.call(make_request)
+            # Use retry only
+            return await make_request()
+
+        # Execute with circuit breaker and retry
+        try:
+            return await self.retry_handler.execute(attempt)
 
         except Exception as e:
             logger.error(
@@ -202,6 +267,10 @@ class ServiceAuthManager:
             )
             raise
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-upstream pool statistics and latency histograms."""
+        return self.pool.get_stats()
+
     def _get_circuit_breaker(self, service: str):
         """Get circuit breaker for a specific service."""
         circuit_breakers = {
@@ -221,6 +290,15 @@ class ServiceClient:
 
     def __init__(self, auth_manager: ServiceAuthManager = None):
         self.auth = auth_manager or service_auth
+        self.catalog_cache = TTLCache(max_size=10000, ttl=CATALOG_CACHE_TTL)
+        self.catalog_requests = SingleFlight()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Catalog cache and request coalescing statistics."""
+        return {
+            "catalog_cache": self.catalog_cache.get_stats(),
+            **self.catalog_requests.get_stats()
+        }
 
     async def get_inventory_availability(
         self,
@@ -249,6 +327,31 @@ class ServiceClient:
             logger.error(f"Error getting vendor availability: {str(e)}")
             return None
 
+    async def bulk_check_availability(
+        self,
+        checks: List[Dict[str, Any]],
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Check availability of many (vendor, location, cylinder size, quantity) items in one call."""
+        try:
+            response = await self.auth.make_authenticated_request(
+                "POST",
+                "inventory",
+                "catalog/availability/bulk-check",
+                user_context=user_context,
+                json={"checks": checks}
+            )
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"Failed to bulk check availability: {response.status_code} - {response.text}")
+                return None
+
+        except Exception as e:
+            logger.error(f"Error bulk checking availability: {str(e)}")
+            return None
+
     async def search_nearby_catalog(
         self,
         latitude: float,
@@ -256,18 +359,65 @@ class ServiceClient:
         max_distance_km: float = 50.0,
         is_emergency: bool = False,
         sort_by: str = "distance",
+        cylinder_size: Optional[str] = None,
         user_context: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
-        """Search nearby catalog from inventory service."""
+        """
+        Search nearby catalog from inventory service.
+
+        The search is made from the centre of the grid cell containing the
+        point, so callers in the same cell share results: concurrent identical
+        searches by callers with the same role are merged into one upstream
+        call and successful results are reused for CATALOG_CACHE_TTL seconds.
+        The catalog does not depend on the user (the user only authenticates
+        the upstream call), so the key holds the role, which gates access.
+        The merged call runs with the default upstream timeout rather than
+        the deadline of whichever caller started it; each caller only waits
+        until its own deadline. Returned data is shared and must not be
+        modified.
+        """
+        latitude, longitude = snap_to_grid(latitude, longitude, CATALOG_GRID_DEGREES)
+        params = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "max_distance_km": max_distance_km,
+            "is_emergency": is_emergency,
+            "sort_by": sort_by
+        }
+        if cylinder_size:
+            params["cylinder_size"] = getattr(cylinder_size, "value", cylinder_size)
+
+        user_context = user_context or {}
+        role = user_context.get("role")
+        key = (str(getattr(role, "value", role)), tuple(sorted(params.items())))
+        cached = self.catalog_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # The shared call must not inherit one caller's deadline
+        shared_context = {name: value for name, value in user_context.items() if name != "deadline"}
+
+        async def load():
+            catalog = await self._fetch_nearby_catalog(params, shared_context)
+            if catalog is not None:
+                self.catalog_cache.set(key, catalog)
+            return catalog
+
+        deadline = user_context.get("deadline")
+        timeout = max(deadline - time.monotonic(), 0) if deadline else None
         try:
-            params = {
-                "latitude": latitude,
-                "longitude": longitude,
-                "max_distance_km": max_distance_km,
-                "is_emergency": is_emergency,
-                "sort_by": sort_by
-            }
+            return await self.catalog_requests.run(key, load, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Nearby catalog search did not finish before the request deadline")
+            return None
 
+    async def _fetch_nearby_catalog(
+        self,
+        params: Dict[str, Any],
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Search nearby catalog from inventory service, uncached."""
+        try:
             response = await self.auth.make_authenticated_request(
                 "GET",
                 "inventory",
@@ -286,6 +436,45 @@ class ServiceClient:
             logger.error(f"Error searching catalog: {str(e)}")
             return None
 
+    async def get_vendor_pricing_summaries(
+        self,
+        vendor_ids: List[str],
+        user_context: Optional[Dict[str, Any]] = None,
+        timeout: float = 10.0,
+        quantities: Optional[Dict[str, int]] = None,
+        is_emergency: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get pricing per cylinder size for many vendors in one pricing-service call.
+
+        With quantities, each size is priced at the tier covering that quantity
+        instead of the vendor's headline tier.
+        """
+        payload = {"vendor_user_ids": vendor_ids}
+        if quantities:
+            payload["quantities"] = quantities
+            payload["is_emergency"] = is_emergency
+
+        try:
+            response = await self.auth.make_authenticated_request(
+                "POST",
+                "pricing",
+                "api/v1/pricing/vendors/summary",
+                user_context=user_context,
+                json=payload,
+                timeout=timeout
+            )
+
+            if response.status_code == 200:
+                return response.json().get("vendors", {})
+            else:
+                logger.error(f"Failed to get vendor pricing summaries: {response.status_code} - {response.text}")
+                return None
+
+        except Exception as e:
+            logger.error(f"Error getting vendor pricing summaries: {str(e)}")
+            return None
+
     async def create_stock_reservation(
         self,
         cylinder_size: str,
@@ -319,6 +508,36 @@ class ServiceClient:
             logger.error(f"Error creating reservation: {str(e)}")
             return None
 
+    async def create_bulk_stock_reservation(
+        self,
+        order_id: str,
+        inventory_id: str,
+        lines: List[Dict[str, Any]],
+        idempotency_key: str,
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Reserve every line of an order at one inventory location in a single, all-or-nothing call."""
+        try:
+            response = await self.auth.make_authenticated_request(
+                "POST",
+                "inventory",
+                "inventory/reservations/bulk",
+                user_context=user_context,
+                json={"order_id": order_id, "inventory_id": inventory_id, "lines": lines},
+                # Makes retries safe: a repeated request returns the original reservations
+                headers={"Idempotency-Key": idempotency_key}
+            )
+
+            if response.status_code in [200, 201]:
+                return response.json()
+            else:
+                logger.error(f"Failed to create bulk reservation: {response.status_code} - {response.text}")
+                return None
+
+        except Exception as e:
+            logger.error(f"Error creating bulk reservation: {str(e)}")
+            return None
+
 
 # Global service client instance
 service_client = ServiceClient()
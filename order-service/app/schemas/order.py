@@ -117,6 +117,7 @@ class OrderResponse(BaseModel):
 
 class OrderListResponse(PaginatedResponse):
     items: List[OrderResponse]
+    next_cursor: Optional[str] = None
 
 
 class OrderTrackingResponse(BaseModel):
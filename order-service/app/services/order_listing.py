@@ -0,0 +1,140 @@
+"""
+Order listing engine for /orders.
+Pages are read with keyset pagination on (created_at, id), newest first, so
+each page is an index range scan on the per-role composite indexes no matter
+how deep it is. Totals come from COUNT(*); counts for large tenants are cached
+briefly, and the unfiltered admin total uses the planner's row estimate.
+"""
+
+import base64
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import select, func, tuple_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from app.models.order import Order
+from shared.models import OrderStatus, UserRole
+from shared.networking.ttl_cache import TTLCache
+
+# Counts at or above this size are cached for ORDER_COUNT_CACHE_TTL seconds
+ORDER_COUNT_CACHE_MIN = int(os.getenv("ORDER_COUNT_CACHE_MIN", "10000"))
+ORDER_COUNT_CACHE_TTL = float(os.getenv("ORDER_COUNT_CACHE_TTL", "30"))
+
+ESTIMATED_ORDER_COUNT_SQL = text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'orders'::regclass")
+
+
+def encode_cursor(order: Order) -> str:
+    """Opaque cursor pointing just after this order."""
+    payload = json.dumps({"created_at": order.created_at.isoformat(), "id": str(order.id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """(created_at, id) of the last order on the previous page."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["created_at"]), uuid.UUID(payload["id"])
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+class OrderListingEngine:
+    """Role-scoped order pages and totals."""
+
+    def __init__(self):
+        self.count_cache = TTLCache(max_size=10000, ttl=ORDER_COUNT_CACHE_TTL)
+
+    def _filters(self, user_id: str, user_role: str, status_filter: Optional[OrderStatus]) -> List[Any]:
+        """Filters matching the composite index for the caller's role."""
+        filters = []
+        if user_role == UserRole.HOSPITAL:
+            filters.append(Order.hospital_id == uuid.UUID(user_id))
+        elif user_role == UserRole.VENDOR:
+            filters.append(Order.vendor_id == uuid.UUID(user_id))
+        # Admin can see all orders
+
+        if status_filter:
+            filters.append(Order.status == status_filter)
+        return filters
+
+    async def list_orders(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        user_role: str,
+        size: int = 20,
+        status_filter: Optional[OrderStatus] = None,
+        cursor: Optional[str] = None,
+        page: int = 1
+    ) -> Tuple[List[Order], Optional[str]]:
+        """
+        One page of orders, newest first, and the cursor for the next page.
+
+        With a cursor the page starts after it; without one, `page` is still
+        honoured with OFFSET for existing clients.
+        """
+        query = select(Order).options(
+            selectinload(Order.items),
+            selectinload(Order.status_history)
+        ).where(*self._filters(user_id, user_role, status_filter))
+
+        if cursor:
+            created_at, order_id = decode_cursor(cursor)
+            query = query.where(tuple_(Order.created_at, Order.id) < tuple_(created_at, order_id))
+        elif page > 1:
+            query = query.offset((page - 1) * size)
+
+        # One extra row tells us whether there is a next page
+        query = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(size + 1)
+
+        result = await db.execute(query)
+        orders = list(result.scalars().all())
+
+        next_cursor = encode_cursor(orders[size - 1]) if len(orders) > size else None
+        return orders[:size], next_cursor
+
+    async def count_orders(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        user_role: str,
+        status_filter: Optional[OrderStatus] = None
+    ) -> int:
+        """Total orders visible to the caller."""
+        unscoped = user_role not in (UserRole.HOSPITAL, UserRole.VENDOR) and not status_filter
+        if unscoped:
+            estimate = (await db.execute(ESTIMATED_ORDER_COUNT_SQL)).scalar()
+            if estimate is not None and estimate >= ORDER_COUNT_CACHE_MIN:
+                return int(estimate)
+
+        cache_key = (str(user_role), None if unscoped else user_id, str(status_filter) if status_filter else None)
+        cached = self.count_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        count_query = select(func.count()).select_from(Order).where(
+            *self._filters(user_id, user_role, status_filter)
+        )
+        total = (await db.execute(count_query)).scalar_one()
+
+        if total >= ORDER_COUNT_CACHE_MIN:
+            self.count_cache.set(cache_key, total)
+        return total
+
+    def get_stats(self):
+        """Get listing engine statistics."""
+        return {"count_cache": self.count_cache.get_stats()}
+
+
+# Global order listing engine instance
+order_listing_engine = OrderListingEngine()
@@ -1,10 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_, or_
+from sqlalchemy import select, insert, update, and_, or_
 from sqlalchemy.orm import selectinload
-from typing import Optional, List, Tuple
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Optional, List, Tuple, Dict, Any
 from datetime import datetime, timedelta
+import asyncio
 import uuid
-import httpx
 import sys
 import os
 import logging
@@ -15,14 +16,19 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 
 from app.models.order import Order, OrderItem, OrderStatusHistory
 from app.schemas.order import OrderCreate, OrderUpdate, DirectOrderCreate, VendorSelectionResult, DirectOrderResponse, OrderPricingRequest, OrderPricingResponse
-from app.core.config import get_settings
 from app.core.service_auth import service_client
+from app.services.order_listing import order_listing_engine
 from shared.models import OrderStatus, UserRole, CylinderSize
 from shared.utils import generate_order_reference, calculate_distance_km, calculate_delivery_eta
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Vendor pricing fan-out: vendors per bulk pricing-service request (it accepts
+# up to 500) and the deadline for each request, retries included
+PRICING_BATCH_SIZE = int(os.getenv("ORDER_PRICING_BATCH_SIZE", "500"))
+PRICING_TIMEOUT_SECONDS = float(os.getenv("ORDER_PRICING_TIMEOUT_SECONDS", "3.0"))
+
 
 class OrderService:
     """Order service with structured logging and correlation ID support."""
@@ -53,61 +59,91 @@ class OrderService:
         log_method(message, extra=extra_context)
     async def create_order(self, db: AsyncSession, hospital_id: str, order_data: OrderCreate) -> Order:
         """Create a new order."""
-        # Generate order reference
-        reference = generate_order_reference()
-        
-        # Calculate totals
-        subtotal = 0.0
-        delivery_fee = 0.0
-        emergency_surcharge = 0.0
-        
-        # Create order
-        db_order = Order(
-            reference=reference,
-            hospital_id=uuid.UUID(hospital_id),
-            delivery_address=order_data.delivery_address,
-            delivery_latitude=order_data.delivery_latitude,
-            delivery_longitude=order_data.delivery_longitude,
-            delivery_contact_name=order_data.delivery_contact_name,
-            delivery_contact_phone=order_data.delivery_contact_phone,
-            is_emergency=order_data.is_emergency,
-            notes=order_data.notes,
-            special_instructions=order_data.special_instructions,
-            requested_delivery_time=order_data.requested_delivery_time,
-            subtotal=subtotal,
-            delivery_fee=delivery_fee,
-            emergency_surcharge=emergency_surcharge,
-            total_amount=subtotal + delivery_fee + emergency_surcharge
+        # If preferred vendor specified, assign it when available
+        vendor_id = None
+        if order_data.preferred_vendor_id and await self._is_vendor_available(order_data.preferred_vendor_id):
+            vendor_id = uuid.UUID(order_data.preferred_vendor_id)
+
+        return await self._insert_order(
+            db,
+            hospital_id,
+            order_data,
+            vendor_id=vendor_id,
+            subtotal=0.0,
+            delivery_fee=0.0,
+            emergency_surcharge=0.0,
+            total_amount=0.0
         )
-        
-        db.add(db_order)
-        await db.commit()
-        await db.refresh(db_order)
-        
-        # Create order items
-        for item_data in order_data.items:
-            order_item = OrderItem(
-                order_id=db_order.id,
-                cylinder_size=item_data.cylinder_size,
-                quantity=item_data.quantity
-            )
-            db.add(order_item)
-        
+
+    async def _insert_order(
+        self,
+        db: AsyncSession,
+        hospital_id: str,
+        order_data: OrderCreate,
+        item_prices: Optional[List[dict]] = None,
+        **order_fields
+    ) -> Order:
+        """
+        Insert an order with its items and initial status history in one transaction.
+
+        Ids are generated here so the items and history can be inserted with
+        one multi-row INSERT each, and RETURNING fills in server defaults
+        instead of refreshing. The returned order has items and status_history
+        loaded.
+        """
+        order_id = uuid.uuid4()
+
+        result = await db.execute(
+            insert(Order).values(
+                id=order_id,
+                reference=generate_order_reference(),
+                hospital_id=uuid.UUID(hospital_id),
+                delivery_address=order_data.delivery_address,
+                delivery_latitude=order_data.delivery_latitude,
+                delivery_longitude=order_data.delivery_longitude,
+                delivery_contact_name=order_data.delivery_contact_name,
+                delivery_contact_phone=order_data.delivery_contact_phone,
+                is_emergency=order_data.is_emergency,
+                notes=order_data.notes,
+                special_instructions=order_data.special_instructions,
+                requested_delivery_time=order_data.requested_delivery_time,
+                **order_fields
+            ).returning(Order)
+        )
+        db_order = result.scalar_one()
+
+        item_rows = [
+            {
+                "id": uuid.uuid4(),
+                "order_id": order_id,
+                "cylinder_size": item_data.cylinder_size,
+                "quantity": item_data.quantity,
+                "unit_price": item_prices[index]["unit_price"] if item_prices else None,
+                "total_price": item_prices[index]["total_price"] if item_prices else None
+            }
+            for index, item_data in enumerate(order_data.items)
+        ]
+        result = await db.execute(insert(OrderItem).values(item_rows).returning(OrderItem))
+        items = list(result.scalars().all())
+
         # Create initial status history
-        status_history = OrderStatusHistory(
-            order_id=db_order.id,
-            status="pending",
-            notes="Order created",
-            updated_by=uuid.UUID(hospital_id)
+        result = await db.execute(
+            insert(OrderStatusHistory).values([{
+                "id": uuid.uuid4(),
+                "order_id": order_id,
+                "status": "pending",
+                "notes": "Order created",
+                "updated_by": uuid.UUID(hospital_id)
+            }]).returning(OrderStatusHistory)
         )
-        db.add(status_history)
-        
+        status_history = list(result.scalars().all())
+
         await db.commit()
-        
-        # If preferred vendor specified, try to assign
-        if order_data.preferred_vendor_id:
-            await self._try_assign_vendor(db, db_order.id, order_data.preferred_vendor_id)
-        
+
+        # Attach the inserted rows without a lazy load
+        set_committed_value(db_order, "items", items)
+        set_committed_value(db_order, "status_history", status_history)
+
         return db_order
     
     async def get_order_by_id(self, db: AsyncSession, order_id: str) -> Optional[Order]:
@@ -126,42 +162,16 @@ class OrderService:
         user_role: str, 
         page: int = 1, 
         size: int = 20,
-        status_filter: Optional[OrderStatus] = None
-    ) -> Tuple[List[Order], int]:
-        """Get orders for a user based on their role."""
-        query = select(Order).options(selectinload(Order.items))
-        
-        # Filter by user role
-        if user_role == UserRole.HOSPITAL:
-            query = query.filter(Order.hospital_id == uuid.UUID(user_id))
-        elif user_role == UserRole.VENDOR:
-            query = query.filter(Order.vendor_id == uuid.UUID(user_id))
-        # Admin can see all orders
-        
-        # Apply status filter
-        if status_filter:
-            query = query.filter(Order.status == status_filter)
-        
-        # Get total count
-        count_query = select(Order.id)
-        if user_role == UserRole.HOSPITAL:
-            count_query = count_query.filter(Order.hospital_id == uuid.UUID(user_id))
-        elif user_role == UserRole.VENDOR:
-            count_query = count_query.filter(Order.vendor_id == uuid.UUID(user_id))
-        if status_filter:
-            count_query = count_query.filter(Order.status == status_filter)
-        
-        total_result = await db.execute(count_query)
-        total = len(total_result.all())
-        
-        # Apply pagination
-        query = query.order_by(Order.created_at.desc())
-        query = query.offset((page - 1) * size).limit(size)
-        
-        result = await db.execute(query)
-        orders = result.scalars().all()
-        
-        return list(orders), total
+        status_filter: Optional[OrderStatus] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Order], int, Optional[str]]:
+        """Get a page of orders for a user based on their role, the total, and the next page's cursor."""
+        orders, next_cursor = await order_listing_engine.list_orders(
+            db, user_id, user_role, size, status_filter, cursor=cursor, page=page
+        )
+        total = await order_listing_engine.count_orders(db, user_id, user_role, status_filter)
+
+        return orders, total, next_cursor
     
     async def update_order(self, db: AsyncSession, order_id: str, order_update: OrderUpdate) -> Order:
         """Update order."""
@@ -323,8 +333,8 @@ class OrderService:
             ]
         }
     
-    async def _try_assign_vendor(self, db: AsyncSession, order_id: uuid.UUID, vendor_id: str, user_context: Optional[dict] = None) -> bool:
-        """Try to assign vendor to order."""
+    async def _is_vendor_available(self, vendor_id: str, user_context: Optional[dict] = None) -> bool:
+        """Check whether a vendor can take orders."""
         try:
             # Check if vendor is available using service client
             availability_data = await service_client.get_inventory_availability(
@@ -333,9 +343,6 @@ class OrderService:
             )
 
             if availability_data and availability_data.get("available", False):
-                stmt = update(Order).where(Order.id == order_id).values(vendor_id=uuid.UUID(vendor_id))
-                await db.execute(stmt)
-                await db.commit()
                 return True
         except Exception as e:
             self._log_with_context(
@@ -343,7 +350,6 @@ class OrderService:
                 f"Error checking vendor availability for vendor {vendor_id}",
                 user_context,
                 vendor_id=vendor_id,
-                order_id=str(order_id),
                 error=str(e)
             )
 
@@ -369,37 +375,26 @@ class OrderService:
             if not vendor_selection:
                 raise ValueError("No suitable vendor found for this order")
 
-            # Calculate pricing
-            pricing_breakdown = await self._calculate_order_pricing(order_data, vendor_selection.vendor_id)
+            # Confirm live stock for every item at the selected location in one call
+            await self._verify_stock(order_data, vendor_selection, user_context)
 
-            # Create the order
-            order_create = OrderCreate(
-                items=order_data.items,
-                delivery_address=order_data.delivery_address,
-                delivery_latitude=order_data.delivery_latitude,
-                delivery_longitude=order_data.delivery_longitude,
-                delivery_contact_name=order_data.delivery_contact_name,
-                delivery_contact_phone=order_data.delivery_contact_phone,
-                is_emergency=order_data.is_emergency,
-                notes=order_data.notes,
-                special_instructions=order_data.special_instructions,
-                requested_delivery_time=order_data.requested_delivery_time,
-                preferred_vendor_id=vendor_selection.vendor_id
+            # Calculate pricing
+            pricing_breakdown = await self._calculate_order_pricing(order_data, vendor_selection.vendor_id, user_context)
+
+            # Create the order, already assigned and priced, in a single transaction
+            order = await self._insert_order(
+                db,
+                hospital_id,
+                order_data,
+                item_prices=pricing_breakdown["breakdown"]["items"],
+                vendor_id=uuid.UUID(vendor_selection.vendor_id),
+                subtotal=pricing_breakdown["subtotal"],
+                delivery_fee=pricing_breakdown["delivery_fee"],
+                emergency_surcharge=pricing_breakdown["emergency_surcharge"] if order_data.is_emergency else 0.0,
+                total_amount=pricing_breakdown["total"],
+                estimated_delivery_time=datetime.utcnow() + timedelta(hours=vendor_selection.estimated_delivery_time_hours)
             )
 
-            order = await self.create_order(db, hospital_id, order_create)
-
-            # Update order with pricing information
-            order.vendor_id = uuid.UUID(vendor_selection.vendor_id)
-            order.subtotal = pricing_breakdown["subtotal"]
-            order.delivery_fee = pricing_breakdown["delivery_fee"]
-            order.emergency_surcharge = pricing_breakdown["emergency_surcharge"] if order_data.is_emergency else 0.0
-            order.total_amount = pricing_breakdown["total"]
-            order.estimated_delivery_time = datetime.utcnow() + timedelta(hours=vendor_selection.estimated_delivery_time_hours)
-
-            await db.commit()
-            await db.refresh(order)
-
             # Reserve stock
             await self._reserve_stock(order, vendor_selection.location_id, user_context)
 
@@ -428,8 +423,8 @@ class OrderService:
     async def get_order_pricing(self, pricing_request: OrderPricingRequest, user_context: Optional[dict] = None) -> OrderPricingResponse:
         """Get pricing options for an order without creating it."""
         try:
-            # Get vendor options
-            vendor_options = await self._get_vendor_options(pricing_request, user_context)
+            # Get vendor options, priced in one fan-out
+            vendor_options, pricing_breakdowns = await self._get_vendor_options(pricing_request, user_context)
 
             if not vendor_options:
                 raise ValueError("No vendors available for this order")
@@ -437,8 +432,8 @@ class OrderService:
             # Select recommended vendor (best price by default)
             recommended_vendor = min(vendor_options, key=lambda x: x.total_price)
 
-            # Calculate pricing breakdown for recommended vendor
-            pricing_breakdown = await self._calculate_order_pricing_from_request(pricing_request, recommended_vendor.vendor_id)
+            # Pricing breakdown for recommended vendor, already computed with the options
+            pricing_breakdown = pricing_breakdowns[recommended_vendor.vendor_id]
 
             return OrderPricingResponse(
                 vendor_options=vendor_options,
@@ -533,6 +528,35 @@ class OrderService:
         except Exception as e:
             raise Exception(f"Failed to select vendor: {str(e)}")
 
+    async def _verify_stock(self, order_data: DirectOrderCreate, vendor_selection: VendorSelectionResult, user_context: Optional[dict] = None):
+        """Bulk-check that the selected location still stocks every order item."""
+        availability = await service_client.bulk_check_availability(
+            [
+                {
+                    "vendor_id": vendor_selection.vendor_id,
+                    "location_id": vendor_selection.location_id,
+                    "cylinder_size": item.cylinder_size.value,
+                    "quantity": item.quantity
+                }
+                for item in order_data.items
+            ],
+            user_context=user_context
+        )
+
+        if availability is None:
+            # Inventory unreachable: fall back to the catalog's availability snapshot
+            self._log_with_context(
+                "warning",
+                "Could not confirm stock before order creation",
+                user_context,
+                vendor_id=str(vendor_selection.vendor_id),
+                location_id=str(vendor_selection.location_id)
+            )
+            return
+
+        if availability.get("unavailable_count", 0) > 0:
+            raise ValueError("Selected vendor no longer has enough stock for this order")
+
     def _get_sort_criteria(self, selection_criteria: str) -> str:
         """Convert selection criteria to sort criteria."""
         mapping = {
@@ -543,122 +567,182 @@ class OrderService:
         }
         return mapping.get(selection_criteria, "distance")
 
-    async def _calculate_order_pricing(self, order_data: DirectOrderCreate, vendor_id: str) -> dict:
+    @staticmethod
+    def _quantities_by_size(order_data: DirectOrderCreate) -> Dict[str, int]:
+        """Total quantity ordered per cylinder size."""
+        quantities: Dict[str, int] = {}
+        for order_item in order_data.items:
+            size = order_item.cylinder_size.value
+            quantities[size] = quantities.get(size, 0) + order_item.quantity
+        return quantities
+
+    async def _fetch_vendor_pricing(
+        self,
+        vendor_ids: List[str],
+        order_data: DirectOrderCreate,
+        user_context: Optional[dict] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch pricing per cylinder size for many vendors at once.
+
+        Each size is priced at the vendor's tier covering the quantity ordered
+        for it, so volume tiers and tier bounds apply. Vendors are sent to pricing-service in bulk requests of up to
+        PRICING_BATCH_SIZE, run concurrently, each with a deadline of
+        PRICING_TIMEOUT_SECONDS. Results are partial on failure: vendors in a
+        batch that failed or timed out are left out, like vendors with no
+        active pricing.
+        """
+        unique_ids = list(dict.fromkeys(str(vendor_id) for vendor_id in vendor_ids))
+        quantities = self._quantities_by_size(order_data)
+        batches = [unique_ids[i:i + PRICING_BATCH_SIZE] for i in range(0, len(unique_ids), PRICING_BATCH_SIZE)]
+
+        async def fetch_batch(batch: List[str]) -> Optional[Dict[str, Any]]:
+            try:
+                return await asyncio.wait_for(
+                    service_client.get_vendor_pricing_summaries(
+                        batch,
+                        user_context,
+                        timeout=PRICING_TIMEOUT_SECONDS,
+                        quantities=quantities,
+                        is_emergency=order_data.is_emergency
+                    ),
+                    PRICING_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                return None
+
+        results = await asyncio.gather(*(fetch_batch(batch) for batch in batches))
+
+        pricing = {}
+        for batch, summaries in zip(batches, results):
+            if summaries is None:
+                self._log_with_context(
+                    "warning",
+                    "Vendor pricing unavailable for batch, continuing with partial results",
+                    user_context,
+                    vendor_count=len(batch)
+                )
+                continue
+            for vendor_id in batch:
+                summary = summaries.get(vendor_id)
+                if summary and summary.get("pricing"):
+                    pricing[vendor_id] = summary["pricing"]
+
+        return pricing
+
+    def _price_order_items(self, order_data: DirectOrderCreate, pricing_by_size: Dict[str, Any]) -> dict:
+        """
+        Price an order from one vendor's pricing per cylinder size.
+
+        Raises ValueError when a size has no pricing or its tier's quantity
+        bounds do not contain the quantity ordered for that size.
+        """
+        quantities = self._quantities_by_size(order_data)
+        subtotal = 0.0
+        delivery_fee = 0.0
+        emergency_surcharge = 0.0
+        breakdown_items = []
+
+        for order_item in order_data.items:
+            # Find pricing for this cylinder size
+            size = order_item.cylinder_size.value
+            pricing_item = pricing_by_size.get(size)
+
+            if not pricing_item:
+                raise ValueError(f"No pricing found for {size}")
+
+            minimum_quantity = pricing_item.get("minimum_order_quantity") or 1
+            maximum_quantity = pricing_item.get("maximum_order_quantity")
+            if quantities[size] < minimum_quantity or (maximum_quantity is not None and quantities[size] > maximum_quantity):
+                raise ValueError(f"No pricing tier for {quantities[size]} x {size}")
+
+            unit_price = float(pricing_item["unit_price"])
+            item_price = unit_price * order_item.quantity
+            subtotal += item_price
+            delivery_fee = max(delivery_fee, float(pricing_item["delivery_fee"]))
+
+            if order_data.is_emergency:
+                emergency_surcharge += float(pricing_item["emergency_surcharge"])
+
+            breakdown_items.append({
+                "cylinder_size": size,
+                "quantity": order_item.quantity,
+                "unit_price": unit_price,
+                "total_price": item_price
+            })
+
+        total = subtotal + delivery_fee + emergency_surcharge
+
+        return {
+            "subtotal": subtotal,
+            "delivery_fee": delivery_fee,
+            "emergency_surcharge": emergency_surcharge,
+            "total": total,
+            "breakdown": {
+                "items": breakdown_items
+            }
+        }
+
+    async def _calculate_order_pricing(self, order_data: DirectOrderCreate, vendor_id: str, user_context: Optional[dict] = None) -> dict:
         """Calculate pricing for an order with a specific vendor."""
         try:
-            # Get pricing from pricing service
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{get_settings().PRICING_SERVICE_URL}/products",
-                    params={"vendor_id": vendor_id}
-                )
+            pricing = await self._fetch_vendor_pricing([vendor_id], order_data, user_context)
 
-                if response.status_code != 200:
-                    raise Exception("Failed to get pricing information")
-
-                pricing_data = response.json()
-                pricing_items = pricing_data.get("items", [])
-
-                subtotal = 0.0
-                delivery_fee = 0.0
-                emergency_surcharge = 0.0
-
-                for order_item in order_data.items:
-                    # Find pricing for this cylinder size
-                    pricing_item = next(
-                        (p for p in pricing_items if p["cylinder_size"] == order_item.cylinder_size.value),
-                        None
-                    )
-
-                    if not pricing_item:
-                        raise Exception(f"No pricing found for {order_item.cylinder_size.value}")
-
-                    item_price = float(pricing_item["unit_price"]) * order_item.quantity
-                    subtotal += item_price
-                    delivery_fee = max(delivery_fee, float(pricing_item["delivery_fee"]))
-
-                    if order_data.is_emergency:
-                        emergency_surcharge += float(pricing_item["emergency_surcharge"])
-
-                total = subtotal + delivery_fee + emergency_surcharge
-
-                return {
-                    "subtotal": subtotal,
-                    "delivery_fee": delivery_fee,
-                    "emergency_surcharge": emergency_surcharge,
-                    "total": total,
-                    "breakdown": {
-                        "items": [
-                            {
-                                "cylinder_size": item.cylinder_size.value,
-                                "quantity": item.quantity,
-                                "unit_price": next(
-                                    (float(p["unit_price"]) for p in pricing_items if p["cylinder_size"] == item.cylinder_size.value),
-                                    0.0
-                                ),
-                                "total_price": next(
-                                    (float(p["unit_price"]) * item.quantity for p in pricing_items if p["cylinder_size"] == item.cylinder_size.value),
-                                    0.0
-                                )
-                            }
-                            for item in order_data.items
-                        ]
-                    }
-                }
+            if str(vendor_id) not in pricing:
+                raise Exception("Failed to get pricing information")
+
+            return self._price_order_items(order_data, pricing[str(vendor_id)])
 
         except Exception as e:
             raise Exception(f"Failed to calculate pricing: {str(e)}")
 
-    async def _calculate_order_pricing_from_request(self, pricing_request: OrderPricingRequest, vendor_id: str) -> dict:
-        """Calculate pricing from a pricing request."""
-        # Convert pricing request to order data format for reuse
-        order_data = DirectOrderCreate(
-            items=pricing_request.items,
-            delivery_address="",  # Not needed for pricing
-            delivery_latitude=pricing_request.delivery_latitude,
-            delivery_longitude=pricing_request.delivery_longitude,
-            is_emergency=pricing_request.is_emergency,
-            max_distance_km=pricing_request.max_distance_km
-        )
-
-        return await self._calculate_order_pricing(order_data, vendor_id)
-
     async def _reserve_stock(self, order: Order, location_id: str, user_context: Optional[dict] = None):
-        """Reserve stock for the order."""
+        """Reserve stock for every order item in one all-or-nothing call."""
+        lines = [
+            {
+                "cylinder_size": item.cylinder_size.value if hasattr(item.cylinder_size, 'value') else str(item.cylinder_size),
+                "quantity": item.quantity
+            }
+            for item in order.items
+        ]
+
         try:
-            for item in order.items:
-                # Use service client to create stock reservation
-                reservation_data = await service_client.create_stock_reservation(
-                    cylinder_size=item.cylinder_size.value if hasattr(item.cylinder_size, 'value') else str(item.cylinder_size),
-                    quantity=item.quantity,
+            reservation_data = await service_client.create_bulk_stock_reservation(
+                order_id=str(order.id),
+                inventory_id=str(location_id),
+                lines=lines,
+                idempotency_key=f"order-reservation:{order.id}",
+                user_context=user_context
+            )
+
+            if not reservation_data:
+                # If reservation fails, we should handle this gracefully
+                # For now, we'll log it but not fail the order
+                self._log_with_context(
+                    "warning",
+                    "Failed to reserve stock for order",
+                    user_context,
                     order_id=str(order.id),
-                    user_context=user_context
+                    location_id=str(location_id),
+                    lines=lines
                 )
 
-                if not reservation_data:
-                    # If reservation fails, we should handle this gracefully
-                    # For now, we'll log it but not fail the order
-                    self._log_with_context(
-                        "warning",
-                        f"Failed to reserve stock for order item",
-                        user_context,
-                        order_id=str(order.id),
-                        cylinder_size=str(item.cylinder_size),
-                        quantity=item.quantity
-                    )
-
         except Exception as e:
             # Log the error but don't fail the order
             self._log_with_context(
                 "error",
-                f"Error reserving stock for order",
+                "Error reserving stock for order",
                 user_context,
                 order_id=str(order.id),
                 error=str(e)
             )
 
-    async def _get_vendor_options(self, pricing_request: OrderPricingRequest, user_context: Optional[dict] = None) -> List[VendorSelectionResult]:
-        """Get all available vendor options for a pricing request."""
+    async def _get_vendor_options(
+        self,
+        pricing_request: OrderPricingRequest,
+        user_context: Optional[dict] = None
+    ) -> Tuple[List[VendorSelectionResult], Dict[str, dict]]:
+        """Get all available vendor options for a pricing request, with each vendor's pricing breakdown."""
         try:
             # Convert to direct order format for reuse
             order_data = DirectOrderCreate(
@@ -681,7 +765,7 @@ class OrderService:
             )
 
             if not catalog_data:
-                return []
+                return [], {}
 
             vendors = catalog_data.get("items", [])
 
@@ -693,29 +777,33 @@ class OrderService:
                     vendor_groups[vendor_id] = []
                 vendor_groups[vendor_id].append(item)
 
+            # Price every candidate vendor in one fan-out instead of a call per vendor
+            vendor_pricing = await self._fetch_vendor_pricing(list(vendor_groups), order_data, user_context)
+
             vendor_options = []
+            pricing_breakdowns = {}
             for vendor_id, items in vendor_groups.items():
                 try:
-                    pricing = await self._calculate_order_pricing(order_data, vendor_id)
-
-                    if items:
-                        first_item = items[0]
-                        vendor_options.append(VendorSelectionResult(
-                            vendor_id=vendor_id,
-                            vendor_name=first_item["vendor_name"],
-                            location_id=first_item["location_id"],
-                            location_name=first_item["location_name"],
-                            distance_km=first_item["distance_km"],
-                            estimated_delivery_time_hours=first_item["estimated_delivery_time_hours"],
-                            total_price=pricing["total"],
-                            selection_reason="Available vendor option",
-                            vendor_rating=first_item.get("vendor_rating")
-                        ))
-                except Exception:
+                    pricing = self._price_order_items(order_data, vendor_pricing[str(vendor_id)])
+                except (KeyError, ValueError):
                     # Skip vendors with pricing issues
                     continue
 
-            return vendor_options
+                first_item = items[0]
+                vendor_options.append(VendorSelectionResult(
+                    vendor_id=vendor_id,
+                    vendor_name=first_item["vendor_name"],
+                    location_id=first_item["location_id"],
+                    location_name=first_item["location_name"],
+                    distance_km=first_item["distance_km"],
+                    estimated_delivery_time_hours=first_item["estimated_delivery_time_hours"],
+                    total_price=pricing["total"],
+                    selection_reason="Available vendor option",
+                    vendor_rating=first_item.get("vendor_rating")
+                ))
+                pricing_breakdowns[vendor_id] = pricing
+
+            return vendor_options, pricing_breakdowns
 
         except Exception as e:
             raise Exception(f"Failed to get vendor options: {str(e)}")
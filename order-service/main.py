@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Header
+from fastapi import FastAPI, HTTPException, Depends, status, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -27,6 +27,7 @@ from app.schemas.order import (OrderCreate, OrderResponse, OrderUpdate, OrderLis
                               DirectOrderCreate, DirectOrderResponse, OrderPricingRequest, OrderPricingResponse)
 from app.services.order_service import OrderService
 from app.services.event_service import EventService
+from app.core.service_auth import service_auth, service_client, deadline_after, DEADLINE_HEADER
 from shared.models import OrderStatus, APIResponse, UserRole
 from shared.security.auth import get_current_user
 
@@ -45,6 +46,10 @@ async def lifespan(app: FastAPI):
             logger.error("❌ Database initialization failed")
             # Continue startup but log the error
 
+        # Open pooled upstream clients
+        await service_auth.start()
+        logger.info("✅ Upstream client pool started")
+
         # Start event service (graceful startup)
         try:
             await event_service.connect()
@@ -69,6 +74,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️ Error stopping event service: {e}")
 
+    try:
+        await service_auth.close()
+        logger.info("✅ Upstream client pool closed")
+    except Exception as e:
+        logger.warning(f"⚠️ Error closing upstream client pool: {e}")
+
     logger.info("👋 Order Service shutdown completed")
 
 
@@ -136,6 +147,17 @@ async def health_check():
     }
 
 
+@app.get("/metrics/upstreams")
+async def upstream_metrics():
+    """Per-upstream connection pool statistics, latency histograms and catalog lookup coalescing."""
+    return {
+        "service": "Order Service",
+        "timestamp": datetime.utcnow().isoformat(),
+        "upstreams": service_auth.get_stats(),
+        "catalog_lookups": service_client.get_stats()
+    }
+
+
 @app.post("/orders", response_model=APIResponse)
 async def create_order(
     order_data: OrderCreate,
@@ -203,6 +225,7 @@ async def create_order(
 @app.post("/orders/direct", response_model=DirectOrderResponse)
 async def create_direct_order(
     order_data: DirectOrderCreate,
+    request_timeout_ms: Optional[int] = Header(None, alias=DEADLINE_HEADER),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -216,7 +239,9 @@ async def create_direct_order(
         user_context = {
             "user_id": current_user["user_id"],
             "role": current_user["role"],
-            "correlation_id": correlation_id
+            "correlation_id": correlation_id,
+            # Upstream calls share the caller's remaining time budget, if it sent one
+            "deadline": deadline_after(request_timeout_ms)
         }
 
         logger.info(
@@ -247,6 +272,7 @@ async def create_direct_order(
 @app.post("/orders/pricing", response_model=OrderPricingResponse)
 async def get_order_pricing(
     pricing_request: OrderPricingRequest,
+    request_timeout_ms: Optional[int] = Header(None, alias=DEADLINE_HEADER),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -260,7 +286,9 @@ async def get_order_pricing(
         user_context = {
             "user_id": current_user["user_id"],
             "role": current_user["role"],
-            "correlation_id": correlation_id
+            "correlation_id": correlation_id,
+            # Upstream calls share the caller's remaining time budget, if it sent one
+            "deadline": deadline_after(request_timeout_ms)
         }
 
         logger.info(
@@ -289,15 +317,21 @@ async def get_order_pricing(
 @app.get("/orders", response_model=OrderListResponse)
 async def get_orders(
     page: int = 1,
-    size: int = 20,
+    size: int = Query(20, ge=1, le=100),
     status_filter: Optional[OrderStatus] = None,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get orders for current user."""
+    """
+    Get orders for current user, newest first.
+
+    Pass the returned next_cursor as `cursor` to fetch the following page;
+    `page` is still accepted but deep pages are slower.
+    """
     try:
-        orders, total = await order_service.get_user_orders(
-            db, current_user["user_id"], current_user["role"], page, size, status_filter
+        orders, total, next_cursor = await order_service.get_user_orders(
+            db, current_user["user_id"], current_user["role"], page, size, status_filter, cursor
         )
         
         return OrderListResponse(
@@ -305,7 +339,13 @@ async def get_orders(
             total=total,
             page=page,
             size=size,
-            pages=(total + size - 1) // size
+            pages=(total + size - 1) // size,
+            next_cursor=next_cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         raise HTTPException(
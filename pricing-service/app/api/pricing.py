@@ -7,6 +7,7 @@ from app.core.database import get_db
 from app.schemas.pricing import (
     PriceComparisonRequest, PriceComparisonResponse,
     BulkPricingRequest, BulkPricingResponse,
+    VendorPricingSummaryRequest, VendorPricingSummaryResponse,
     PricingTierCreate, PricingTierUpdate, PricingTierResponse,
     PriceAlertCreate, PriceAlertResponse,
     MarketPricingResponse
@@ -91,6 +92,39 @@ async def get_bulk_pricing(
         )
 
 
+@router.post("/vendors/summary", response_model=VendorPricingSummaryResponse)
+async def get_vendor_pricing_summaries(
+    summary_request: VendorPricingSummaryRequest,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get headline pricing per cylinder size for many vendors at once.
+    
+    Used by catalog enrichment and order pricing in other services; vendors
+    are keyed by their user ID. Vendors without active pricing are omitted.
+    When quantities are given, each size is priced at the tier whose bounds
+    contain the quantity, and sizes with no such tier are omitted.
+    """
+    try:
+        pricing_service = PricingService(db)
+        summaries = await pricing_service.get_vendor_pricing_summaries(
+            list(dict.fromkeys(summary_request.vendor_user_ids)),
+            quantities=summary_request.quantities,
+            is_emergency=summary_request.is_emergency
+        )
+        
+        logger.info(f"Returned pricing summaries for {len(summaries.vendors)} of {len(summary_request.vendor_user_ids)} vendors")
+        return summaries
+
+    except Exception as e:
+        logger.error(f"Error getting vendor pricing summaries: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get vendor pricing summaries"
+        )
+
+
 @router.get("/products/{product_id}/vendors", response_model=PriceComparisonResponse)
 async def get_product_vendor_pricing(
     product_id: str,
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+import json
 import logging
 
 from app.core.database import get_db
@@ -151,6 +153,54 @@ async def check_product_availability(
         )
 
 
+@router.post("/availability/check/stream")
+async def stream_product_availability(
+    availability_request: ProductAvailabilityRequest,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Check real-time availability for specific products, streamed as NDJSON.
+
+    Emits one ProductAvailabilityItem per line, in request order, as each
+    product is evaluated. The product query runs before the response starts,
+    so it fails with a regular HTTP error; a failure after that ends the
+    stream with an {"error": ...} line.
+    """
+    # Only hospitals can check availability
+    if current_user["role"] != UserRole.HOSPITAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only hospitals can check product availability"
+        )
+
+    product_service = ProductService(db)
+    items = product_service.iter_product_availability(availability_request)
+
+    # Run the query and evaluate the first product before committing to a 200
+    try:
+        first_item = await anext(items, None)
+    except Exception as e:
+        logger.error(f"Error checking product availability: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to check product availability"
+        )
+
+    async def availability_lines():
+        if first_item is None:
+            return
+        yield first_item.model_dump_json() + "\n"
+        try:
+            async for item in items:
+                yield item.model_dump_json() + "\n"
+        except Exception as e:
+            logger.error(f"Error streaming product availability: {e}")
+            yield json.dumps({"error": "Failed to check product availability"}) + "\n"
+
+    return StreamingResponse(availability_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/vendors/{vendor_id}/products", response_model=ProductListResponse)
 async def get_vendor_products(
     vendor_id: str,
@@ -3,6 +3,8 @@ Pricing Service Database Initialization
 Handles database schema creation and initial data seeding for the pricing service
 """
 
+import hashlib
+import json
 import logging
 import sys
 import os
@@ -265,6 +267,65 @@ async def create_pricing_functions(engine):
         logger.error(f"❌ Failed to create functions: {e}")
         raise
 
+async def create_service_area_coverage_index(engine):
+    """Add generated bounding-box columns to service areas and index them for point lookups"""
+    from sqlalchemy import text
+    from app.models.vendor import SERVICE_AREA_BBOX_COLUMNS
+    
+    # Stored generated columns keep the expression they were created with, so
+    # a changed expression is detected through a column comment and the
+    # columns (and with them the GiST index) are rebuilt
+    expressions_version = hashlib.sha1(
+        json.dumps(SERVICE_AREA_BBOX_COLUMNS, sort_keys=True).encode()
+    ).hexdigest()[:12]
+    marker = f"coverage bbox {expressions_version}"
+    
+    try:
+        async with engine.begin() as conn:
+            current_marker = (await conn.execute(text("""
+                SELECT col_description(attrelid, attnum) FROM pg_attribute
+                WHERE attrelid = 'service_areas'::regclass AND attname = 'min_latitude' AND NOT attisdropped
+            """))).scalar()
+            
+            if current_marker != marker:
+                for column_name, expression in SERVICE_AREA_BBOX_COLUMNS.items():
+                    await conn.execute(text(f"ALTER TABLE service_areas DROP COLUMN IF EXISTS {column_name}"))
+                    await conn.execute(text(
+                        f"ALTER TABLE service_areas ADD COLUMN {column_name} "
+                        f"double precision GENERATED ALWAYS AS ({expression}) STORED"
+                    ))
+                await conn.execute(text(f"COMMENT ON COLUMN service_areas.min_latitude IS '{marker}'"))
+                logger.info("✅ Rebuilt service area bounding-box columns")
+            
+            # Matches coverage_index.bbox_contains()
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_service_areas_coverage_box ON service_areas
+                USING gist (box(point(min_longitude, min_latitude), point(max_longitude, max_latitude)))
+                WHERE is_active = true
+            """))
+            
+            logger.info("✅ Created service area coverage index")
+            
+    except Exception as e:
+        logger.error(f"❌ Failed to create service area coverage index: {e}")
+        raise
+
+async def add_product_pricing_version(engine):
+    """Add the pricing tier version counter to products created before it existed"""
+    from sqlalchemy import text
+    
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "ALTER TABLE product_catalogs ADD COLUMN IF NOT EXISTS pricing_version integer NOT NULL DEFAULT 1"
+            ))
+            
+            logger.info("✅ Added product pricing version")
+            
+    except Exception as e:
+        logger.error(f"❌ Failed to add product pricing version: {e}")
+        raise
+
 async def seed_default_pricing_data(engine):
     """Seed default pricing data"""
     from sqlalchemy.ext.asyncio import AsyncSession
@@ -294,7 +355,9 @@ initialize_pricing_database = create_service_init_function(
     constraints=PRICING_SERVICE_CONSTRAINTS,
     extensions=PRICING_SERVICE_EXTENSIONS,
     enum_data=PRICING_SERVICE_ENUM_DATA,
-    custom_functions=[create_pricing_enum_types, create_pricing_functions, seed_default_pricing_data]
+    custom_functions=[create_pricing_enum_types, create_pricing_functions,
+                      create_service_area_coverage_index, add_product_pricing_version,
+                      seed_default_pricing_data]
 )
 
 async def init_pricing_database() -> bool:
@@ -81,13 +81,16 @@ class ProductCatalog(Base):
     
     # Product metadata
     product_metadata = Column(JSONB)
+    # Bumped whenever one of the product's pricing tiers is added, changed or removed
+    pricing_version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     approved_at = Column(DateTime(timezone=True))
 
     # Relationships
     vendor = relationship("Vendor", back_populates="product_catalogs")
-    pricing_tiers = relationship("PricingTier", back_populates="product")
+    # Ordered so tier positions (see tier_index) are the same in every session
+    pricing_tiers = relationship("PricingTier", back_populates="product", order_by="PricingTier.id")
 
     def __repr__(self):
         return f"<ProductCatalog(id={self.id}, product_name='{self.product_name}', vendor_id={self.vendor_id})>"
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, DECIMAL, Integer, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Text, DECIMAL, Integer, Float, ForeignKey, Computed
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 from app.core.database import Base
+from shared.database.spatial import bounding_box_sql
+
+# Bounding box of a radius service area, kept by PostgreSQL as stored
+# generated columns so every writer stays in sync. Built by the same helper
+# as the location prefilters so the box never undershoots the radius.
+SERVICE_AREA_BBOX_COLUMNS = bounding_box_sql("center_latitude", "center_longitude", "radius_km")
 
 
 class Vendor(Base):
@@ -128,6 +134,12 @@ class ServiceArea(Base):
     center_longitude = Column(DECIMAL(11, 8))
     radius_km = Column(DECIMAL(8, 2))
     
+    # Coverage bounding box (derived, indexed with GiST in db_init)
+    min_latitude = Column(Float, Computed(SERVICE_AREA_BBOX_COLUMNS["min_latitude"], persisted=True))
+    max_latitude = Column(Float, Computed(SERVICE_AREA_BBOX_COLUMNS["max_latitude"], persisted=True))
+    min_longitude = Column(Float, Computed(SERVICE_AREA_BBOX_COLUMNS["min_longitude"], persisted=True))
+    max_longitude = Column(Float, Computed(SERVICE_AREA_BBOX_COLUMNS["max_longitude"], persisted=True))
+    
     # For polygon/boundary areas
     boundary_coordinates = Column(JSONB)  # GeoJSON polygon
     
@@ -176,6 +176,43 @@ class BulkPricingResponse(BaseModel):
     search_criteria: BulkPricingRequest
 
 
+class VendorPricingSummaryRequest(BaseModel):
+    """Schema for bulk vendor pricing summary request."""
+    vendor_user_ids: List[str] = Field(..., min_length=1, max_length=500)
+    # Quantity per cylinder size; when set, each size is priced at the tier covering that quantity
+    quantities: Optional[Dict[str, int]] = None
+    is_emergency: bool = False
+
+    @validator('quantities')
+    def validate_quantities(cls, v):
+        if v is not None and any(quantity < 1 for quantity in v.values()):
+            raise ValueError('Quantities must be positive')
+        return v
+
+
+class CylinderPricingSummary(BaseModel):
+    """Schema for a vendor's best active pricing for one cylinder size."""
+    unit_price: Decimal
+    delivery_fee: Decimal
+    emergency_surcharge: Decimal
+    minimum_order_quantity: int
+    maximum_order_quantity: Optional[int] = None
+    estimated_delivery_time_hours: int = 24
+
+
+class VendorPricingSummary(BaseModel):
+    """Schema for a vendor's pricing summary keyed by cylinder size."""
+    vendor_user_id: str
+    business_name: str
+    average_rating: Optional[Decimal] = None
+    pricing: Dict[str, CylinderPricingSummary]
+
+
+class VendorPricingSummaryResponse(BaseModel):
+    """Schema for bulk vendor pricing summary response."""
+    vendors: Dict[str, VendorPricingSummary]
+
+
 class PriceAlertCreate(BaseModel):
     """Schema for creating price alert."""
     product_id: str
@@ -0,0 +1,103 @@
+"""
+Service-area coverage index.
+Radius service areas carry a generated bounding box (see
+SERVICE_AREA_BBOX_COLUMNS) with a GiST index on box(point, point), so
+"which vendors deliver to this point" is one indexed query: box containment
+prefilter, exact haversine check against the area radius and the caller's
+search radius, then the nearest covering area per vendor.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.vendor import ServiceArea
+from shared.database.spatial import haversine_distance_km
+
+
+@dataclass
+class CoverageMatch:
+    """Nearest service area of a vendor that covers a point."""
+    vendor_id: str
+    service_area_id: str
+    distance_km: float
+    delivery_fee: Optional[Decimal]
+    estimated_delivery_time_hours: Optional[int]
+    emergency_delivery_available: bool
+
+
+def bbox_contains(latitude: float, longitude: float):
+    """Predicate served by idx_service_areas_coverage_box."""
+    area_box = func.box(
+        func.point(ServiceArea.min_longitude, ServiceArea.min_latitude),
+        func.point(ServiceArea.max_longitude, ServiceArea.max_latitude)
+    )
+    return area_box.op("@>")(func.point(longitude, latitude))
+
+
+def covering_areas(
+    latitude: float,
+    longitude: float,
+    max_radius_km: float,
+    vendor_ids: Optional[Iterable] = None,
+    emergency_only: bool = False
+):
+    """
+    Subquery with one row per vendor: its nearest active area covering the point.
+
+    Columns: vendor_id, service_area_id, distance_km, delivery_fee,
+    estimated_delivery_time_hours, emergency_delivery_available. Join it on
+    vendor_id to restrict any vendor/product query to vendors serving the point.
+    """
+    distance = haversine_distance_km(ServiceArea.center_latitude, ServiceArea.center_longitude, latitude, longitude)
+
+    filters = [
+        ServiceArea.is_active == True,
+        bbox_contains(latitude, longitude),
+        distance <= ServiceArea.radius_km,
+        distance <= max_radius_km
+    ]
+    if vendor_ids is not None:
+        filters.append(ServiceArea.vendor_id.in_(list(vendor_ids)))
+    if emergency_only:
+        filters.append(ServiceArea.emergency_delivery_available == True)
+
+    return select(
+        ServiceArea.vendor_id,
+        ServiceArea.id.label("service_area_id"),
+        distance.label("distance_km"),
+        ServiceArea.delivery_fee,
+        ServiceArea.estimated_delivery_time_hours,
+        ServiceArea.emergency_delivery_available
+    ).where(and_(*filters)).distinct(
+        ServiceArea.vendor_id
+    ).order_by(
+        ServiceArea.vendor_id, distance, ServiceArea.priority_level
+    ).subquery("coverage")
+
+
+async def find_covering_vendors(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    max_radius_km: float,
+    vendor_ids: Optional[Iterable] = None,
+    emergency_only: bool = False
+) -> Dict[str, CoverageMatch]:
+    """Vendors serving a point, keyed by vendor id, with their nearest covering area."""
+    coverage = covering_areas(latitude, longitude, max_radius_km, vendor_ids, emergency_only)
+    result = await db.execute(select(coverage))
+    return {
+        str(row.vendor_id): CoverageMatch(
+            vendor_id=str(row.vendor_id),
+            service_area_id=str(row.service_area_id),
+            distance_km=float(row.distance_km),
+            delivery_fee=row.delivery_fee,
+            estimated_delivery_time_hours=row.estimated_delivery_time_hours,
+            emergency_delivery_available=bool(row.emergency_delivery_available)
+        )
+        for row in result
+    }
@@ -1,11 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, text
+from sqlalchemy import select, update, and_, or_, func, text, case
 from sqlalchemy.orm import selectinload, joinedload
 from typing import List, Optional, Dict, Any
 from decimal import Decimal
 from datetime import datetime
 import logging
 import math
+import uuid
 
 from app.models.vendor import Vendor
 from app.models.product import ProductCatalog
@@ -13,9 +14,13 @@ from app.models.pricing import PricingTier, PriceHistory
 from app.schemas.pricing import (
     PriceComparisonRequest, PriceComparisonResponse, VendorPricingOption,
     BulkPricingRequest, BulkPricingResponse, BulkPricingOption, BulkPricingItem,
-    PricingTierCreate, PricingTierUpdate, PricingTierResponse
+    PricingTierCreate, PricingTierUpdate, PricingTierResponse,
+    VendorPricingSummaryResponse, VendorPricingSummary, CylinderPricingSummary
 )
 from app.services.event_service import event_service
+from app.services.coverage_index import covering_areas
+from app.services.cache_service import pricing_cache_service, scope_tag
+from app.services.tier_index import tier_index_registry
 
 logger = logging.getLogger(__name__)
 
@@ -27,12 +32,38 @@ class PricingService:
         self.db = db
     
     async def compare_prices(self, comparison_request: PriceComparisonRequest) -> PriceComparisonResponse:
+        """Compare prices across vendors, served from the pricing cache per grid cell."""
+        cell_request = comparison_request.model_copy(
+            update=pricing_cache_service.snap_to_grid(comparison_request.latitude, comparison_request.longitude)
+        )
+        response = await pricing_cache_service.get_or_load(
+            "price_comparison",
+            cell_request,
+            lambda db: PricingService(db)._compare_prices(cell_request),
+            PriceComparisonResponse,
+            ttl=pricing_cache_service.price_comparison_ttl,
+            tags=[scope_tag(
+                product_id=comparison_request.product_id,
+                cylinder_size=comparison_request.cylinder_size,
+                product_category=comparison_request.product_category
+            )]
+        )
+        return response.model_copy(update={"search_criteria": comparison_request})
+
+    async def _compare_prices(self, comparison_request: PriceComparisonRequest) -> PriceComparisonResponse:
         """Compare prices across multiple vendors for specific products."""
         try:
+            # Only products whose vendor has a service area covering the point
+            coverage = covering_areas(
+                comparison_request.latitude, comparison_request.longitude, comparison_request.radius_km
+            )
+            
             # Build base query
-            query = select(ProductCatalog).options(
+            query = select(ProductCatalog, coverage.c.distance_km).join(
+                coverage, coverage.c.vendor_id == ProductCatalog.vendor_id
+            ).options(
                 joinedload(ProductCatalog.vendor),
-                joinedload(ProductCatalog.pricing_tiers)
+                selectinload(ProductCatalog.pricing_tiers)
             )
             
             # Apply product filters
@@ -55,19 +86,11 @@ class PricingService:
             
             # Execute query
             result = await self.db.execute(query)
-            products = result.scalars().all()
             
             # Process pricing options
             pricing_options = []
-            for product in products:
-                # Check if vendor serves the location
-                serves_location, distance = await self._check_vendor_serves_location(
-                    product.vendor, comparison_request.latitude, comparison_request.longitude,
-                    comparison_request.radius_km
-                )
-                
-                if not serves_location:
-                    continue
+            for product, distance in result.all():
+                distance = float(distance)
                 
                 # Get appropriate pricing tier
                 pricing_tier = await self._get_best_pricing_tier(
@@ -128,14 +151,34 @@ class PricingService:
             raise
     
     async def get_bulk_pricing(self, bulk_request: BulkPricingRequest) -> BulkPricingResponse:
+        """Get bulk pricing from vendors, served from the pricing cache per grid cell."""
+        cell_request = bulk_request.model_copy(
+            update=pricing_cache_service.snap_to_grid(bulk_request.latitude, bulk_request.longitude)
+        )
+        response = await pricing_cache_service.get_or_load(
+            "bulk_pricing",
+            cell_request,
+            lambda db: PricingService(db)._get_bulk_pricing(cell_request),
+            BulkPricingResponse,
+            ttl=pricing_cache_service.price_comparison_ttl,
+            tags=[scope_tag(product_id=item.get("product_id")) for item in bulk_request.items]
+        )
+        return response.model_copy(update={"search_criteria": bulk_request})
+
+    async def _get_bulk_pricing(self, bulk_request: BulkPricingRequest) -> BulkPricingResponse:
         """Get bulk pricing for multiple products from vendors."""
         try:
             # Get all products requested
             product_ids = [item.get("product_id") for item in bulk_request.items if item.get("product_id")]
             
-            query = select(ProductCatalog).options(
+            coverage = covering_areas(
+                bulk_request.latitude, bulk_request.longitude, bulk_request.radius_km
+            )
+            query = select(ProductCatalog, coverage.c.distance_km).join(
+                coverage, coverage.c.vendor_id == ProductCatalog.vendor_id
+            ).options(
                 joinedload(ProductCatalog.vendor),
-                joinedload(ProductCatalog.pricing_tiers)
+                selectinload(ProductCatalog.pricing_tiers)
             ).where(
                 and_(
                     ProductCatalog.id.in_(product_ids),
@@ -145,20 +188,11 @@ class PricingService:
             )
             
             result = await self.db.execute(query)
-            products = result.scalars().all()
             
-            # Group products by vendor
+            # Group products by vendor (only vendors serving the location are returned)
             vendor_products = {}
-            for product in products:
-                # Check if vendor serves the location
-                serves_location, distance = await self._check_vendor_serves_location(
-                    product.vendor, bulk_request.latitude, bulk_request.longitude,
-                    bulk_request.radius_km
-                )
-                
-                if not serves_location:
-                    continue
-                
+            for product, distance in result.all():
+                distance = float(distance)
                 vendor_id = str(product.vendor_id)
                 if vendor_id not in vendor_products:
                     vendor_products[vendor_id] = {
@@ -212,6 +246,117 @@ class PricingService:
             logger.error(f"Error getting bulk pricing: {e}")
             raise
 
+    async def get_vendor_pricing_summaries(
+        self,
+        vendor_user_ids: List[str],
+        quantities: Optional[Dict[str, int]] = None,
+        is_emergency: bool = False
+    ) -> VendorPricingSummaryResponse:
+        """
+        Get each vendor's pricing per cylinder size in a single query.
+
+        Without quantities the headline tier is returned for every size. With
+        quantities only the requested sizes are priced, using the tier whose
+        quantity bounds contain the requested quantity and that costs least
+        for it, as tier_index_registry.best_tier does for price comparisons.
+        """
+        try:
+            user_ids = []
+            for vendor_user_id in vendor_user_ids:
+                try:
+                    user_ids.append(uuid.UUID(str(vendor_user_id)))
+                except ValueError:
+                    continue
+            if not user_ids:
+                return VendorPricingSummaryResponse(vendors={})
+
+            now = datetime.utcnow()
+            conditions = [
+                Vendor.user_id.in_(user_ids),
+                Vendor.is_active == True,
+                ProductCatalog.is_active == True,
+                ProductCatalog.cylinder_size.isnot(None),
+                PricingTier.is_active == True,
+                PricingTier.effective_from <= now,
+                or_(
+                    PricingTier.effective_until.is_(None),
+                    PricingTier.effective_until > now
+                )
+            ]
+
+            if quantities:
+                requested = case(
+                    {size: int(quantity) for size, quantity in quantities.items()},
+                    value=ProductCatalog.cylinder_size
+                )
+                conditions += [
+                    ProductCatalog.cylinder_size.in_(list(quantities)),
+                    func.coalesce(PricingTier.minimum_quantity, 1) <= requested,
+                    or_(
+                        PricingTier.maximum_quantity.is_(None),
+                        PricingTier.maximum_quantity >= requested
+                    )
+                ]
+                fees = func.coalesce(PricingTier.delivery_fee, 0)
+                if is_emergency:
+                    fees = fees + func.coalesce(PricingTier.emergency_surcharge, 0)
+                # DISTINCT ON keeps the cheapest tier covering the quantity per (vendor, size)
+                tier_order = [PricingTier.unit_price * requested + fees, PricingTier.priority_rank]
+            else:
+                # DISTINCT ON keeps the first tier per (vendor, size): highest priority, then smallest tier, then cheapest
+                tier_order = [PricingTier.priority_rank, PricingTier.minimum_quantity, PricingTier.unit_price]
+
+            query = select(
+                Vendor.user_id,
+                Vendor.business_name,
+                Vendor.average_rating,
+                ProductCatalog.cylinder_size,
+                PricingTier.unit_price,
+                PricingTier.delivery_fee,
+                PricingTier.emergency_surcharge,
+                PricingTier.minimum_quantity,
+                PricingTier.maximum_quantity
+            ).join(
+                ProductCatalog, ProductCatalog.vendor_id == Vendor.id
+            ).join(
+                PricingTier, PricingTier.product_id == ProductCatalog.id
+            ).where(
+                and_(*conditions)
+            ).distinct(
+                Vendor.user_id, ProductCatalog.cylinder_size
+            ).order_by(
+                Vendor.user_id,
+                ProductCatalog.cylinder_size,
+                *tier_order
+            )
+
+            result = await self.db.execute(query)
+
+            vendors: Dict[str, VendorPricingSummary] = {}
+            for row in result.all():
+                vendor_user_id = str(row.user_id)
+                summary = vendors.get(vendor_user_id)
+                if summary is None:
+                    summary = vendors[vendor_user_id] = VendorPricingSummary(
+                        vendor_user_id=vendor_user_id,
+                        business_name=row.business_name,
+                        average_rating=row.average_rating,
+                        pricing={}
+                    )
+                summary.pricing[row.cylinder_size] = CylinderPricingSummary(
+                    unit_price=row.unit_price,
+                    delivery_fee=row.delivery_fee or Decimal("0.0"),
+                    emergency_surcharge=row.emergency_surcharge or Decimal("0.0"),
+                    minimum_order_quantity=row.minimum_quantity or 1,
+                    maximum_order_quantity=row.maximum_quantity
+                )
+
+            return VendorPricingSummaryResponse(vendors=vendors)
+
+        except Exception as e:
+            logger.error(f"Error getting vendor pricing summaries: {e}")
+            raise
+
     async def create_pricing_tier(self, pricing_data: PricingTierCreate, vendor_user_id: str) -> PricingTierResponse:
         """Create a new pricing tier for a product."""
         try:
@@ -262,8 +407,11 @@ class PricingService:
             )
 
             self.db.add(pricing_tier)
+            await self._bump_pricing_version(product.id)
             await self.db.commit()
             await self.db.refresh(pricing_tier)
+            tier_index_registry.invalidate(product.id)
+            await pricing_cache_service.invalidate_product_cache(product)
 
             # Publish price update event
             await event_service.publish_price_update(
@@ -344,6 +492,8 @@ class PricingService:
             if not pricing_tier:
                 raise ValueError("Pricing tier not found")
 
+            product = await self.db.get(ProductCatalog, pricing_tier.product_id)
+
             # Store old price for event
             old_price = float(pricing_tier.unit_price)
 
@@ -352,8 +502,11 @@ class PricingService:
             for field, value in update_data.items():
                 setattr(pricing_tier, field, value)
 
+            await self._bump_pricing_version(product.id)
             await self.db.commit()
             await self.db.refresh(pricing_tier)
+            tier_index_registry.invalidate(product.id)
+            await pricing_cache_service.invalidate_product_cache(product)
 
             # Publish price update event if price changed
             if "unit_price" in update_data:
@@ -382,14 +535,27 @@ class PricingService:
             if not pricing_tier:
                 raise ValueError("Pricing tier not found")
 
+            product = await self.db.get(ProductCatalog, pricing_tier.product_id)
+
             await self.db.delete(pricing_tier)
+            await self._bump_pricing_version(product.id)
             await self.db.commit()
+            tier_index_registry.invalidate(product.id)
+            await pricing_cache_service.invalidate_product_cache(product)
 
         except Exception as e:
             await self.db.rollback()
             logger.error(f"Error deleting pricing tier {pricing_id}: {e}")
             raise
 
+    async def _bump_pricing_version(self, product_id):
+        """Mark the product's tiers as changed so every replica rebuilds its tier index."""
+        await self.db.execute(
+            update(ProductCatalog).where(ProductCatalog.id == product_id).values(
+                pricing_version=ProductCatalog.pricing_version + 1
+            ).execution_options(synchronize_session=False)
+        )
+
     async def get_vendor_by_user_id(self, user_id: str) -> Optional[Vendor]:
         """Get vendor by user ID."""
         try:
@@ -400,36 +566,13 @@ class PricingService:
             logger.error(f"Error getting vendor by user ID {user_id}: {e}")
             raise
 
-    async def _check_vendor_serves_location(self, vendor: Vendor, latitude: float,
-                                          longitude: float, max_radius: float) -> tuple[bool, Optional[float]]:
-        """Check if vendor serves a specific location and return distance."""
-        # Simplified implementation - in production, check against actual service areas
-        if vendor.business_city and vendor.business_state:
-            # Use a default distance for simplicity
-            distance = 25.0  # Mock distance
-            if distance <= max_radius:
-                return True, distance
-        return False, None
-
     async def _get_best_pricing_tier(self, product: ProductCatalog, quantity: int,
                                    include_emergency: bool = False) -> Optional[PricingTier]:
-        """Get the best pricing tier for a product and quantity."""
+        """Get the best pricing tier for a product and quantity from the product's tier index."""
         if not product.pricing_tiers:
             return None
 
-        # Filter active tiers that match quantity requirements
-        suitable_tiers = []
-        for tier in product.pricing_tiers:
-            if (tier.is_active and
-                tier.minimum_quantity <= quantity and
-                (tier.maximum_quantity is None or tier.maximum_quantity >= quantity)):
-                suitable_tiers.append(tier)
-
-        if not suitable_tiers:
-            return None
-
-        # Return tier with lowest total cost
-        return min(suitable_tiers, key=lambda t: t.unit_price * quantity + t.delivery_fee)
+        return tier_index_registry.best_tier(product, quantity, include_emergency)
 
     async def _create_vendor_pricing_option(self, product: ProductCatalog, pricing_tier: PricingTier,
                                           quantity: int, distance: float) -> VendorPricingOption:
@@ -496,12 +639,14 @@ class PricingService:
             subtotal = Decimal("0.0")
             total_delivery_fee = Decimal("0.0")
 
+            products_by_id = {str(p.id): p for p in products}
+
             for item in items:
                 product_id = item.get("product_id")
                 quantity = item.get("quantity", 1)
 
                 # Find matching product
-                product = next((p for p in products if str(p.id) == product_id), None)
+                product = products_by_id.get(product_id)
                 if not product:
                     continue
 
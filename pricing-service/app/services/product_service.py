@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, text
 from sqlalchemy.orm import selectinload, joinedload
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 from decimal import Decimal
 import logging
 import math
@@ -15,6 +15,9 @@ from app.schemas.product import (
     ProductAvailabilityRequest, ProductAvailabilityResponse, ProductAvailabilityItem
 )
 from app.services.event_service import event_service
+from app.services.coverage_index import covering_areas
+from app.services.cache_service import pricing_cache_service, product_tags, scope_tag
+from app.services.tier_index import tier_index_registry
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +29,41 @@ class ProductService:
         self.db = db
     
     async def get_product_catalog(self, search_request: ProductSearchRequest) -> ProductCatalogResponse:
+        """Get product catalog, served from the pricing cache per grid cell when searching by location."""
+        cell_request = search_request
+        if search_request.latitude and search_request.longitude:
+            cell_request = search_request.model_copy(
+                update=pricing_cache_service.snap_to_grid(search_request.latitude, search_request.longitude)
+            )
+        response = await pricing_cache_service.get_or_load(
+            "catalog",
+            cell_request,
+            lambda db: ProductService(db)._get_product_catalog(cell_request),
+            ProductCatalogResponse,
+            ttl=pricing_cache_service.catalog_ttl,
+            tags=[scope_tag(
+                vendor_id=search_request.vendor_id,
+                cylinder_size=search_request.cylinder_size,
+                product_category=search_request.product_category
+            )]
+        )
+        if cell_request is search_request:
+            return response
+        filters_applied = {
+            **response.filters_applied,
+            "location": {
+                "latitude": search_request.latitude,
+                "longitude": search_request.longitude,
+                "radius_km": search_request.radius_km
+            }
+        }
+        return response.model_copy(update={"search_criteria": search_request, "filters_applied": filters_applied})
+
+    async def _get_product_catalog(self, search_request: ProductSearchRequest) -> ProductCatalogResponse:
         """Get product catalog with location-based filtering."""
         try:
             # Build base query with joins
-            query = select(ProductCatalog).options(
-                joinedload(ProductCatalog.vendor),
-                joinedload(ProductCatalog.pricing_tiers)
-            )
+            query = self._catalog_query(search_request)
             
             # Apply basic filters
             filters = [
@@ -63,29 +94,9 @@ class ProductService:
             
             query = query.where(and_(*filters))
             
-            # Execute query
+            # Execute query (already restricted to vendors serving the location, if given)
             result = await self.db.execute(query)
-            products = result.scalars().all()
-            
-            # Filter by location if coordinates provided
-            catalog_items = []
-            if search_request.latitude and search_request.longitude:
-                for product in products:
-                    # Check if vendor serves the location
-                    vendor = product.vendor
-                    serves_location, distance = await self._check_vendor_serves_location(
-                        vendor, search_request.latitude, search_request.longitude, 
-                        search_request.radius_km or 50.0
-                    )
-                    
-                    if serves_location:
-                        catalog_item = await self._product_to_catalog_item(product, distance)
-                        catalog_items.append(catalog_item)
-            else:
-                # No location filtering
-                for product in products:
-                    catalog_item = await self._product_to_catalog_item(product)
-                    catalog_items.append(catalog_item)
+            catalog_items = await self._catalog_items(result, search_request)
             
             # Apply sorting
             catalog_items = self._sort_catalog_items(catalog_items, search_request.sort_by)
@@ -128,10 +139,7 @@ class ProductService:
         """Advanced product search with text search."""
         try:
             # Build base query
-            query = select(ProductCatalog).options(
-                joinedload(ProductCatalog.vendor),
-                joinedload(ProductCatalog.pricing_tiers)
-            )
+            query = self._catalog_query(search_request)
             
             # Apply filters
             filters = [
@@ -177,25 +185,7 @@ class ProductService:
             
             # Execute and process results (same as get_product_catalog)
             result = await self.db.execute(query)
-            products = result.scalars().all()
-            
-            # Process results similar to get_product_catalog
-            catalog_items = []
-            if search_request.latitude and search_request.longitude:
-                for product in products:
-                    vendor = product.vendor
-                    serves_location, distance = await self._check_vendor_serves_location(
-                        vendor, search_request.latitude, search_request.longitude, 
-                        search_request.radius_km or 50.0
-                    )
-                    
-                    if serves_location:
-                        catalog_item = await self._product_to_catalog_item(product, distance)
-                        catalog_items.append(catalog_item)
-            else:
-                for product in products:
-                    catalog_item = await self._product_to_catalog_item(product)
-                    catalog_items.append(catalog_item)
+            catalog_items = await self._catalog_items(result, search_request)
             
             # Apply sorting and pagination
             catalog_items = self._sort_catalog_items(catalog_items, search_request.sort_by)
@@ -232,69 +222,9 @@ class ProductService:
     async def check_product_availability(self, availability_request: ProductAvailabilityRequest) -> ProductAvailabilityResponse:
         """Check real-time availability for specific products."""
         try:
-            availability_items = []
-
-            for product_id in availability_request.product_ids:
-                # Get product with vendor and pricing info
-                query = select(ProductCatalog).options(
-                    joinedload(ProductCatalog.vendor),
-                    joinedload(ProductCatalog.pricing_tiers)
-                ).where(ProductCatalog.id == product_id)
-
-                result = await self.db.execute(query)
-                product = result.scalar_one_or_none()
-
-                if not product:
-                    continue
-
-                # Check if vendor serves the location (if coordinates provided)
-                if availability_request.latitude and availability_request.longitude:
-                    serves_location, distance = await self._check_vendor_serves_location(
-                        product.vendor, availability_request.latitude, availability_request.longitude,
-                        availability_request.radius_km or 50.0
-                    )
-
-                    if not serves_location:
-                        continue
-
-                # Get availability data (simplified - in production, integrate with inventory service)
-                available_quantity = 100  # Mock data
-                reserved_quantity = 10    # Mock data
-
-                # Get pricing
-                pricing_tier = None
-                if product.pricing_tiers:
-                    # Find appropriate pricing tier for the quantity
-                    for tier in product.pricing_tiers:
-                        if (tier.is_active and
-                            tier.minimum_quantity <= availability_request.quantity and
-                            (tier.maximum_quantity is None or tier.maximum_quantity >= availability_request.quantity)):
-                            pricing_tier = tier
-                            break
-
-                if pricing_tier:
-                    unit_price = pricing_tier.unit_price
-                    delivery_fee = pricing_tier.delivery_fee
-                    total_price = (unit_price * availability_request.quantity) + delivery_fee
-                else:
-                    unit_price = product.base_price or Decimal("0.0")
-                    delivery_fee = Decimal("0.0")
-                    total_price = unit_price * availability_request.quantity
-
-                availability_item = ProductAvailabilityItem(
-                    product_id=str(product.id),
-                    vendor_id=str(product.vendor_id),
-                    vendor_name=product.vendor.business_name,
-                    available_quantity=available_quantity,
-                    reserved_quantity=reserved_quantity,
-                    is_available=available_quantity >= availability_request.quantity,
-                    estimated_delivery_hours=24,  # Mock data
-                    unit_price=unit_price,
-                    delivery_fee=delivery_fee,
-                    total_price=total_price
-                )
-
-                availability_items.append(availability_item)
+            availability_items = [
+                item async for item in self.iter_product_availability(availability_request)
+            ]
 
             return ProductAvailabilityResponse(
                 items=availability_items,
@@ -307,6 +237,60 @@ class ProductService:
             logger.error(f"Error checking product availability: {e}")
             raise
 
+    async def iter_product_availability(self, availability_request: ProductAvailabilityRequest) -> AsyncIterator[ProductAvailabilityItem]:
+        """Availability of each requested product, in request order, from a single product query."""
+        # Load all requested products at once; with coordinates, only those
+        # whose vendor has a service area covering the point
+        query = select(ProductCatalog).options(
+            joinedload(ProductCatalog.vendor),
+            selectinload(ProductCatalog.pricing_tiers)
+        ).where(ProductCatalog.id.in_(set(availability_request.product_ids)))
+
+        if availability_request.latitude and availability_request.longitude:
+            coverage = covering_areas(
+                availability_request.latitude, availability_request.longitude,
+                availability_request.radius_km or 50.0
+            )
+            query = query.join(coverage, coverage.c.vendor_id == ProductCatalog.vendor_id)
+
+        result = await self.db.execute(query)
+        products = {str(product.id): product for product in result.scalars().all()}
+        quantity = availability_request.quantity
+
+        for product_id in availability_request.product_ids:
+            product = products.get(str(product_id))
+            if not product:
+                continue
+
+            # Get availability data (simplified - in production, integrate with inventory service)
+            available_quantity = 100  # Mock data
+            reserved_quantity = 10    # Mock data
+
+            # Cheapest tier for the quantity, as in price comparison
+            pricing_tier = tier_index_registry.best_tier(product, quantity) if product.pricing_tiers else None
+
+            if pricing_tier:
+                unit_price = pricing_tier.unit_price
+                delivery_fee = pricing_tier.delivery_fee
+                total_price = (unit_price * quantity) + delivery_fee
+            else:
+                unit_price = product.base_price or Decimal("0.0")
+                delivery_fee = Decimal("0.0")
+                total_price = unit_price * quantity
+
+            yield ProductAvailabilityItem(
+                product_id=str(product.id),
+                vendor_id=str(product.vendor_id),
+                vendor_name=product.vendor.business_name,
+                available_quantity=available_quantity,
+                reserved_quantity=reserved_quantity,
+                is_available=available_quantity >= quantity,
+                estimated_delivery_hours=24,  # Mock data
+                unit_price=unit_price,
+                delivery_fee=delivery_fee,
+                total_price=total_price
+            )
+
     async def get_vendor_products(self, vendor_id: str, page: int = 1, page_size: int = 20,
                                 category: Optional[str] = None, in_stock_only: bool = True) -> ProductListResponse:
         """Get all products from a specific vendor."""
@@ -422,6 +406,7 @@ class ProductService:
             self.db.add(product)
             await self.db.commit()
             await self.db.refresh(product)
+            await pricing_cache_service.invalidate_product_cache(product)
 
             # Publish product added event
             await event_service.publish_product_added(
@@ -452,6 +437,9 @@ class ProductService:
             if not product:
                 raise ValueError("Product not found")
 
+            # Searches matching the product before the update need invalidating too
+            previous_tags = product_tags(product)
+
             # Update fields
             update_data = product_data.dict(exclude_unset=True)
             for field, value in update_data.items():
@@ -459,6 +447,7 @@ class ProductService:
 
             await self.db.commit()
             await self.db.refresh(product)
+            await pricing_cache_service.invalidate_tags(*previous_tags, *product_tags(product))
 
             return await self._product_to_response(product)
 
@@ -477,24 +466,31 @@ class ProductService:
             logger.error(f"Error getting vendor by user ID {user_id}: {e}")
             raise
 
-    async def _check_vendor_serves_location(self, vendor: Vendor, latitude: float,
-                                          longitude: float, max_radius: float) -> tuple[bool, Optional[float]]:
-        """Check if vendor serves a specific location and return distance."""
-        # This is a simplified implementation
-        # In production, you'd check against the vendor's service areas
-        min_distance = float('inf')
-        serves_location = False
-
-        # For now, assume all vendors serve within 50km of their business location
-        # In production, check against actual service areas
-        if vendor.business_city and vendor.business_state:
-            # Use a default distance for simplicity
-            distance = 25.0  # Mock distance
-            if distance <= max_radius:
-                serves_location = True
-                min_distance = distance
-
-        return serves_location, min_distance if serves_location else None
+    def _catalog_query(self, search_request: ProductSearchRequest):
+        """Catalog base query, joined to the coverage index when coordinates are given."""
+        if search_request.latitude and search_request.longitude:
+            coverage = covering_areas(
+                search_request.latitude, search_request.longitude, search_request.radius_km or 50.0
+            )
+            query = select(ProductCatalog, coverage.c.distance_km).join(
+                coverage, coverage.c.vendor_id == ProductCatalog.vendor_id
+            )
+        else:
+            query = select(ProductCatalog)
+
+        return query.options(
+            joinedload(ProductCatalog.vendor),
+            selectinload(ProductCatalog.pricing_tiers)
+        )
+
+    async def _catalog_items(self, result, search_request: ProductSearchRequest) -> List[ProductCatalogItem]:
+        """Catalog items from a _catalog_query result, with distance when searching by location."""
+        if search_request.latitude and search_request.longitude:
+            return [
+                await self._product_to_catalog_item(product, float(distance))
+                for product, distance in result.all()
+            ]
+        return [await self._product_to_catalog_item(product) for product in result.scalars().all()]
 
     async def _product_to_catalog_item(self, product: ProductCatalog, distance: Optional[float] = None) -> ProductCatalogItem:
         """Convert product to catalog item with vendor and pricing info."""
@@ -0,0 +1,132 @@
+"""
+Per-product pricing tier index for best-price selection.
+A product's active tiers are split into quantity segments at every tier
+minimum and (maximum + 1), so the tiers that apply to a quantity are found by
+bisecting the breakpoints instead of checking every tier's range. Each
+segment keeps only the tiers that are not dominated on both unit price and
+fixed fees, once for standard and once for emergency pricing (fees including
+the emergency surcharge). Indexes are cached per product and rebuilt when the
+product's pricing_version, bumped by every tier write, changes; they hold
+tier positions, not ORM objects, so lookups always return the tier instances
+loaded by the current session.
+"""
+
+import os
+from bisect import bisect_right
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.models.pricing import PricingTier
+from shared.networking.ttl_cache import TTLCache
+
+TIER_INDEX_CACHE_SIZE = int(os.getenv("TIER_INDEX_CACHE_SIZE", "5000"))
+TIER_INDEX_CACHE_TTL = int(os.getenv("TIER_INDEX_CACHE_TTL_SECONDS", "600"))
+
+ZERO = Decimal("0.0")
+
+# (unit_price, fixed fees, position in product.pricing_tiers)
+Candidate = Tuple[Decimal, Decimal, int]
+
+
+def _undominated(candidates: List[Candidate]) -> List[Candidate]:
+    """
+    Drop candidates that can never be the first cheapest one.
+
+    A candidate is dominated by an earlier one that is no worse on both unit
+    price and fees, or by a later one that is strictly better on one and no
+    worse on the other. Input order is kept, so min() still breaks ties the
+    same way as over the full tier list.
+    """
+    kept = []
+    for i, (price, fees, position) in enumerate(candidates):
+        dominated = any(
+            other_price <= price and other_fees <= fees and
+            (j < i or other_price < price or other_fees < fees)
+            for j, (other_price, other_fees, _) in enumerate(candidates) if j != i
+        )
+        if not dominated:
+            kept.append((price, fees, position))
+    return kept
+
+
+class TierIndex:
+    """Quantity-segmented best-tier lookup for one product."""
+
+    def __init__(self, tiers: Sequence[PricingTier]):
+        active = [(position, tier) for position, tier in enumerate(tiers) if tier.is_active]
+
+        breakpoints = set()
+        for _, tier in active:
+            breakpoints.add(tier.minimum_quantity or 1)
+            if tier.maximum_quantity is not None:
+                breakpoints.add(tier.maximum_quantity + 1)
+        self.breakpoints = sorted(breakpoints)
+
+        # Segment i covers quantities in [breakpoints[i], breakpoints[i + 1])
+        self.segments: List[Dict[bool, List[Candidate]]] = []
+        for start in self.breakpoints:
+            applicable = [
+                (position, tier) for position, tier in active
+                if (tier.minimum_quantity or 1) <= start and
+                (tier.maximum_quantity is None or tier.maximum_quantity >= start)
+            ]
+            self.segments.append({
+                False: _undominated([
+                    (tier.unit_price, tier.delivery_fee or ZERO, position) for position, tier in applicable
+                ]),
+                True: _undominated([
+                    (tier.unit_price, (tier.delivery_fee or ZERO) + (tier.emergency_surcharge or ZERO), position)
+                    for position, tier in applicable
+                ])
+            })
+
+    def best_position(self, quantity: int, include_emergency: bool = False) -> Optional[int]:
+        """Position of the tier with the lowest unit_price * quantity + fees for this quantity."""
+        segment = bisect_right(self.breakpoints, quantity) - 1
+        if segment < 0:
+            return None
+
+        candidates = self.segments[segment][include_emergency]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0][2]
+        return min(candidates, key=lambda c: c[0] * quantity + c[1])[2]
+
+
+class TierIndexRegistry:
+    """Cache of tier indexes per product, keyed on the product's pricing version."""
+
+    def __init__(self):
+        self.cache = TTLCache(max_size=TIER_INDEX_CACHE_SIZE, ttl=TIER_INDEX_CACHE_TTL)
+        self.builds = 0
+
+    def get_index(self, product) -> TierIndex:
+        """Index for the product's loaded tiers, rebuilt if they changed since it was cached."""
+        version = product.pricing_version
+
+        cached = self.cache.get(product.id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        index = TierIndex(product.pricing_tiers or [])
+        self.cache.set(product.id, (version, index))
+        self.builds += 1
+        return index
+
+    def best_tier(self, product, quantity: int, include_emergency: bool = False) -> Optional[PricingTier]:
+        """Cheapest applicable tier of the product for this quantity."""
+        position = self.get_index(product).best_position(quantity, include_emergency)
+        return product.pricing_tiers[position] if position is not None else None
+
+    def invalidate(self, product_id: Any):
+        """Drop a product's index after one of its tiers changed."""
+        self.cache.invalidate(product_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics."""
+        return {**self.cache.get_stats(), "builds": self.builds}
+
+
+# Global tier index registry instance
+tier_index_registry = TierIndexRegistry()
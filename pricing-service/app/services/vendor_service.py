@@ -7,11 +7,14 @@ import logging
 import math
 
 from app.models.vendor import Vendor, VendorProfile, ServiceArea
+from app.models.product import ProductCatalog
 from app.schemas.vendor import (
     VendorCreate, VendorUpdate, VendorResponse, VendorListResponse,
     VendorSearchRequest, ServiceAreaResponse
 )
 from app.services.event_service import event_service
+from app.services.cache_service import pricing_cache_service
+from app.services.coverage_index import covering_areas, find_covering_vendors
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +28,10 @@ class VendorService:
     async def search_nearby_vendors(self, search_request: VendorSearchRequest) -> VendorListResponse:
         """Search for vendors near a specific location."""
         try:
-            # Build base query
-            query = select(Vendor).options(
-                selectinload(Vendor.service_areas),
-                selectinload(Vendor.vendor_profile)
+            # Vendors with an active service area covering the point, nearest area per vendor
+            coverage = covering_areas(
+                search_request.latitude, search_request.longitude, search_request.radius_km,
+                emergency_only=bool(search_request.emergency_delivery)
             )
             
             # Apply filters
@@ -43,41 +46,39 @@ class VendorService:
             if search_request.minimum_rating:
                 filters.append(Vendor.average_rating >= search_request.minimum_rating)
             
-            query = query.where(and_(*filters))
+            # Sort by distance and paginate in SQL; the window count carries the total
+            query = select(
+                Vendor,
+                coverage.c.distance_km,
+                func.count().over().label("total_count")
+            ).join(
+                coverage, coverage.c.vendor_id == Vendor.id
+            ).where(and_(*filters)).order_by(
+                coverage.c.distance_km, Vendor.id
+            ).offset(
+                (search_request.page - 1) * search_request.page_size
+            ).limit(search_request.page_size)
             
-            # Execute query to get all vendors first
             result = await self.db.execute(query)
-            all_vendors = result.scalars().all()
+            rows = result.all()
             
-            # Filter by distance and emergency delivery
-            nearby_vendors = []
-            for vendor in all_vendors:
-                # Check if vendor serves the requested location
-                serves_location, distance = await self._check_vendor_serves_location(
-                    vendor, search_request.latitude, search_request.longitude, search_request.radius_km
+            if rows:
+                total = rows[0].total_count
+            elif search_request.page > 1:
+                # Page past the end: count separately
+                count_result = await self.db.execute(
+                    select(func.count()).select_from(Vendor).join(
+                        coverage, coverage.c.vendor_id == Vendor.id
+                    ).where(and_(*filters))
                 )
-                
-                if serves_location:
-                    # Check emergency delivery filter
-                    if search_request.emergency_delivery is not None:
-                        has_emergency = any(
-                            area.emergency_delivery_available 
-                            for area in vendor.service_areas
-                        )
-                        if search_request.emergency_delivery and not has_emergency:
-                            continue
-                    
-                    vendor_response = await self._vendor_to_response(vendor, distance)
-                    nearby_vendors.append(vendor_response)
+                total = count_result.scalar()
+            else:
+                total = 0
             
-            # Sort by distance
-            nearby_vendors.sort(key=lambda v: getattr(v, 'distance_km', float('inf')) or float('inf'))
-            
-            # Apply pagination
-            total = len(nearby_vendors)
-            start_idx = (search_request.page - 1) * search_request.page_size
-            end_idx = start_idx + search_request.page_size
-            paginated_vendors = nearby_vendors[start_idx:end_idx]
+            paginated_vendors = [
+                await self._vendor_to_response(vendor, float(distance))
+                for vendor, distance, _ in rows
+            ]
             
             total_pages = math.ceil(total / search_request.page_size)
             
@@ -238,6 +239,7 @@ class VendorService:
             
             await self.db.commit()
             await self.db.refresh(vendor)
+            await self._invalidate_vendor_cache(vendor.id)
             
             return await self._vendor_to_response(vendor)
             
@@ -246,36 +248,26 @@ class VendorService:
             logger.error(f"Error updating vendor {vendor_id}: {e}")
             raise
 
+    async def _invalidate_vendor_cache(self, vendor_id):
+        """Invalidate cached pricing for every product the vendor sells."""
+        result = await self.db.execute(
+            select(
+                ProductCatalog.id,
+                ProductCatalog.vendor_id,
+                ProductCatalog.cylinder_size,
+                ProductCatalog.product_category
+            ).where(ProductCatalog.vendor_id == vendor_id)
+        )
+        await pricing_cache_service.invalidate_vendor_cache(str(vendor_id), result.all())
+
     async def _check_vendor_serves_location(self, vendor: Vendor, latitude: float,
                                           longitude: float, max_radius: float) -> tuple[bool, Optional[float]]:
         """Check if vendor serves a specific location and return distance."""
-        min_distance = float('inf')
-        serves_location = False
-
-        for service_area in vendor.service_areas:
-            if not service_area.is_active:
-                continue
-
-            if service_area.area_type == "radius" and service_area.center_latitude and service_area.center_longitude:
-                # Calculate distance for radius-based service areas
-                distance = self._calculate_distance(
-                    latitude, longitude,
-                    float(service_area.center_latitude), float(service_area.center_longitude)
-                )
-
-                if distance <= float(service_area.radius_km) and distance <= max_radius:
-                    serves_location = True
-                    min_distance = min(min_distance, distance)
-
-            elif service_area.area_type in ["city", "state"]:
-                # For city/state areas, use vendor's business location as reference
-                if vendor.business_city and vendor.business_state:
-                    # This is a simplified check - in production, you'd use proper geocoding
-                    serves_location = True
-                    # Use a default distance for city/state areas
-                    min_distance = min(min_distance, 25.0)
-
-        return serves_location, min_distance if serves_location else None
+        coverage = await find_covering_vendors(
+            self.db, latitude, longitude, max_radius, vendor_ids=[vendor.id]
+        )
+        match = coverage.get(str(vendor.id))
+        return (True, match.distance_km) if match else (False, None)
 
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two points using Haversine formula."""
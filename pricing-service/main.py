@@ -14,6 +14,7 @@ from app.core.database import init_db, close_db, check_db_health
 from app.core.db_init import init_pricing_database
 from app.api import vendors, products, pricing
 from app.services.event_service import event_service
+from app.services.cache_service import pricing_cache_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -56,6 +57,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️ Error stopping event service: {e}")
 
+    try:
+        await pricing_cache_service.close()
+        logger.info("✅ Pricing cache closed")
+    except Exception as e:
+        logger.warning(f"⚠️ Error closing pricing cache: {e}")
+
     await close_db()
     logger.info("👋 Pricing Service shutdown completed")
 
@@ -103,7 +110,8 @@ async def health_check():
             "status": "healthy" if db_healthy else "unhealthy",
             "service": "pricing-service",
             "version": settings.VERSION,
-            "database": "connected" if db_healthy else "disconnected"
+            "database": "connected" if db_healthy else "disconnected",
+            "cache": pricing_cache_service.get_stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
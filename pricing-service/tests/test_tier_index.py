@@ -0,0 +1,85 @@
+import random
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.pricing import PricingTier
+from app.models.product import ProductCatalog  # noqa: F401 - mapper registration
+from app.models.vendor import Vendor  # noqa: F401 - mapper registration
+from app.services.tier_index import TierIndex, TierIndexRegistry
+
+
+def linear_best_position(tiers, quantity, include_emergency=False):
+    """Reference: scan every tier, first cheapest applicable one wins."""
+    best = None
+    for position, tier in enumerate(tiers):
+        if not tier.is_active:
+            continue
+        if (tier.minimum_quantity or 1) > quantity:
+            continue
+        if tier.maximum_quantity is not None and tier.maximum_quantity < quantity:
+            continue
+        fees = tier.delivery_fee or Decimal("0.0")
+        if include_emergency:
+            fees += tier.emergency_surcharge or Decimal("0.0")
+        total = tier.unit_price * quantity + fees
+        if best is None or total < best[0]:
+            best = (total, position)
+    return best[1] if best else None
+
+
+def random_tiers(rng: random.Random, count: int):
+    tiers = []
+    for _ in range(count):
+        minimum = rng.choice([None, 1, 1, 5, 10, 20, 50, rng.randint(1, 100)])
+        maximum = rng.choice([None, None, (minimum or 1) + rng.randint(0, 60)])
+        tiers.append(PricingTier(
+            id=uuid.uuid4(),
+            is_active=rng.random() > 0.15,
+            minimum_quantity=minimum,
+            maximum_quantity=maximum,
+            # Few distinct prices and fees so ties and overlaps are common
+            unit_price=Decimal(rng.choice([900, 950, 1000, 1000, 1100])),
+            delivery_fee=rng.choice([None, Decimal("0.0"), Decimal("500.0"), Decimal("1500.0")]),
+            emergency_surcharge=rng.choice([None, Decimal("0.0"), Decimal("2000.0")])
+        ))
+    return tiers
+
+
+def probe_quantities(tiers):
+    """Every tier boundary and its neighbours, plus a spread of other quantities."""
+    quantities = {0, 1, 2, 1000}
+    for tier in tiers:
+        for bound in (tier.minimum_quantity, tier.maximum_quantity):
+            if bound is not None:
+                quantities.update({bound - 1, bound, bound + 1})
+    return sorted(q for q in quantities if q >= 0)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_index_matches_linear_scan(seed):
+    rng = random.Random(seed)
+    tiers = random_tiers(rng, rng.randint(0, 12))
+    index = TierIndex(tiers)
+
+    for quantity in probe_quantities(tiers):
+        for include_emergency in (False, True):
+            assert index.best_position(quantity, include_emergency) == \
+                linear_best_position(tiers, quantity, include_emergency), (quantity, include_emergency)
+
+
+def test_registry_rebuilds_only_when_pricing_version_changes():
+    rng = random.Random(7)
+    registry = TierIndexRegistry()
+    product = SimpleNamespace(id=uuid.uuid4(), pricing_version=1, pricing_tiers=random_tiers(rng, 5))
+
+    first = registry.get_index(product)
+    assert registry.get_index(product) is first
+    assert registry.builds == 1
+
+    product.pricing_version = 2
+    product.pricing_tiers = random_tiers(rng, 3)
+    assert registry.get_index(product) is not first
+    assert registry.builds == 2
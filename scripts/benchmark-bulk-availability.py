@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Bulk Availability Benchmark
+Compares the inventory service's previous one-query-per-check availability
+loop against the single unnest(...) WITH ORDINALITY join now used by
+POST /catalog/availability/bulk-check. Runs against PostgreSQL using TEMP
+copies of inventory_locations / cylinder_stock, so nothing is left behind.
+
+Set BENCH_RTT_MS to add a simulated network round trip per query, which is
+what the per-check loop pays for in production.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+import asyncpg
+
+SIZES = ["SMALL", "MEDIUM", "LARGE", "EXTRA_LARGE"]
+
+SETUP_SQL = """
+CREATE TEMP TABLE inventory_locations (
+    id uuid PRIMARY KEY,
+    vendor_id uuid NOT NULL,
+    is_active boolean DEFAULT true
+);
+CREATE TEMP TABLE cylinder_stock (
+    id uuid PRIMARY KEY,
+    inventory_id uuid NOT NULL REFERENCES inventory_locations(id),
+    cylinder_size text NOT NULL,
+    available_quantity integer NOT NULL,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz
+);
+CREATE INDEX ON cylinder_stock(inventory_id, cylinder_size, available_quantity);
+"""
+
+SINGLE_CHECK_SQL = """
+SELECT cs.available_quantity, cs.created_at, cs.updated_at
+FROM cylinder_stock cs JOIN inventory_locations inv ON inv.id = cs.inventory_id
+WHERE inv.vendor_id = $1 AND inv.id = $2 AND cs.cylinder_size = $3 AND inv.is_active = true
+"""
+
+BULK_CHECK_SQL = """
+SELECT checks.ordinal, cs.available_quantity, cs.created_at, cs.updated_at
+FROM unnest($1::uuid[], $2::uuid[], $3::text[]) WITH ORDINALITY AS checks(vendor_id, location_id, cylinder_size, ordinal)
+JOIN inventory_locations inv
+  ON inv.id = checks.location_id AND inv.vendor_id = checks.vendor_id AND inv.is_active = true
+JOIN cylinder_stock cs
+  ON cs.inventory_id = inv.id AND cs.cylinder_size = checks.cylinder_size
+"""
+
+
+def connection_string() -> str:
+    host = os.getenv('DB_HOST', 'localhost')
+    port = os.getenv('DB_PORT', '5432')
+    user = os.getenv('DB_USER', 'user')
+    password = os.getenv('DB_PASSWORD', 'password')
+    database = os.getenv('DB_NAME', 'oxygen_platform')
+    return f"postgresql://{user}:{password}@{host}:{port}/{database}"
+
+
+async def seed(conn, locations: int, rng: random.Random):
+    await conn.execute(SETUP_SQL)
+    rows = [(uuid.UUID(int=rng.getrandbits(128)), uuid.UUID(int=rng.getrandbits(128))) for _ in range(locations)]
+    await conn.copy_records_to_table("inventory_locations", records=[(i, v, True) for i, v in rows], columns=["id", "vendor_id", "is_active"])
+    await conn.copy_records_to_table(
+        "cylinder_stock",
+        records=[
+            (uuid.uuid4(), location_id, size, rng.randint(0, 50))
+            for location_id, _ in rows
+            for size in SIZES
+        ],
+        columns=["id", "inventory_id", "cylinder_size", "available_quantity"]
+    )
+    await conn.execute("ANALYZE inventory_locations; ANALYZE cylinder_stock")
+    return rows
+
+
+async def loop_checks(conn, checks, rtt: float):
+    results = []
+    for vendor_id, location_id, size, quantity in checks:
+        if rtt:
+            await asyncio.sleep(rtt)
+        row = await conn.fetchrow(SINGLE_CHECK_SQL, vendor_id, location_id, size)
+        if row is not None:
+            results.append(row["available_quantity"] >= quantity)
+    return results
+
+
+async def bulk_checks(conn, checks, rtt: float):
+    if rtt:
+        await asyncio.sleep(rtt)
+    rows = await conn.fetch(
+        BULK_CHECK_SQL,
+        [c[0] for c in checks], [c[1] for c in checks], [c[2] for c in checks]
+    )
+    by_ordinal = {row["ordinal"]: row for row in rows}
+    return [
+        by_ordinal[i + 1]["available_quantity"] >= check[3]
+        for i, check in enumerate(checks) if i + 1 in by_ordinal
+    ]
+
+
+async def timed(func, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+async def main():
+    locations = int(os.getenv("BENCH_LOCATIONS", "20000"))
+    batch_sizes = [int(n) for n in os.getenv("BENCH_BATCH_SIZES", "10,100,500").split(",")]
+    repeat = int(os.getenv("BENCH_REPEAT", "3"))
+    rtt = float(os.getenv("BENCH_RTT_MS", "0")) / 1000
+
+    try:
+        conn = await asyncpg.connect(connection_string(), timeout=10.0)
+    except Exception as e:
+        print(f"Could not connect to PostgreSQL: {e}")
+        sys.exit(1)
+
+    try:
+        rng = random.Random(42)
+        rows = await seed(conn, locations, rng)
+        print(f"Bulk availability benchmark: {locations} locations, simulated RTT {rtt * 1000:.1f} ms\n")
+        print(f"{'checks':>7} {'loop ms':>10} {'bulk ms':>10} {'speedup':>8}")
+
+        for batch_size in batch_sizes:
+            checks = []
+            for _ in range(batch_size):
+                location_id, vendor_id = rng.choice(rows)
+                checks.append((vendor_id, location_id, rng.choice(SIZES), rng.randint(1, 20)))
+
+            loop_time, loop_results = await timed(lambda: loop_checks(conn, checks, rtt), repeat)
+            bulk_time, bulk_results = await timed(lambda: bulk_checks(conn, checks, rtt), repeat)
+            assert loop_results == bulk_results, batch_size
+
+            print(f"{batch_size:>7} {loop_time * 1000:>10.2f} {bulk_time * 1000:>10.2f} {loop_time / bulk_time:>7.1f}x")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Cylinder Selection Benchmark
+Compares the allocation service's previous selection loop (score each
+cylinder in Python, sort the whole list, slice) against the vectorized
+NumPy scoring + argpartition top-k over synthetic cylinders, and checks that
+both pick the same cylinders in the same order.
+"""
+
+import os
+import random
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+# Add inventory-service to path for the scoring helpers
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "inventory-service"))
+
+from app.models.cylinder import CylinderCondition
+from app.services.cylinder_scoring import CONDITION_SCORES, score_cylinders, top_k_indices
+
+CONDITIONS = [CylinderCondition.EXCELLENT, CylinderCondition.GOOD, CylinderCondition.FAIR]
+
+
+def make_cylinders(count: int, now: datetime, seed: int = 42):
+    """Cylinders with the attributes selection reads, spread like a real fleet."""
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            fill_level_percentage=Decimal(rng.randint(5000, 10000)) / 100,
+            condition=rng.choice(CONDITIONS),
+            manufacture_date=now - timedelta(days=rng.randint(30, 365 * 15)),
+            last_inspection_date=now - timedelta(days=rng.randint(0, 720)) if rng.random() < 0.9 else None,
+            is_emergency_ready=rng.random() < 0.7
+        )
+        for _ in range(count)
+    ]
+
+
+def legacy_score(cylinder, is_emergency: bool, now: datetime) -> float:
+    """The previous per-cylinder score."""
+    score = float(cylinder.fill_level_percentage) * 0.3
+    score += CONDITION_SCORES.get(cylinder.condition, 0)
+    days_since_manufacture = (now - cylinder.manufacture_date).days
+    score += max(0, 20 - (days_since_manufacture / 365) * 2)
+    if cylinder.last_inspection_date:
+        days_since_inspection = (now - cylinder.last_inspection_date).days
+        score += max(0, 15 - (days_since_inspection / 30))
+    if is_emergency and cylinder.is_emergency_ready:
+        score += 10
+    return score
+
+
+def legacy_select(cylinders, quantity: int, is_emergency: bool, now: datetime):
+    """Previous selection: score in a loop, full sort, slice."""
+    scored = [(cylinder, legacy_score(cylinder, is_emergency, now)) for cylinder in cylinders]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [cylinder for cylinder, score in scored[:quantity]]
+
+
+def vectorized_select(cylinders, quantity: int, is_emergency: bool, now: datetime):
+    """Vectorized scoring and argpartition top-k."""
+    scores = score_cylinders(cylinders, is_emergency, now)
+    return [cylinders[i] for i in top_k_indices(quantity, scores)]
+
+
+def main():
+    count = int(os.getenv("BENCH_CYLINDERS", "10000"))
+    repeat = int(os.getenv("BENCH_REPEAT", "20"))
+    now = datetime.now(timezone.utc)
+    cylinders = make_cylinders(count, now)
+
+    print(f"Cylinder selection benchmark: {count} candidate cylinders, best of {repeat} runs\n")
+    print(f"{'quantity':>8} {'emergency':>9} {'legacy ms':>10} {'numpy ms':>9} {'speedup':>8}  same ranking")
+
+    for quantity in (1, 10, 100, 1000):
+        for is_emergency in (False, True):
+            legacy = legacy_select(cylinders, quantity, is_emergency, now)
+            vectorized = vectorized_select(cylinders, quantity, is_emergency, now)
+            same = [c.id for c in legacy] == [c.id for c in vectorized]
+
+            legacy_ms = min(timeit.repeat(
+                lambda: legacy_select(cylinders, quantity, is_emergency, now), number=1, repeat=repeat
+            )) * 1000
+            vectorized_ms = min(timeit.repeat(
+                lambda: vectorized_select(cylinders, quantity, is_emergency, now), number=1, repeat=repeat
+            )) * 1000
+            print(
+                f"{quantity:>8} {str(is_emergency):>9} {legacy_ms:>10.2f} {vectorized_ms:>9.2f} "
+                f"{legacy_ms / vectorized_ms:>7.1f}x  {same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
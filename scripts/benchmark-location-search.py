@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Location Search Benchmark
+Compares the location service's previous full-scan distance filter against the
+bounding-box prefilter + haversine refinement + KNN limit over synthetic
+locations. The latitude-sorted array stands in for the (latitude, longitude)
+B-tree index the prefilter runs against in PostgreSQL.
+"""
+
+import bisect
+import heapq
+import math
+import os
+import random
+import sys
+import time
+
+# Add project root to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.database.spatial import bounding_box, haversine_km
+
+# Rough bounding box of Nigeria
+LAT_RANGE = (4.0, 14.0)
+LNG_RANGE = (2.7, 14.7)
+
+QUERIES = [
+    ("Lagos", 6.5244, 3.3792),
+    ("Abuja", 9.0765, 7.3986),
+    ("Kano", 12.0022, 8.5920),
+    ("Port Harcourt", 4.8156, 7.0498),
+]
+
+
+def legacy_search(rows, latitude, longitude, radius_km):
+    """The previous query: planar miles formula over every row, compared to km."""
+    results = []
+    for lat, lng, location_id in rows:
+        distance = math.sqrt(
+            (69.1 * (lat - latitude)) ** 2 +
+            (69.1 * (longitude - lng) * math.cos(lat / 57.3)) ** 2
+        )
+        if distance <= radius_km:
+            results.append((distance, location_id))
+    results.sort()
+    return results
+
+
+def indexed_search(index_lats, index_rows, latitude, longitude, radius_km, limit):
+    """Range scan on the latitude-sorted index, longitude filter, exact refinement, KNN."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    start = bisect.bisect_left(index_lats, min_lat)
+    end = bisect.bisect_right(index_lats, max_lat)
+
+    candidates = []
+    for lat, lng, location_id in index_rows[start:end]:
+        if min_lng is not None and not (min_lng <= lng <= max_lng):
+            continue
+        distance = haversine_km(latitude, longitude, lat, lng)
+        if distance <= radius_km:
+            candidates.append((distance, location_id))
+    return heapq.nsmallest(limit, candidates), end - start
+
+
+def timed(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    count = int(os.getenv("BENCH_LOCATIONS", "100000"))
+    radius_km = float(os.getenv("BENCH_RADIUS_KM", "25"))
+    limit = int(os.getenv("BENCH_LIMIT", "50"))
+    repeat = int(os.getenv("BENCH_REPEAT", "3"))
+
+    rng = random.Random(42)
+    rows = [
+        (rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE), i)
+        for i in range(count)
+    ]
+    # Cluster a share of the rows around the cities, as real data would be
+    for i in range(0, count, 4):
+        _, lat, lng = QUERIES[(i // 4) % len(QUERIES)]
+        rows[i] = (lat + rng.gauss(0, 0.3), lng + rng.gauss(0, 0.3), i)
+
+    index_rows = sorted(rows)
+    index_lats = [row[0] for row in index_rows]
+
+    print(f"Location search benchmark: {count} locations, radius {radius_km} km, limit {limit}\n")
+    print(f"{'query':<15} {'legacy ms':>10} {'indexed ms':>11} {'speedup':>8} {'rows scanned':>13} {'exact hits':>11} {'legacy hits':>12}")
+
+    total_legacy = total_indexed = 0.0
+    for name, latitude, longitude in QUERIES:
+        legacy_time, legacy_results = timed(lambda: legacy_search(rows, latitude, longitude, radius_km), repeat)
+        indexed_time, (indexed_results, scanned) = timed(
+            lambda: indexed_search(index_lats, index_rows, latitude, longitude, radius_km, limit), repeat
+        )
+        exact_hits = sum(
+            1 for lat, lng, _ in rows if haversine_km(latitude, longitude, lat, lng) <= radius_km
+        )
+
+        # The nearest results must agree with a brute-force exact search
+        brute = sorted(
+            (haversine_km(latitude, longitude, lat, lng), location_id) for lat, lng, location_id in rows
+        )[:len(indexed_results)]
+        assert [r[1] for r in brute if r[0] <= radius_km] == [r[1] for r in indexed_results], name
+
+        total_legacy += legacy_time
+        total_indexed += indexed_time
+        print(
+            f"{name:<15} {legacy_time * 1000:>10.2f} {indexed_time * 1000:>11.2f} "
+            f"{legacy_time / indexed_time:>7.1f}x {scanned:>13} {exact_hits:>11} {len(legacy_results):>12}"
+        )
+
+    print(f"\nOverall speedup: {total_legacy / total_indexed:.1f}x")
+    print("legacy hits differ from exact hits because the old formula measured miles against radius_km")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Order Creation Throughput Benchmark
+Fires concurrent direct-order writers and compares the order service's
+previous write path (insert and commit the order, refresh it, insert items
+and status history row by row and commit, then assign vendor and pricing,
+commit and refresh again) against the single transaction now used: client
+generated ids, INSERT ... RETURNING for the order and one multi-row INSERT
+each for items and status history.
+
+Reports orders/sec and round trips per order. Tables are created in a
+scratch schema that is dropped afterwards.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+SCHEMA = "order_creation_benchmark"
+SIZES = ["SMALL", "MEDIUM", "LARGE", "EXTRA_LARGE"]
+
+SETUP_SQL = f"""
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.orders (
+    id uuid PRIMARY KEY,
+    reference text UNIQUE NOT NULL,
+    hospital_id uuid NOT NULL,
+    vendor_id uuid,
+    status text NOT NULL DEFAULT 'pending',
+    is_emergency boolean DEFAULT false,
+    delivery_address text NOT NULL,
+    delivery_latitude double precision NOT NULL,
+    delivery_longitude double precision NOT NULL,
+    subtotal double precision,
+    delivery_fee double precision,
+    emergency_surcharge double precision,
+    total_amount double precision,
+    estimated_delivery_time timestamptz,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz
+);
+CREATE INDEX ON {SCHEMA}.orders(hospital_id);
+CREATE INDEX ON {SCHEMA}.orders(vendor_id);
+CREATE TABLE {SCHEMA}.order_items (
+    id uuid PRIMARY KEY,
+    order_id uuid NOT NULL REFERENCES {SCHEMA}.orders(id),
+    cylinder_size text NOT NULL,
+    quantity integer NOT NULL,
+    unit_price double precision,
+    total_price double precision,
+    created_at timestamptz DEFAULT now()
+);
+CREATE TABLE {SCHEMA}.order_status_history (
+    id uuid PRIMARY KEY,
+    order_id uuid NOT NULL REFERENCES {SCHEMA}.orders(id),
+    status text NOT NULL,
+    notes text,
+    updated_by uuid NOT NULL,
+    created_at timestamptz DEFAULT now()
+);
+"""
+
+ORDER_COLUMNS = "id, reference, hospital_id, delivery_address, delivery_latitude, delivery_longitude, is_emergency"
+
+LEGACY_INSERT_ORDER_SQL = f"""
+INSERT INTO {SCHEMA}.orders ({ORDER_COLUMNS}, subtotal, delivery_fee, emergency_surcharge, total_amount)
+VALUES ($1, $2, $3, $4, $5, $6, $7, 0, 0, 0, 0)
+"""
+
+SELECT_ORDER_SQL = f"SELECT * FROM {SCHEMA}.orders WHERE id = $1"
+
+LEGACY_INSERT_ITEM_SQL = f"""
+INSERT INTO {SCHEMA}.order_items (id, order_id, cylinder_size, quantity) VALUES ($1, $2, $3, $4)
+"""
+
+INSERT_HISTORY_SQL = f"""
+INSERT INTO {SCHEMA}.order_status_history (id, order_id, status, notes, updated_by)
+VALUES ($1, $2, 'pending', 'Order created', $3)
+"""
+
+ASSIGN_VENDOR_SQL = f"UPDATE {SCHEMA}.orders SET vendor_id = $2 WHERE id = $1"
+
+LEGACY_PRICE_SQL = f"""
+UPDATE {SCHEMA}.orders
+SET vendor_id = $2, subtotal = $3, delivery_fee = $4, emergency_surcharge = $5, total_amount = $6,
+    estimated_delivery_time = $7, updated_at = now()
+WHERE id = $1
+"""
+
+INSERT_ORDER_SQL = f"""
+INSERT INTO {SCHEMA}.orders ({ORDER_COLUMNS}, vendor_id, subtotal, delivery_fee, emergency_surcharge,
+                             total_amount, estimated_delivery_time)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+RETURNING *
+"""
+
+INSERT_ITEMS_SQL = f"""
+INSERT INTO {SCHEMA}.order_items (id, order_id, cylinder_size, quantity, unit_price, total_price)
+SELECT * FROM unnest($1::uuid[], $2::uuid[], $3::text[], $4::int[], $5::float8[], $6::float8[])
+RETURNING *
+"""
+
+INSERT_HISTORY_RETURNING_SQL = INSERT_HISTORY_SQL + "RETURNING *"
+
+
+def connection_string() -> str:
+    host = os.getenv('DB_HOST', 'localhost')
+    port = os.getenv('DB_PORT', '5432')
+    user = os.getenv('DB_USER', 'user')
+    password = os.getenv('DB_PASSWORD', 'password')
+    database = os.getenv('DB_NAME', 'oxygen_platform')
+    return f"postgresql://{user}:{password}@{host}:{port}/{database}"
+
+
+def make_order(rng: random.Random, max_lines: int):
+    lines = [
+        (size, rng.randint(1, 10), float(rng.randint(5000, 20000)))
+        for size in rng.sample(SIZES, rng.randint(1, max_lines))
+    ]
+    subtotal = sum(quantity * unit_price for _, quantity, unit_price in lines)
+    return {
+        "hospital_id": uuid.uuid4(),
+        "vendor_id": uuid.uuid4(),
+        "latitude": rng.uniform(6.4, 6.7),
+        "longitude": rng.uniform(3.2, 3.5),
+        "is_emergency": rng.random() < 0.3,
+        "lines": lines,
+        "subtotal": subtotal,
+        "delivery_fee": 1000.0,
+        "total": subtotal + 1000.0
+    }
+
+
+async def legacy_create(conn, order, reference: str) -> int:
+    """Previous behaviour: three commits and two refreshes per order. Returns round trips."""
+    order_id = uuid.uuid4()
+    await conn.execute(
+        LEGACY_INSERT_ORDER_SQL, order_id, reference, order["hospital_id"], "1 Hospital Road",
+        order["latitude"], order["longitude"], order["is_emergency"]
+    )
+    await conn.fetchrow(SELECT_ORDER_SQL, order_id)
+    round_trips = 2
+
+    async with conn.transaction():
+        for size, quantity, _ in order["lines"]:
+            await conn.execute(LEGACY_INSERT_ITEM_SQL, uuid.uuid4(), order_id, size, quantity)
+        await conn.execute(INSERT_HISTORY_SQL, uuid.uuid4(), order_id, order["hospital_id"])
+    round_trips += len(order["lines"]) + 3
+
+    # Preferred vendor assignment
+    await conn.execute(ASSIGN_VENDOR_SQL, order_id, order["vendor_id"])
+
+    await conn.execute(
+        LEGACY_PRICE_SQL, order_id, order["vendor_id"], order["subtotal"], order["delivery_fee"], 0.0,
+        order["total"], datetime.now(timezone.utc) + timedelta(hours=2)
+    )
+    await conn.fetchrow(SELECT_ORDER_SQL, order_id)
+    return round_trips + 3
+
+
+async def single_transaction_create(conn, order, reference: str) -> int:
+    """Current behaviour: one transaction, RETURNING instead of refresh. Returns round trips."""
+    order_id = uuid.uuid4()
+    lines = order["lines"]
+    async with conn.transaction():
+        await conn.fetchrow(
+            INSERT_ORDER_SQL, order_id, reference, order["hospital_id"], "1 Hospital Road",
+            order["latitude"], order["longitude"], order["is_emergency"], order["vendor_id"],
+            order["subtotal"], order["delivery_fee"], 0.0, order["total"],
+            datetime.now(timezone.utc) + timedelta(hours=2)
+        )
+        await conn.fetch(
+            INSERT_ITEMS_SQL,
+            [uuid.uuid4() for _ in lines], [order_id] * len(lines), [line[0] for line in lines],
+            [line[1] for line in lines], [line[2] for line in lines], [line[1] * line[2] for line in lines]
+        )
+        await conn.fetchrow(INSERT_HISTORY_RETURNING_SQL, uuid.uuid4(), order_id, order["hospital_id"])
+    return 5
+
+
+async def run(pool, create, orders, writers: int, name: str):
+    queue = iter(enumerate(orders))
+    round_trips = 0
+
+    async def writer():
+        nonlocal round_trips
+        for index, order in queue:
+            async with pool.acquire() as conn:
+                round_trips += await create(conn, order, f"{name}-{index}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    return time.perf_counter() - started, round_trips
+
+
+async def main():
+    writers = int(os.getenv("BENCH_WRITERS", "50"))
+    total_orders = int(os.getenv("BENCH_ORDERS", "5000"))
+    max_lines = min(int(os.getenv("BENCH_MAX_LINES", "4")), len(SIZES))
+    # Keep below the server's max_connections; extra writers queue for a connection
+    pool_size = int(os.getenv("BENCH_POOL_SIZE", "40"))
+
+    try:
+        pool = await asyncpg.create_pool(connection_string(), min_size=1, max_size=pool_size, timeout=10.0)
+    except Exception as e:
+        print(f"Could not connect to PostgreSQL: {e}")
+        sys.exit(1)
+
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute(SETUP_SQL)
+
+        rng = random.Random(42)
+        orders = [make_order(rng, max_lines) for _ in range(total_orders)]
+
+        print(
+            f"Order creation benchmark: {writers} concurrent writers, {total_orders} direct orders, "
+            f"up to {max_lines} lines per order, pool of {pool_size}\n"
+        )
+        print(f"{'strategy':<20} {'seconds':>8} {'orders/s':>9} {'round trips/order':>18}")
+
+        for name, create in (("legacy", legacy_create), ("single-transaction", single_transaction_create)):
+            elapsed, round_trips = await run(pool, create, orders, writers, name)
+            print(f"{name:<20} {elapsed:>8.2f} {total_orders / elapsed:>9.0f} {round_trips / total_orders:>18.1f}")
+    finally:
+        async with pool.acquire() as conn:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Order Listing Benchmark
+Compares the order service's previous GET /orders implementation (selecting
+every matching order id to count them in Python, then OFFSET pagination)
+against COUNT(*) plus keyset pagination on (created_at, id) now used by the
+order listing engine. Runs against PostgreSQL using a TEMP orders table with
+the listing indexes, so nothing is left behind.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import asyncpg
+
+SETUP_SQL = """
+CREATE TEMP TABLE orders (
+    id uuid PRIMARY KEY,
+    hospital_id uuid NOT NULL,
+    vendor_id uuid,
+    status text NOT NULL,
+    total_amount numeric(10, 2),
+    created_at timestamptz NOT NULL
+);
+"""
+
+# Hospital 0 gets BENCH_HOT_SHARE of all orders, the rest are spread evenly
+SEED_SQL = """
+INSERT INTO orders (id, hospital_id, vendor_id, status, total_amount, created_at)
+SELECT
+    gen_random_uuid(),
+    CASE WHEN random() < $2 THEN '00000000-0000-0000-0000-000000000000'::uuid
+         ELSE md5('hospital' || (n % $3))::uuid END,
+    md5('vendor' || (n % 500))::uuid,
+    (ARRAY['pending', 'confirmed', 'in_transit', 'delivered', 'cancelled'])[1 + n % 5],
+    (random() * 100000)::numeric(10, 2),
+    now() - (n || ' seconds')::interval
+FROM generate_series(1, $1) AS n
+"""
+
+INDEX_SQL = """
+CREATE INDEX ON orders(hospital_id, created_at DESC, id DESC);
+CREATE INDEX ON orders(hospital_id, status, created_at DESC, id DESC);
+ANALYZE orders;
+"""
+
+HOT_HOSPITAL = "00000000-0000-0000-0000-000000000000"
+
+# Previous shape: every matching id, counted with len()
+ALL_IDS_SQL = "SELECT id FROM orders WHERE hospital_id = $1"
+
+OFFSET_PAGE_SQL = """
+SELECT * FROM orders WHERE hospital_id = $1
+ORDER BY created_at DESC LIMIT $2 OFFSET $3
+"""
+
+COUNT_SQL = "SELECT count(*) FROM orders WHERE hospital_id = $1"
+
+FIRST_PAGE_SQL = """
+SELECT * FROM orders WHERE hospital_id = $1
+ORDER BY created_at DESC, id DESC LIMIT $2
+"""
+
+KEYSET_PAGE_SQL = """
+SELECT * FROM orders WHERE hospital_id = $1 AND (created_at, id) < ($2, $3)
+ORDER BY created_at DESC, id DESC LIMIT $4
+"""
+
+# Boundary row of the page before the target, which a client holds as its cursor
+CURSOR_SQL = """
+SELECT created_at, id FROM orders WHERE hospital_id = $1
+ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET $2
+"""
+
+
+def connection_string() -> str:
+    host = os.getenv('DB_HOST', 'localhost')
+    port = os.getenv('DB_PORT', '5432')
+    user = os.getenv('DB_USER', 'user')
+    password = os.getenv('DB_PASSWORD', 'password')
+    database = os.getenv('DB_NAME', 'oxygen_platform')
+    return f"postgresql://{user}:{password}@{host}:{port}/{database}"
+
+
+async def previous_listing(conn, hospital_id, page: int, size: int):
+    total = len(await conn.fetch(ALL_IDS_SQL, hospital_id))
+    rows = await conn.fetch(OFFSET_PAGE_SQL, hospital_id, size, (page - 1) * size)
+    return total, [row["id"] for row in rows]
+
+
+async def keyset_listing(conn, hospital_id, cursor, size: int):
+    total = await conn.fetchval(COUNT_SQL, hospital_id)
+    if cursor is None:
+        rows = await conn.fetch(FIRST_PAGE_SQL, hospital_id, size)
+    else:
+        rows = await conn.fetch(KEYSET_PAGE_SQL, hospital_id, cursor[0], cursor[1], size)
+    return total, [row["id"] for row in rows]
+
+
+async def timed(func, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+async def main():
+    orders = int(os.getenv("BENCH_ORDERS", "1000000"))
+    hospitals = int(os.getenv("BENCH_HOSPITALS", "1000"))
+    hot_share = float(os.getenv("BENCH_HOT_SHARE", "0.2"))
+    pages = [int(n) for n in os.getenv("BENCH_PAGES", "1,100,1000").split(",")]
+    size = int(os.getenv("BENCH_PAGE_SIZE", "20"))
+    repeat = int(os.getenv("BENCH_REPEAT", "5"))
+
+    try:
+        conn = await asyncpg.connect(connection_string(), timeout=10.0)
+    except Exception as e:
+        print(f"Could not connect to PostgreSQL: {e}")
+        sys.exit(1)
+
+    try:
+        await conn.execute(SETUP_SQL)
+        await conn.execute(SEED_SQL, orders, hot_share, hospitals)
+        await conn.execute(INDEX_SQL)
+
+        hot_orders = await conn.fetchval(COUNT_SQL, HOT_HOSPITAL)
+        print(
+            f"Order listing benchmark: {orders} orders, {hot_orders} for the listed hospital, "
+            f"page size {size}, best of {repeat}\n"
+        )
+        print(f"{'page':>6} {'previous ms':>12} {'keyset ms':>10} {'speedup':>8}")
+
+        for page in pages:
+            if (page - 1) * size >= hot_orders:
+                continue
+            cursor = None
+            if page > 1:
+                boundary = await conn.fetchrow(CURSOR_SQL, HOT_HOSPITAL, (page - 1) * size - 1)
+                cursor = (boundary["created_at"], boundary["id"])
+
+            previous_time, previous_result = await timed(
+                lambda: previous_listing(conn, HOT_HOSPITAL, page, size), repeat
+            )
+            keyset_time, keyset_result = await timed(
+                lambda: keyset_listing(conn, HOT_HOSPITAL, cursor, size), repeat
+            )
+            assert previous_result == keyset_result, page
+
+            print(
+                f"{page:>6} {previous_time * 1000:>12.2f} {keyset_time * 1000:>10.2f} "
+                f"{previous_time / keyset_time:>7.1f}x"
+            )
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
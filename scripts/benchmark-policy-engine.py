@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Policy Engine Micro-Benchmark
+Compares the compiled RBAC / rate-limit trie against the linear table scans
+previously used by the API gateway and the shared rate limiter
+"""
+
+import os
+import sys
+import timeit
+
+# Add project root to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.security.policy_engine import PolicyEngine
+
+ROLE_PERMISSIONS = {
+    "admin": {
+        "allowed_services": ["*"],
+        "allowed_methods": ["*"]
+    },
+    "hospital": {
+        "allowed_services": ["user", "order", "pricing", "review", "notification", "inventory", "location", "payment"],
+        "allowed_methods": ["GET", "POST", "PUT", "PATCH"],
+        "restricted_endpoints": ["/admin/"]
+    },
+    "vendor": {
+        "allowed_services": ["user", "inventory", "order", "pricing", "review", "notification", "location"],
+        "allowed_methods": ["GET", "POST", "PUT", "PATCH"],
+        "restricted_endpoints": ["/admin/", "/payment/admin/"]
+    }
+}
+
+ENDPOINT_LIMITS = {
+    "/auth/login": 5,
+    "/auth/register": 3,
+    "/orders/direct": 10,
+    "/orders/pricing": 20,
+    "/inventory/reservations": 15,
+    "/vendors/*/availability": 30,
+    "/catalog/nearby": 50,
+}
+
+ROLE_LIMITS = {"HOSPITAL": 200, "VENDOR": 150, "ADMIN": 500, "SERVICE": 1000}
+
+REQUESTS = [
+    ("hospital", "order", "GET", "/orders/7c9e6679-7425-40de-944b-e07fc1f90ae7"),
+    ("vendor", "inventory", "POST", "/inventory/reservations"),
+    ("vendor", "payment", "GET", "/payment/admin/settlements"),
+    ("hospital", "pricing", "GET", "/api/v1/vendors/3f1c2a/availability"),
+    ("admin", "admin", "DELETE", "/admin/users/42"),
+    ("hospital", "inventory", "GET", "/catalog/nearby"),
+]
+
+
+def legacy_check_role_permissions(user_role, service, method, path):
+    """The gateway's previous linear implementation."""
+    permissions = ROLE_PERMISSIONS.get(user_role)
+    if not permissions:
+        return False
+    if user_role == "admin":
+        return True
+    allowed_services = permissions.get("allowed_services", [])
+    if "*" not in allowed_services and service not in allowed_services:
+        return False
+    allowed_methods = permissions.get("allowed_methods", [])
+    if "*" not in allowed_methods and method not in allowed_methods:
+        return False
+    for restricted in permissions.get("restricted_endpoints", []):
+        if path.startswith(restricted):
+            return False
+    return True
+
+
+def legacy_get_rate_limit(endpoint, user_role=None):
+    """The shared rate limiter's previous substring scan."""
+    for pattern, limit in ENDPOINT_LIMITS.items():
+        if pattern.replace("*", "") in endpoint:
+            return limit
+    if user_role and user_role in ROLE_LIMITS:
+        return ROLE_LIMITS[user_role]
+    return 100
+
+
+def bench(label, func, number):
+    """Time func over every sample request and print ns per lookup."""
+    def run():
+        for role, service, method, path in REQUESTS:
+            func(role, service, method, path)
+
+    total = min(timeit.repeat(run, number=number, repeat=5))
+    per_lookup_ns = total / (number * len(REQUESTS)) * 1e9
+    print(f"{label:<40} {per_lookup_ns:>10.0f} ns/lookup")
+    return per_lookup_ns
+
+
+def main():
+    number = int(os.getenv("BENCH_ITERATIONS", "50000"))
+    engine = PolicyEngine(ROLE_PERMISSIONS, ENDPOINT_LIMITS, ROLE_LIMITS, 100)
+
+    print(f"Policy engine benchmark ({number} iterations x {len(REQUESTS)} requests)\n")
+
+    bench("legacy check_role_permissions", legacy_check_role_permissions, number)
+    trie_rbac = bench("PolicyEngine.is_allowed", engine.is_allowed, number)
+
+    bench("legacy get_rate_limit", lambda r, s, m, p: legacy_get_rate_limit(p, r), number)
+    trie_limit = bench("PolicyEngine.get_rate_limit", lambda r, s, m, p: engine.get_rate_limit(p, r, m), number)
+
+    decision = bench("PolicyEngine.evaluate (access + limit)", engine.evaluate, number)
+
+    print()
+    for label, value in [("is_allowed", trie_rbac), ("get_rate_limit", trie_limit), ("evaluate", decision)]:
+        print(f"{label:<16} {'sub-microsecond' if value < 1000 else 'ABOVE 1us'} ({value:.0f} ns)")
+
+
+if __name__ == "__main__":
+    main()
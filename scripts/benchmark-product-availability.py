@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Product Availability Benchmark
+Compares the pricing service's previous availability lookup (one product
+query per requested ID, with vendor and pricing tiers joined in, so each
+product comes back once per tier) against the single IN query plus one
+selectin query for tiers now used by POST /products/availability/check.
+Runs against PostgreSQL using TEMP copies of vendors / product_catalogs /
+pricing_tiers, so nothing is left behind.
+
+Set BENCH_RTT_MS to add a simulated network round trip per query, which is
+what the per-product loop pays for in production.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+import asyncpg
+
+SETUP_SQL = """
+CREATE TEMP TABLE vendors (
+    id uuid PRIMARY KEY,
+    business_name text NOT NULL
+);
+CREATE TEMP TABLE product_catalogs (
+    id uuid PRIMARY KEY,
+    vendor_id uuid NOT NULL REFERENCES vendors(id),
+    product_name text NOT NULL,
+    base_price numeric(10, 2)
+);
+CREATE TEMP TABLE pricing_tiers (
+    id uuid PRIMARY KEY,
+    product_id uuid NOT NULL REFERENCES product_catalogs(id),
+    unit_price numeric(10, 2) NOT NULL,
+    delivery_fee numeric(10, 2) DEFAULT 0,
+    minimum_quantity integer DEFAULT 1,
+    maximum_quantity integer,
+    is_active boolean DEFAULT true
+);
+CREATE INDEX ON product_catalogs(vendor_id);
+CREATE INDEX ON pricing_tiers(product_id);
+"""
+
+# Previous shape: joinedload(vendor) + joinedload(pricing_tiers), once per ID
+SINGLE_PRODUCT_SQL = """
+SELECT p.id, p.product_name, p.base_price, v.business_name,
+       t.id AS tier_id, t.unit_price, t.delivery_fee, t.minimum_quantity, t.maximum_quantity, t.is_active
+FROM product_catalogs p
+JOIN vendors v ON v.id = p.vendor_id
+LEFT JOIN pricing_tiers t ON t.product_id = p.id
+WHERE p.id = $1
+"""
+
+# Current shape: one IN query with the vendor joined, then selectinload(pricing_tiers)
+PRODUCTS_SQL = """
+SELECT p.id, p.product_name, p.base_price, v.business_name
+FROM product_catalogs p
+JOIN vendors v ON v.id = p.vendor_id
+WHERE p.id = ANY($1::uuid[])
+"""
+
+TIERS_SQL = """
+SELECT t.product_id, t.id AS tier_id, t.unit_price, t.delivery_fee, t.minimum_quantity, t.maximum_quantity, t.is_active
+FROM pricing_tiers t
+WHERE t.product_id = ANY($1::uuid[])
+"""
+
+
+def connection_string() -> str:
+    host = os.getenv('DB_HOST', 'localhost')
+    port = os.getenv('DB_PORT', '5432')
+    user = os.getenv('DB_USER', 'user')
+    password = os.getenv('DB_PASSWORD', 'password')
+    database = os.getenv('DB_NAME', 'oxygen_platform')
+    return f"postgresql://{user}:{password}@{host}:{port}/{database}"
+
+
+async def seed(conn, vendors: int, products_per_vendor: int, rng: random.Random):
+    await conn.execute(SETUP_SQL)
+    vendor_ids = [uuid.uuid4() for _ in range(vendors)]
+    await conn.copy_records_to_table(
+        "vendors", records=[(v, f"Vendor {i}") for i, v in enumerate(vendor_ids)], columns=["id", "business_name"]
+    )
+
+    products = [
+        (uuid.uuid4(), vendor_id, f"Cylinder {i}", rng.randint(5000, 20000))
+        for vendor_id in vendor_ids
+        for i in range(products_per_vendor)
+    ]
+    await conn.copy_records_to_table(
+        "product_catalogs", records=products, columns=["id", "vendor_id", "product_name", "base_price"]
+    )
+
+    tiers = []
+    for product_id, _, _, base_price in products:
+        minimum = 1
+        for _ in range(rng.randint(1, 6)):
+            maximum = minimum + rng.randint(5, 50)
+            tiers.append((uuid.uuid4(), product_id, base_price - rng.randint(0, 2000), rng.choice([0, 500, 1000]), minimum, maximum, True))
+            minimum = maximum + 1
+    await conn.copy_records_to_table(
+        "pricing_tiers", records=tiers,
+        columns=["id", "product_id", "unit_price", "delivery_fee", "minimum_quantity", "maximum_quantity", "is_active"]
+    )
+    await conn.execute("ANALYZE vendors; ANALYZE product_catalogs; ANALYZE pricing_tiers")
+    return [product[0] for product in products]
+
+
+def cheapest(tiers, quantity: int):
+    """Cheapest active tier for the quantity, or None."""
+    suitable = [
+        t for t in tiers
+        if t["is_active"] and t["minimum_quantity"] <= quantity and
+        (t["maximum_quantity"] is None or t["maximum_quantity"] >= quantity)
+    ]
+    return min(suitable, key=lambda t: (t["unit_price"] * quantity + t["delivery_fee"], t["tier_id"])) if suitable else None
+
+
+def quote(product_id, tiers, quantity: int):
+    tier = cheapest(tiers, quantity)
+    return (product_id, tier["tier_id"] if tier else None)
+
+
+async def loop_lookup(conn, product_ids, quantity: int, rtt: float):
+    results = []
+    for product_id in product_ids:
+        if rtt:
+            await asyncio.sleep(rtt)
+        rows = await conn.fetch(SINGLE_PRODUCT_SQL, product_id)
+        if rows:
+            tiers = [row for row in rows if row["tier_id"] is not None]
+            results.append(quote(product_id, tiers, quantity))
+    return results
+
+
+async def batched_lookup(conn, product_ids, quantity: int, rtt: float):
+    if rtt:
+        await asyncio.sleep(rtt)
+    products = {row["id"]: row for row in await conn.fetch(PRODUCTS_SQL, list(set(product_ids)))}
+
+    if rtt:
+        await asyncio.sleep(rtt)
+    tiers_by_product = {}
+    for row in await conn.fetch(TIERS_SQL, list(products)):
+        tiers_by_product.setdefault(row["product_id"], []).append(row)
+
+    return [
+        quote(product_id, tiers_by_product.get(product_id, []), quantity)
+        for product_id in product_ids if product_id in products
+    ]
+
+
+async def timed(func, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+async def main():
+    vendors = int(os.getenv("BENCH_VENDORS", "500"))
+    products_per_vendor = int(os.getenv("BENCH_PRODUCTS_PER_VENDOR", "20"))
+    basket_sizes = [int(n) for n in os.getenv("BENCH_BASKET_SIZES", "1,30,300").split(",")]
+    repeat = int(os.getenv("BENCH_REPEAT", "5"))
+    rtt = float(os.getenv("BENCH_RTT_MS", "0")) / 1000
+
+    try:
+        conn = await asyncpg.connect(connection_string(), timeout=10.0)
+    except Exception as e:
+        print(f"Could not connect to PostgreSQL: {e}")
+        sys.exit(1)
+
+    try:
+        rng = random.Random(42)
+        product_ids = await seed(conn, vendors, products_per_vendor, rng)
+        print(
+            f"Product availability benchmark: {len(product_ids)} products, "
+            f"simulated RTT {rtt * 1000:.1f} ms, best of {repeat}\n"
+        )
+        print(f"{'products':>8} {'queries':>13} {'loop ms':>10} {'batched ms':>11} {'speedup':>8}")
+
+        for basket_size in basket_sizes:
+            basket = rng.sample(product_ids, basket_size)
+            quantity = rng.randint(1, 40)
+
+            loop_time, loop_results = await timed(lambda: loop_lookup(conn, basket, quantity, rtt), repeat)
+            batched_time, batched_results = await timed(lambda: batched_lookup(conn, basket, quantity, rtt), repeat)
+            assert loop_results == batched_results, basket_size
+
+            print(
+                f"{basket_size:>8} {f'{basket_size} vs 2':>13} {loop_time * 1000:>10.2f} "
+                f"{batched_time * 1000:>11.2f} {loop_time / batched_time:>7.1f}x"
+            )
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
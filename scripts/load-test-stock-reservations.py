@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Stock Reservation Load Test
+Fires concurrent reservers at a handful of hot SKUs and compares the
+previous read-modify-write reservation (SELECT, decrement in Python, UPDATE)
+against the reservation engine's single conditional
+UPDATE ... FROM unnest(...) WHERE available_quantity >= quantity RETURNING,
+followed by bulk reservation and movement inserts.
+
+Reports throughput, successful reservations and oversold units. Tables are
+created in a scratch schema that is dropped afterwards.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+import asyncpg
+
+SCHEMA = "reservation_load_test"
+SIZES = ["SMALL", "MEDIUM", "LARGE", "EXTRA_LARGE"]
+
+SETUP_SQL = f"""
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.cylinder_stock (
+    id uuid PRIMARY KEY,
+    inventory_id uuid NOT NULL,
+    cylinder_size text NOT NULL,
+    available_quantity integer NOT NULL,
+    reserved_quantity integer NOT NULL DEFAULT 0,
+    updated_at timestamptz
+);
+CREATE INDEX ON {SCHEMA}.cylinder_stock(inventory_id, cylinder_size, available_quantity);
+CREATE TABLE {SCHEMA}.stock_reservations (
+    id uuid PRIMARY KEY,
+    stock_id uuid NOT NULL,
+    order_id uuid NOT NULL,
+    quantity integer NOT NULL,
+    expires_at timestamptz NOT NULL
+);
+CREATE TABLE {SCHEMA}.stock_movements (
+    id uuid PRIMARY KEY,
+    stock_id uuid NOT NULL,
+    movement_type text NOT NULL,
+    quantity integer NOT NULL,
+    previous_quantity integer NOT NULL,
+    new_quantity integer NOT NULL,
+    order_id uuid
+);
+"""
+
+LEGACY_SELECT_SQL = f"""
+SELECT id, available_quantity FROM {SCHEMA}.cylinder_stock
+WHERE inventory_id = $1 AND cylinder_size = $2
+"""
+
+LEGACY_UPDATE_SQL = f"""
+UPDATE {SCHEMA}.cylinder_stock SET available_quantity = $2, reserved_quantity = reserved_quantity + $3
+WHERE id = $1
+"""
+
+ENGINE_RESERVE_SQL = f"""
+UPDATE {SCHEMA}.cylinder_stock
+SET available_quantity = cylinder_stock.available_quantity - locked.quantity,
+    reserved_quantity = cylinder_stock.reserved_quantity + locked.quantity,
+    updated_at = now()
+FROM (
+    SELECT cs.id AS stock_id, requested.quantity
+    FROM unnest($1::uuid[], $2::text[], $3::int[]) AS requested(inventory_id, cylinder_size, quantity)
+    JOIN {SCHEMA}.cylinder_stock cs
+      ON cs.inventory_id = requested.inventory_id AND cs.cylinder_size = requested.cylinder_size
+    ORDER BY cs.id
+    FOR UPDATE OF cs
+) AS locked
+WHERE cylinder_stock.id = locked.stock_id AND cylinder_stock.available_quantity >= locked.quantity
+RETURNING cylinder_stock.id, cylinder_stock.available_quantity, locked.quantity
+"""
+
+
+def connection_string() -> str:
+    host = os.getenv('DB_HOST', 'localhost')
+    port = os.getenv('DB_PORT', '5432')
+    user = os.getenv('DB_USER', 'user')
+    password = os.getenv('DB_PASSWORD', 'password')
+    database = os.getenv('DB_NAME', 'oxygen_platform')
+    return f"postgresql://{user}:{password}@{host}:{port}/{database}"
+
+
+async def reset_stock(pool, skus, initial_quantity: int):
+    async with pool.acquire() as conn:
+        await conn.execute(f"TRUNCATE {SCHEMA}.cylinder_stock, {SCHEMA}.stock_reservations, {SCHEMA}.stock_movements")
+        await conn.executemany(
+            f"INSERT INTO {SCHEMA}.cylinder_stock (id, inventory_id, cylinder_size, available_quantity) VALUES ($1, $2, $3, $4)",
+            [(uuid.uuid4(), inventory_id, size, initial_quantity) for inventory_id, size in skus]
+        )
+
+
+async def legacy_reserve(conn, lines, order_id) -> bool:
+    """Previous behaviour: read, check and decrement in Python, one line at a time."""
+    async with conn.transaction():
+        for inventory_id, size, quantity in lines:
+            stock = await conn.fetchrow(LEGACY_SELECT_SQL, inventory_id, size)
+            if stock is None or stock["available_quantity"] < quantity:
+                return False
+            new_available = stock["available_quantity"] - quantity
+            await conn.execute(LEGACY_UPDATE_SQL, stock["id"], new_available, quantity)
+            await conn.execute(
+                f"INSERT INTO {SCHEMA}.stock_reservations VALUES ($1, $2, $3, $4, now() + interval '24 hours')",
+                uuid.uuid4(), stock["id"], order_id, quantity
+            )
+            await conn.execute(
+                f"INSERT INTO {SCHEMA}.stock_movements VALUES ($1, $2, 'reserved', $3, $4, $5, $6)",
+                uuid.uuid4(), stock["id"], quantity, stock["available_quantity"], new_available, order_id
+            )
+    return True
+
+
+async def engine_reserve(conn, lines, order_id) -> bool:
+    """Reservation engine: one conditional UPDATE for all lines, bulk inserts."""
+    tx = conn.transaction()
+    await tx.start()
+    try:
+        rows = await conn.fetch(
+            ENGINE_RESERVE_SQL,
+            [line[0] for line in lines], [line[1] for line in lines], [line[2] for line in lines]
+        )
+        if len(rows) < len(lines):
+            await tx.rollback()
+            return False
+        await conn.executemany(
+            f"INSERT INTO {SCHEMA}.stock_reservations VALUES ($1, $2, $3, $4, now() + interval '24 hours')",
+            [(uuid.uuid4(), row["id"], order_id, row["quantity"]) for row in rows]
+        )
+        await conn.executemany(
+            f"INSERT INTO {SCHEMA}.stock_movements VALUES ($1, $2, 'reserved', $3, $4, $5, $6)",
+            [
+                (uuid.uuid4(), row["id"], row["quantity"], row["available_quantity"] + row["quantity"], row["available_quantity"], order_id)
+                for row in rows
+            ]
+        )
+        await tx.commit()
+        return True
+    except Exception:
+        await tx.rollback()
+        raise
+
+
+async def run(pool, reserve, skus, reservers: int, attempts: int, max_lines: int, seed: int):
+    rng = random.Random(seed)
+    requests = [
+        [(inventory_id, size, rng.randint(1, 3)) for inventory_id, size in sorted(rng.sample(skus, rng.randint(1, max_lines)))]
+        for _ in range(reservers * attempts)
+    ]
+    queue = iter(requests)
+    successes = failures = errors = 0
+
+    async def reserver():
+        nonlocal successes, failures, errors
+        for lines in queue:
+            try:
+                async with pool.acquire() as conn:
+                    if await reserve(conn, lines, uuid.uuid4()):
+                        successes += 1
+                    else:
+                        failures += 1
+            except (asyncpg.DeadlockDetectedError, asyncpg.SerializationError):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(reserver() for _ in range(reservers)))
+    elapsed = time.perf_counter() - started
+
+    async with pool.acquire() as conn:
+        totals = await conn.fetchrow(
+            f"SELECT sum(available_quantity) AS available, sum(reserved_quantity) AS reserved FROM {SCHEMA}.cylinder_stock"
+        )
+        reserved_units = await conn.fetchval(f"SELECT coalesce(sum(quantity), 0) FROM {SCHEMA}.stock_reservations")
+    return elapsed, successes, failures, errors, totals, reserved_units
+
+
+async def main():
+    reservers = int(os.getenv("BENCH_RESERVERS", "200"))
+    attempts = int(os.getenv("BENCH_ATTEMPTS_PER_RESERVER", "10"))
+    hot_skus = int(os.getenv("BENCH_HOT_SKUS", "4"))
+    max_lines = int(os.getenv("BENCH_MAX_LINES", "2"))
+    initial_quantity = int(os.getenv("BENCH_INITIAL_QUANTITY", "1000"))
+    # Keep below the server's max_connections; extra reservers queue for a connection
+    pool_size = int(os.getenv("BENCH_POOL_SIZE", "80"))
+
+    try:
+        pool = await asyncpg.create_pool(connection_string(), min_size=1, max_size=pool_size, timeout=10.0)
+    except Exception as e:
+        print(f"Could not connect to PostgreSQL: {e}")
+        sys.exit(1)
+
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute(SETUP_SQL)
+
+        locations = [uuid.uuid4() for _ in range(max(1, hot_skus // len(SIZES) + 1))]
+        skus = [(location, size) for location in locations for size in SIZES][:hot_skus]
+        max_lines = min(max_lines, len(skus))
+        initial_units = initial_quantity * len(skus)
+
+        print(
+            f"Stock reservation load test: {reservers} concurrent reservers x {attempts} orders, "
+            f"{len(skus)} hot SKUs with {initial_quantity} units each, up to {max_lines} lines per order\n"
+        )
+        print(f"{'strategy':<10} {'seconds':>8} {'orders/s':>9} {'reserved':>9} {'rejected':>9} {'errors':>7} {'oversold units':>15}")
+
+        for name, reserve in (("legacy", legacy_reserve), ("engine", engine_reserve)):
+            await reset_stock(pool, skus, initial_quantity)
+            elapsed, successes, failures, errors, totals, reserved_units = await run(
+                pool, reserve, skus, reservers, attempts, max_lines, seed=42
+            )
+            # Units handed out beyond what the stock actually lost (lost updates)
+            oversold = max(0, reserved_units - (initial_units - totals["available"]))
+            print(
+                f"{name:<10} {elapsed:>8.2f} {(successes + failures) / elapsed:>9.0f} {successes:>9} "
+                f"{failures:>9} {errors:>7} {oversold:>15}"
+            )
+    finally:
+        async with pool.acquire() as conn:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Shared Geospatial Search Helpers
+Bounding-box prefilter on indexed latitude/longitude, exact haversine
+refinement in kilometres, and KNN ordering. Services that install PostGIS
+(see location-service db_init) set postgis_available to use geography with a
+GiST index instead.
+"""
+
+import math
+from typing import Dict, Tuple, Optional
+
+from sqlalchemy import func, and_, literal, ColumnElement
+
+EARTH_RADIUS_KM = 6371.0088
+# Degrees of arc per km on the haversine sphere, widened by 1% so prefilter
+# boxes also enclose PostGIS spheroid distances (~110.57 km/deg at the equator)
+BBOX_MARGIN = 1.01
+DEGREES_PER_KM = math.degrees(1 / EARTH_RADIUS_KM) * BBOX_MARGIN
+
+# Set by a service's db_init once PostGIS and its geography indexes are confirmed
+postgis_available = False
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, Optional[float], Optional[float]]:
+    """Lat/lng box enclosing a radius.
+
+    Returns ``(min_lat, max_lat, min_lng, max_lng)``; the longitude bounds are
+    None when the box reaches a pole or crosses the antimeridian, in which
+    case only latitude can be prefiltered. The box never undershoots the
+    radius: longitude is widened using the latitude farthest from the
+    equator, where a degree of longitude is shortest.
+    """
+    d_lat = radius_km * DEGREES_PER_KM
+    min_lat, max_lat = latitude - d_lat, latitude + d_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+
+    d_lng = d_lat / math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    min_lng, max_lng = longitude - d_lng, longitude + d_lng
+    if min_lng < -180 or max_lng > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def bounding_box_sql(latitude: str, longitude: str, radius_km: str) -> Dict[str, str]:
+    """SQL expressions for bounding_box() over columns, e.g. for generated columns.
+
+    Keys are min_latitude, max_latitude, min_longitude and max_longitude.
+    Where bounding_box() would return no longitude bounds (pole or
+    antimeridian) the longitude range is widened to [-180, 180].
+    """
+    d_lat = f"({radius_km} * {DEGREES_PER_KM!r})"
+    poleward = f"(abs({latitude}) + {d_lat})"
+    d_lng = f"({d_lat} / cos(radians(least({poleward}, 89.0))))"
+    unbounded = f"{poleward} >= 90 OR {longitude} - {d_lng} < -180 OR {longitude} + {d_lng} > 180"
+    return {
+        "min_latitude": f"{latitude} - {d_lat}",
+        "max_latitude": f"{latitude} + {d_lat}",
+        "min_longitude": f"CASE WHEN {unbounded} THEN -180.0 ELSE {longitude} - {d_lng} END",
+        "max_longitude": f"CASE WHEN {unbounded} THEN 180.0 ELSE {longitude} + {d_lng} END",
+    }
+
+
+def bbox_filter(lat_column, lng_column, latitude: float, longitude: float, radius_km: float) -> ColumnElement:
+    """Index-friendly range predicate on latitude/longitude columns."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    conditions = [lat_column.between(min_lat, max_lat)]
+    if min_lng is not None:
+        conditions.append(lng_column.between(min_lng, max_lng))
+    return and_(*conditions)
+
+
+def haversine_distance_km(lat_column, lng_column, latitude: float, longitude: float) -> ColumnElement:
+    """SQL expression for the haversine distance in kilometres."""
+    d_lat = func.radians(lat_column - latitude)
+    d_lng = func.radians(lng_column - longitude)
+    a = (
+        func.power(func.sin(d_lat * 0.5), 2) +
+        math.cos(math.radians(latitude)) * func.cos(func.radians(lat_column)) *
+        func.power(func.sin(d_lng * 0.5), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(literal(1.0), func.sqrt(a)))
+
+
+def geography_point(lat_column, lng_column) -> ColumnElement:
+    """PostGIS geography for a row; matches the expression GiST indexes."""
+    return func.geography(func.ST_SetSRID(func.ST_MakePoint(lng_column, lat_column), 4326))
+
+
+def query_point(latitude: float, longitude: float) -> ColumnElement:
+    """PostGIS geography for the search centre."""
+    return func.geography(func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326))
+
+
+def within_radius(lat_column, lng_column, latitude: float, longitude: float, radius_km) -> ColumnElement:
+    """Predicate: row lies within ``radius_km`` (a number or a column) of the point."""
+    if postgis_available:
+        return func.ST_DWithin(
+            geography_point(lat_column, lng_column),
+            query_point(latitude, longitude),
+            radius_km * 1000
+        )
+    return haversine_distance_km(lat_column, lng_column, latitude, longitude) <= radius_km
+
+
+def distance_km(lat_column, lng_column, latitude: float, longitude: float) -> ColumnElement:
+    """Distance expression in kilometres for ordering/reporting."""
+    if postgis_available:
+        return func.ST_Distance(geography_point(lat_column, lng_column), query_point(latitude, longitude)) / 1000
+    return haversine_distance_km(lat_column, lng_column, latitude, longitude)
+
+
+def knn_order(lat_column, lng_column, latitude: float, longitude: float) -> ColumnElement:
+    """ORDER BY expression for nearest-first results (index-assisted KNN on PostGIS)."""
+    if postgis_available:
+        return geography_point(lat_column, lng_column).op("<->")(query_point(latitude, longitude))
+    return haversine_distance_km(lat_column, lng_column, latitude, longitude)
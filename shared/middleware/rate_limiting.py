@@ -3,40 +3,115 @@ Rate Limiting Middleware for Flow-Backend Services
 Implements Redis-based rate limiting with configurable limits per endpoint and user
 """
 
+import ipaddress
 import time
-import redis
-import json
-from typing import Dict, Optional, Callable, Any
-from fastapi import Request, Response, HTTPException, status
+import uuid
+import redis.asyncio as redis
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Any, List, Tuple
+from fastapi import status
 from fastapi.responses import JSONResponse
 import logging
 import os
-from datetime import datetime, timedelta
+
+from shared.security.policy_engine import PolicyEngine
 
 logger = logging.getLogger(__name__)
 
 
+# Sliding-window log over every scope in one atomic round trip.
+# KEYS: one sorted set per scope
+# ARGV: now_ms, window_ms, unique member, then one limit per key
+# The hit is only recorded when every scope allows it.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local member = ARGV[3]
+local result = {1}
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+    local count = redis.call('ZCARD', key)
+    result[i + 1] = count
+    if count >= tonumber(ARGV[3 + i]) then
+        result[1] = 0
+    end
+end
+if result[1] == 1 then
+    for i, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, member)
+        redis.call('PEXPIRE', key, window)
+    end
+end
+return result
+"""
+
+
+@dataclass
+class RateLimitScope:
+    """A single limit applied to a request (one Redis sorted set)."""
+    key: str
+    limit: int
+
+
+class LocalTokenBucket:
+    """In-process token bucket used to reject obvious overload before Redis.
+
+    A bucket refills at ``limit / window`` tokens per second up to ``limit``.
+    When it is empty this process alone has already exceeded the limit, so
+    the request can be rejected without a Redis round trip.
+    """
+
+    __slots__ = ("capacity", "rate", "tokens", "updated_at")
+
+    def __init__(self, limit: int, window_size: int):
+        self.capacity = float(limit)
+        self.rate = limit / window_size
+        self.tokens = float(limit)
+        self.updated_at = time.monotonic()
+
+    def consume(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
 class RateLimiter:
     """Redis-based rate limiter with sliding window algorithm."""
-    
+
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/1")  # Use DB 1 for rate limiting
         self.enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
         self.default_limit = int(os.getenv("MAX_REQUESTS_PER_MINUTE", "100"))
+        # Requests per minute across every caller; 0 disables the global scope
+        self.global_limit = int(os.getenv("RATE_LIMIT_GLOBAL_PER_MINUTE", "0"))
         self.window_size = 60  # 1 minute window
         self._redis_client = None
-        
+        self._script = None
+
+        # Optional in-process pre-filter in front of Redis
+        self.local_prefilter = os.getenv("RATE_LIMIT_LOCAL_PREFILTER", "true").lower() == "true"
+        self.max_local_buckets = int(os.getenv("RATE_LIMIT_LOCAL_BUCKETS", "10000"))
+        self._local_buckets: "OrderedDict[str, LocalTokenBucket]" = OrderedDict()
+
         # Rate limits per endpoint pattern
         self.endpoint_limits = {
             "/auth/login": 5,  # 5 login attempts per minute
             "/auth/register": 3,  # 3 registration attempts per minute
+            "/auth/forgot-password": 3,  # 3 password reset requests per minute
+            "/admin/": 30,  # 30 admin requests per minute
+            "/payment/": 20,  # 20 payment requests per minute
             "/orders/direct": 10,  # 10 direct orders per minute
             "/orders/pricing": 20,  # 20 pricing requests per minute
             "/inventory/reservations": 15,  # 15 reservations per minute
             "/vendors/*/availability": 30,  # 30 availability checks per minute
             "/catalog/nearby": 50,  # 50 catalog searches per minute
         }
-        
+
         # Rate limits per user role
         self.role_limits = {
             "HOSPITAL": 200,  # Hospitals get higher limits
@@ -44,9 +119,19 @@ class RateLimiter:
             "ADMIN": 500,    # Admins get highest limits
             "SERVICE": 1000, # Service-to-service gets very high limits
         }
-    
+
+        # Limits compiled into a path-segment trie; RATE_LIMIT_POLICY_FILE may override them
+        # and is re-read when it changes
+        self.policy = PolicyEngine(
+            endpoint_limits=self.endpoint_limits,
+            role_limits=self.role_limits,
+            default_limit=self.default_limit,
+            config_path=os.getenv("RATE_LIMIT_POLICY_FILE"),
+            reload_interval=float(os.getenv("RATE_LIMIT_POLICY_RELOAD_SECONDS", "5"))
+        )
+
     def get_redis_client(self):
-        """Get or create Redis client."""
+        """Get or create the async Redis client and register the limiter script."""
         if self._redis_client is None:
             try:
                 self._redis_client = redis.from_url(
@@ -55,142 +140,252 @@ class RateLimiter:
                     socket_connect_timeout=2,
                     socket_timeout=2
                 )
-                self._redis_client.ping()
+                self._script = self._redis_client.register_script(SLIDING_WINDOW_SCRIPT)
             except Exception as e:
                 logger.error(f"Failed to connect to Redis for rate limiting: {str(e)}")
                 self._redis_client = None
+                self._script = None
         return self._redis_client
-    
-    def get_rate_limit(self, endpoint: str, user_role: str = None) -> int:
+
+    def get_rate_limit(self, endpoint: str, user_role: str = None, method: str = "*") -> int:
         """Get rate limit for specific endpoint and user role."""
-        # Check endpoint-specific limits first
-        for pattern, limit in self.endpoint_limits.items():
-            if pattern.replace("*", "") in endpoint:
-                return limit
-        
-        # Check role-based limits
-        if user_role and user_role in self.role_limits:
-            return self.role_limits[user_role]
-        
-        # Return default limit
-        return self.default_limit
-    
+        limit, _ = self.policy.get_rate_limit(endpoint, user_role, method)
+        return limit
+
     def get_rate_limit_key(self, identifier: str, endpoint: str) -> str:
         """Generate rate limit key for Redis."""
         # Normalize endpoint path
         endpoint_key = endpoint.replace("/", "_").replace("{", "").replace("}", "")
         return f"rate_limit:{identifier}:{endpoint_key}"
-    
-    async def is_allowed(self, request: Request, user_context: Optional[Dict[str, Any]] = None) -> tuple[bool, Dict[str, Any]]:
+
+    def get_scopes(self, identifier: str, endpoint: str, user_role: str = None, method: str = "*") -> List[RateLimitScope]:
         """
-        Check if request is allowed based on rate limits.
-        
+        Get the limit scopes that apply to a request.
+
+        Every request counts against the caller's overall limit (by role, or
+        the default for anonymous callers identified by IP). Requests to an
+        endpoint with its own limit also count against the caller's limit for
+        that endpoint pattern, and every request counts against the global
+        limit when one is configured.
+        """
+        caller_limit, _ = self.policy.get_role_limit(user_role)
+        scopes = [RateLimitScope(key=f"rate_limit:{identifier}", limit=caller_limit)]
+
+        limit, limit_class = self.policy.get_rate_limit(endpoint, user_role, method)
+        if limit_class.startswith("endpoint:"):
+            scopes.append(RateLimitScope(key=self.get_rate_limit_key(identifier, limit_class), limit=limit))
+
+        if self.global_limit > 0:
+            scopes.append(RateLimitScope(key="rate_limit:global", limit=self.global_limit))
+        return scopes
+
+    def _prefilter(self, scopes: List[RateLimitScope]) -> bool:
+        """Consume a local token for every scope; False means reject without Redis."""
+        allowed = True
+        for scope in scopes:
+            bucket = self._local_buckets.get(scope.key)
+            if bucket is None:
+                bucket = LocalTokenBucket(scope.limit, self.window_size)
+                self._local_buckets[scope.key] = bucket
+                if len(self._local_buckets) > self.max_local_buckets:
+                    self._local_buckets.popitem(last=False)
+            else:
+                self._local_buckets.move_to_end(scope.key)
+            if not bucket.consume():
+                allowed = False
+        return allowed
+
+    async def check_scopes(self, scopes: List[RateLimitScope]) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Check and record a hit against several scopes in one Redis round trip.
+
         Returns:
-            tuple: (is_allowed, rate_limit_info)
+            tuple: (is_allowed, rate_limit_info) for the most restrictive scope
         """
-        if not self.enabled:
+        if not self.enabled or not scopes:
             return True, {}
-        
+
+        current_time = time.time()
+        reset_time = int(current_time) + self.window_size
+
+        if self.local_prefilter and not self._prefilter(scopes):
+            limit = min(scope.limit for scope in scopes)
+            return False, {
+                "limit": limit,
+                "remaining": 0,
+                "reset_time": reset_time,
+                "window_size": self.window_size
+            }
+
         client = self.get_redis_client()
         if not client:
             # If Redis is unavailable, allow the request but log warning
             logger.warning("Redis unavailable for rate limiting, allowing request")
             return True, {}
-        
-        # Get identifier (user ID or IP address)
-        identifier = "anonymous"
-        user_role = None
-        
-        if user_context:
-            identifier = str(user_context.get("user_id", request.client.host))
-            user_role = str(user_context.get("role", "")).replace("UserRole.", "")
-        else:
-            identifier = request.client.host
-        
-        endpoint = request.url.path
-        rate_limit = self.get_rate_limit(endpoint, user_role)
-        key = self.get_rate_limit_key(identifier, endpoint)
-        
-        current_time = int(time.time())
-        window_start = current_time - self.window_size
-        
+
         try:
-            # Use Redis pipeline for atomic operations
-            pipe = client.pipeline()
-            
-            # Remove old entries outside the window
-            pipe.zremrangebyscore(key, 0, window_start)
-            
-            # Count current requests in window
-            pipe.zcard(key)
-            
-            # Add current request
-            pipe.zadd(key, {str(current_time): current_time})
-            
-            # Set expiration
-            pipe.expire(key, self.window_size * 2)
-            
-            results = pipe.execute()
-            current_requests = results[1]
-            
-            rate_limit_info = {
-                "limit": rate_limit,
-                "remaining": max(0, rate_limit - current_requests - 1),
-                "reset_time": current_time + self.window_size,
-                "window_size": self.window_size
-            }
-            
-            if current_requests >= rate_limit:
-                logger.warning(
-                    f"Rate limit exceeded for {identifier} on {endpoint}",
-                    extra={
-                        "identifier": identifier,
-                        "endpoint": endpoint,
-                        "current_requests": current_requests,
-                        "rate_limit": rate_limit,
-                        "user_role": user_role
-                    }
-                )
-                return False, rate_limit_info
-            
-            return True, rate_limit_info
-            
+            result = await self._script(
+                keys=[scope.key for scope in scopes],
+                args=[
+                    int(current_time * 1000),
+                    self.window_size * 1000,
+                    f"{int(current_time * 1000)}:{uuid.uuid4().hex[:12]}",
+                    *[scope.limit for scope in scopes]
+                ]
+            )
         except Exception as e:
             logger.error(f"Rate limiting error: {str(e)}")
             # On error, allow the request
             return True, {}
 
+        allowed = result[0] == 1
+        counts = result[1:]
+
+        # Report the scope closest to its limit
+        remaining, scope_index = min(
+            (max(0, scope.limit - count - (1 if allowed else 0)), index)
+            for index, (scope, count) in enumerate(zip(scopes, counts))
+        )
+        rate_limit_info = {
+            "limit": scopes[scope_index].limit,
+            "remaining": remaining,
+            "reset_time": reset_time,
+            "window_size": self.window_size
+        }
+
+        if not allowed:
+            logger.warning(
+                f"Rate limit exceeded for {scopes[scope_index].key}",
+                extra={
+                    "rate_limit_key": scopes[scope_index].key,
+                    "current_requests": counts[scope_index],
+                    "rate_limit": scopes[scope_index].limit
+                }
+            )
+
+        return allowed, rate_limit_info
+
+    async def is_allowed(
+        self,
+        identifier: str,
+        endpoint: str,
+        user_role: str = None,
+        method: str = "*"
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Check if request is allowed based on rate limits.
+
+        Returns:
+            tuple: (is_allowed, rate_limit_info)
+        """
+        return await self.check_scopes(self.get_scopes(identifier, endpoint, user_role, method))
+
 
 class RateLimitMiddleware:
-    """FastAPI middleware for rate limiting."""
-    
-    def __init__(self, app, rate_limiter: RateLimiter = None):
+    """Pure ASGI middleware for rate limiting.
+
+    Callers are identified by ``identify(scope) -> (user_id, role)``. The
+    default trusts the X-User-ID / X-User-Role headers the gateway sets for
+    backend services; edge deployments pass their own. Callers without a user
+    are limited by client IP, read from X-Forwarded-For / X-Real-IP only when
+    the connection comes from a trusted proxy (RATE_LIMIT_TRUSTED_PROXIES,
+    comma-separated addresses or networks).
+    """
+
+    EXEMPT_PATHS = frozenset(["/health", "/metrics", "/docs", "/openapi.json"])
+
+    def __init__(
+        self,
+        app,
+        rate_limiter: RateLimiter = None,
+        identify: Optional[Callable[[Dict[str, Any]], Tuple[Optional[str], Optional[str]]]] = None,
+        trusted_proxies: Optional[List[str]] = None
+    ):
         self.app = app
         self.rate_limiter = rate_limiter or RateLimiter()
-    
+        self.identify = identify or self.identify_from_headers
+
+        if trusted_proxies is None:
+            trusted_proxies = [
+                proxy.strip() for proxy in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",") if proxy.strip()
+            ]
+        self.trusted_proxies = []
+        for proxy in trusted_proxies:
+            try:
+                self.trusted_proxies.append(ipaddress.ip_network(proxy, strict=False))
+            except ValueError:
+                logger.error(f"Invalid trusted proxy address: {proxy}")
+
+    def is_trusted_proxy(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_ip(self, scope: Dict[str, Any]) -> str:
+        """Client address, looking through trusted proxies.
+
+        X-Forwarded-For is walked from the right, skipping trusted hops, so a
+        client cannot choose its identity by sending the header itself.
+        """
+        client = scope.get("client")
+        peer = client[0] if client else None
+        if not peer or not self.is_trusted_proxy(peer):
+            return peer or "anonymous"
+
+        forwarded_for = None
+        real_ip = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                forwarded_for = value.decode("latin-1")
+            elif name == b"x-real-ip":
+                real_ip = value.decode("latin-1").strip()
+
+        if forwarded_for:
+            hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+            for hop in reversed(hops):
+                if not self.is_trusted_proxy(hop):
+                    return hop
+            if hops:
+                return hops[0]
+        return real_ip or peer
+
+    @staticmethod
+    def identify_from_headers(scope: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """Caller from the headers set by the gateway."""
+        user_id = None
+        user_role = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-user-id":
+                user_id = value.decode("latin-1")
+            elif name == b"x-user-role":
+                user_role = value.decode("latin-1").replace("UserRole.", "")
+        return user_id, user_role
+
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
-        
-        request = Request(scope, receive)
-        
+
         # Skip rate limiting for health checks and internal endpoints
-        if request.url.path in ["/health", "/metrics", "/docs", "/openapi.json"]:
+        path = scope["path"]
+        if path in self.EXEMPT_PATHS:
             await self.app(scope, receive, send)
             return
-        
-        # Extract user context from headers (set by authentication middleware)
-        user_context = None
-        if "x-user-id" in request.headers:
-            user_context = {
-                "user_id": request.headers.get("x-user-id"),
-                "role": request.headers.get("x-user-role")
-            }
-        
+
+        # Identify the caller, falling back to client IP
+        user_id, user_role = self.identify(scope)
+        if user_id:
+            identifier = f"user:{user_id}"
+        else:
+            identifier = f"ip:{self.client_ip(scope)}"
+
         # Check rate limit
-        is_allowed, rate_limit_info = await self.rate_limiter.is_allowed(request, user_context)
-        
+        is_allowed, rate_limit_info = await self.rate_limiter.is_allowed(
+            identifier, path, user_role, scope.get("method", "*")
+        )
+
         if not is_allowed:
             # Return rate limit exceeded response
             response = JSONResponse(
@@ -209,19 +404,17 @@ class RateLimitMiddleware:
             )
             await response(scope, receive, send)
             return
-        
+
         # Add rate limit headers to response
         async def send_wrapper(message):
             if message["type"] == "http.response.start" and rate_limit_info:
-                headers = dict(message.get("headers", []))
-                headers.update({
-                    b"x-ratelimit-limit": str(rate_limit_info.get('limit', 0)).encode(),
-                    b"x-ratelimit-remaining": str(rate_limit_info.get('remaining', 0)).encode(),
-                    b"x-ratelimit-reset": str(rate_limit_info.get('reset_time', 0)).encode()
-                })
-                message["headers"] = list(headers.items())
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-ratelimit-limit", str(rate_limit_info.get('limit', 0)).encode()),
+                    (b"x-ratelimit-remaining", str(rate_limit_info.get('remaining', 0)).encode()),
+                    (b"x-ratelimit-reset", str(rate_limit_info.get('reset_time', 0)).encode())
+                ]
             await send(message)
-        
+
         await self.app(scope, receive, send_wrapper)
 
 
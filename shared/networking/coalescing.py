@@ -0,0 +1,65 @@
+"""
+Request Coalescing for Flow-Backend Services
+Merges concurrent identical loads into one call and snaps coordinates to a
+lat/lng grid so nearby lookups share cache keys and in-flight loads
+"""
+
+import asyncio
+import math
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def snap_to_grid(latitude: float, longitude: float, step: float) -> Tuple[float, float]:
+    """Centre of the ``step``-degree grid cell containing the point (0.01 degrees is roughly 1.1 km)."""
+    return (
+        round((math.floor(latitude / step) + 0.5) * step, 6),
+        round((math.floor(longitude / step) + 0.5) * step, 6)
+    )
+
+
+class SingleFlight:
+    """Run a loader once for concurrent callers with the same key; they all get its result.
+
+    The load runs as its own task, so it is not tied to the caller that
+    started it: a caller that is cancelled or stops waiting leaves the load
+    running for the others (and for whatever it stores). Each caller may
+    bound its own wait with ``timeout``. If the load raises, every caller
+    waiting on it gets the same exception.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.merges = 0
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def run(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                  timeout: Optional[float] = None) -> Any:
+        """Result of the in-flight load for ``key``, starting one if needed.
+
+        Raises asyncio.TimeoutError if ``timeout`` seconds pass first; the
+        load itself carries on.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+        else:
+            self.merges += 1
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark retrieved so a load nobody waited for to the end doesn't warn
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        return {
+            "merges": self.merges,
+            "in_flight": len(self._in_flight)
+        }
@@ -0,0 +1,253 @@
+"""
+Pooled HTTP Client Management for Flow-Backend Services
+Keeps one long-lived httpx client per upstream service so calls reuse connections
+"""
+
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Any, Iterable, Sequence
+from dataclasses import dataclass, field
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (required by httpx for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class HTTPPoolConfig:
+    """Configuration for an upstream connection pool."""
+    max_connections: int = 100              # Total connections per upstream
+    max_keepalive_connections: int = 20     # Idle connections kept open per upstream
+    keepalive_expiry: float = 30.0          # Seconds an idle connection is kept
+    connect_timeout: float = 5.0            # Connection establishment timeout
+    read_timeout: float = 30.0              # Read/write/pool timeout
+    http2_services: Iterable[str] = field(default_factory=tuple)  # Upstreams that speak HTTP/2
+
+    @classmethod
+    def from_env(cls, prefix: str = "HTTP_POOL_", **defaults: Any) -> "HTTPPoolConfig":
+        """Build a pool configuration from environment variables.
+
+        Keyword arguments override the class defaults for settings the
+        environment does not provide.
+        """
+        def default(name: str):
+            return defaults.get(name, getattr(cls, name))
+
+        http2_services = os.getenv(f"{prefix}HTTP2_SERVICES", ",".join(defaults.get("http2_services", ())))
+        return cls(
+            max_connections=int(os.getenv(f"{prefix}MAX_CONNECTIONS", default("max_connections"))),
+            max_keepalive_connections=int(os.getenv(f"{prefix}MAX_KEEPALIVE", default("max_keepalive_connections"))),
+            keepalive_expiry=float(os.getenv(f"{prefix}KEEPALIVE_EXPIRY", default("keepalive_expiry"))),
+            connect_timeout=float(os.getenv(f"{prefix}CONNECT_TIMEOUT", default("connect_timeout"))),
+            read_timeout=float(os.getenv(f"{prefix}READ_TIMEOUT", default("read_timeout"))),
+            http2_services=tuple(s.strip() for s in http2_services.split(",") if s.strip())
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+
+# Latency bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram, exported with cumulative counts."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile, None if empty or beyond the last bound."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = {}
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            cumulative[f"{bound * 1000:g}ms"] = seen
+        cumulative["+Inf"] = self.count
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return value * 1000 if value is not None else None
+
+        return {
+            "buckets": cumulative,
+            "count": self.count,
+            "sum_ms": self.sum * 1000,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99))
+        }
+
+
+@dataclass
+class UpstreamStats:
+    """Request statistics for a single upstream."""
+    total_requests: int = 0
+    total_failures: int = 0
+    total_timeouts: int = 0
+    in_flight: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        completed = self.total_requests - self.in_flight
+        return {
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+            "total_timeouts": self.total_timeouts,
+            "in_flight": self.in_flight,
+            "avg_latency_ms": (self.total_latency / completed * 1000) if completed > 0 else 0,
+            "max_latency_ms": self.max_latency * 1000,
+            "latency_histogram": self.latency.to_dict()
+        }
+
+
+class UpstreamClientPool:
+    """Owns one pooled AsyncClient per upstream service.
+
+    Clients are created in ``start()`` (or lazily on first use) and must be
+    closed with ``close()`` on shutdown. HTTP/2 is enabled for the services
+    listed in ``config.http2_services`` when the ``h2`` package is installed;
+    httpx negotiates it through ALPN, so it only applies to https upstreams.
+    """
+
+    def __init__(self, service_urls: Dict[str, str], config: HTTPPoolConfig = None):
+        self.service_urls = dict(service_urls)
+        self.config = config or HTTPPoolConfig()
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.stats: Dict[str, UpstreamStats] = {name: UpstreamStats() for name in self.service_urls}
+
+        if self.config.http2_services and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested for upstreams but the 'h2' package is not installed, using HTTP/1.1")
+
+    def _create_client(self, service: str) -> httpx.AsyncClient:
+        """Create the pooled client for a service."""
+        http2 = HTTP2_AVAILABLE and service in self.config.http2_services
+        return httpx.AsyncClient(
+            base_url=self.service_urls[service],
+            limits=self.config.limits,
+            timeout=self.config.timeout,
+            http2=http2
+        )
+
+    async def start(self):
+        """Create clients for every configured upstream."""
+        for service in self.service_urls:
+            if service not in self.clients:
+                self.clients[service] = self._create_client(service)
+        logger.info(f"Upstream client pool started for {len(self.clients)} services")
+
+    async def close(self):
+        """Close all clients and release their connections."""
+        for service, client in self.clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing client for {service}: {str(e)}")
+        self.clients.clear()
+        logger.info("Upstream client pool closed")
+
+    def get_client(self, service: str) -> httpx.AsyncClient:
+        """Get the pooled client for a service, creating it if needed."""
+        client = self.clients.get(service)
+        if client is None or client.is_closed:
+            if service not in self.service_urls:
+                raise KeyError(f"Unknown upstream service: {service}")
+            client = self._create_client(service)
+            self.clients[service] = client
+        return client
+
+    async def request(self, service: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a fully buffered request to an upstream."""
+        client = self.get_client(service)
+        return await self.send(service, client.build_request(method, url, **kwargs))
+
+    async def send(self, service: str, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        """Send a prepared request, recording latency up to response headers.
+
+        With ``stream=True`` the caller owns the response and must close it
+        with ``response.aclose()`` once the body has been consumed.
+        """
+        client = self.get_client(service)
+        stats = self.stats.setdefault(service, UpstreamStats())
+
+        stats.total_requests += 1
+        stats.in_flight += 1
+        start_time = time.perf_counter()
+        try:
+            return await client.send(request, stream=stream)
+        except httpx.TimeoutException:
+            stats.total_timeouts += 1
+            stats.total_failures += 1
+            raise
+        except httpx.RequestError:
+            stats.total_failures += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start_time
+            stats.in_flight -= 1
+            stats.total_latency += elapsed
+            stats.max_latency = max(stats.max_latency, elapsed)
+            stats.latency.observe(elapsed)
+
+    def _get_connection_stats(self, client: httpx.AsyncClient) -> Dict[str, int]:
+        """Inspect the underlying httpcore pool, if exposed."""
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return {}
+        return {
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for conn in connections if conn.is_idle())
+        }
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-service pool and request statistics."""
+        result = {}
+        for service, stats in self.stats.items():
+            client = self.clients.get(service)
+            result[service] = {
+                "url": self.service_urls.get(service),
+                "client_open": client is not None and not client.is_closed,
+                "http2": HTTP2_AVAILABLE and service in self.config.http2_services,
+                **stats.to_dict(),
+                **(self._get_connection_stats(client) if client is not None else {})
+            }
+        return result
@@ -0,0 +1,90 @@
+"""
+In-process TTL cache for upstream lookups.
+Bounded LRU with per-entry expiry and batch get/set, so callers can look up
+many keys at once and only fetch the misses from the upstream service.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire ``ttl`` seconds after being set."""
+
+    _MISSING = object()
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key: Hashable, now: float) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._MISSING
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return self._MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key, time.monotonic())
+        if value is self._MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, Any], List[Hashable]]:
+        """Return ``(found, missing)`` for a batch of keys."""
+        now = time.monotonic()
+        found: Dict[Hashable, Any] = {}
+        missing: List[Hashable] = []
+        for key in keys:
+            value = self._lookup(key, now)
+            if value is self._MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None):
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups > 0 else 0,
+            "evictions": self.evictions
+        }
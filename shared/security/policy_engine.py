@@ -0,0 +1,333 @@
+"""
+Precompiled Access Policy Engine for the Oxygen Supply Platform
+Compiles role permissions and endpoint rate limits into path-segment tries
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple, Iterable, NamedTuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "*"
+ANY_METHOD = "*"
+
+
+def split_path(path: str) -> List[str]:
+    """Split a URL path into segments, ignoring leading/trailing slashes."""
+    path = path.strip("/")
+    return path.split("/") if path else []
+
+
+class _TrieNode:
+    __slots__ = ("children", "wildcard", "value", "has_value")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.wildcard: Optional["_TrieNode"] = None
+        self.value: Any = None
+        self.has_value = False
+
+
+class PathTrie:
+    """Path-segment trie mapping URL patterns to values.
+
+    ``*`` matches exactly one segment. A pattern also covers every path below
+    it, so ``/admin/`` matches ``/admin`` and ``/admin/users``. When several
+    patterns match, the longest wins and, at equal length, the one with more
+    literal segments.
+
+    Patterns are anchored at the start of the path unless ``anchored`` is
+    False, in which case they may start at any segment, so ``/catalog/nearby``
+    also matches ``/api/v1/inventory/catalog/nearby``.
+
+    Match results are memoized per path (bounded by ``cache_size``), so hot
+    paths cost a single dict lookup.
+    """
+
+    _NO_MATCH = object()
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]] = (), cache_size: int = 4096, anchored: bool = True):
+        self.root = _TrieNode()
+        self.anchored = anchored
+        self.has_wildcards = False
+        self.is_empty = True
+        self.cache_size = cache_size
+        self._cache: Dict[str, Any] = {}
+        for pattern, value in patterns:
+            self.insert(pattern, value)
+
+    def insert(self, pattern: str, value: Any):
+        node = self.root
+        for segment in split_path(pattern):
+            if segment == WILDCARD:
+                self.has_wildcards = True
+                if node.wildcard is None:
+                    node.wildcard = _TrieNode()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, _TrieNode())
+        node.value = value
+        node.has_value = True
+        self.is_empty = False
+        self._cache.clear()
+
+    def match(self, path: str, default: Any = None) -> Any:
+        """Return the value of the most specific pattern covering ``path``."""
+        if self.is_empty:
+            return default
+
+        result = self._cache.get(path)
+        if result is None:
+            result = self._match(path)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[path] = result
+        return default if result is self._NO_MATCH else result
+
+    def _match(self, path: str) -> Any:
+        segments = split_path(path)
+        default = self._NO_MATCH
+
+        if self.anchored and not self.has_wildcards:
+            # Literal-only trie: a single walk, remembering the last value seen
+            node = self.root
+            result = node.value if node.has_value else default
+            for segment in segments:
+                node = node.children.get(segment)
+                if node is None:
+                    break
+                if node.has_value:
+                    result = node.value
+            return result
+
+        # Walk all matching branches level by level, keeping the match with the
+        # most pattern segments, then the most literal ones
+        result = default
+        best = (-1, -1)
+        if self.root.has_value:
+            result = self.root.value
+            best = (0, 0)
+        frontier = [(self.root, 0, 0)]
+        for segment in segments:
+            next_frontier = []
+            for node, depth, literals in frontier:
+                child = node.children.get(segment)
+                if child is not None:
+                    next_frontier.append((child, depth + 1, literals + 1))
+                if node.wildcard is not None:
+                    next_frontier.append((node.wildcard, depth + 1, literals))
+            if not self.anchored:
+                # A pattern may also start at the next segment
+                next_frontier.append((self.root, 0, 0))
+            elif not next_frontier:
+                break
+            frontier = next_frontier
+
+            for node, depth, literals in frontier:
+                if node.has_value and (depth, literals) > best:
+                    best = (depth, literals)
+                    result = node.value
+        return result
+
+
+class PolicyDecision(NamedTuple):
+    """Result of evaluating a request against the policy."""
+    allowed: bool
+    rate_limit: int
+    rate_limit_class: str
+
+
+@dataclass(frozen=True)
+class _CompiledRole:
+    services: Optional[frozenset]   # None means every service
+    methods: Optional[frozenset]    # None means every method
+    restricted: PathTrie
+
+
+@dataclass(frozen=True)
+class _CompiledPolicy:
+    roles: Dict[str, _CompiledRole]
+    endpoint_limits: PathTrie       # values: {method: (limit, class)}
+    role_limits: Dict[str, Tuple[int, str]]
+    default_limit: Tuple[int, str]
+
+
+_role_keys: Dict[Any, str] = {}
+
+
+def _normalize_role(role: Any) -> str:
+    """Accept UserRole enums, 'UserRole.X' strings and any casing."""
+    key = _role_keys.get(role)
+    if key is None:
+        value = getattr(role, "value", role)
+        key = str(value).replace("UserRole.", "").lower() if value else ""
+        if len(_role_keys) < 1024:
+            _role_keys[role] = key
+    return key
+
+
+class PolicyEngine:
+    """Role-based access and rate-limit policy, compiled once and swapped on reload.
+
+    Policy config (JSON file or dict)::
+
+        {
+            "role_permissions": {"hospital": {"allowed_services": [...],
+                                              "allowed_methods": [...],
+                                              "restricted_endpoints": [...]}},
+            "endpoint_limits": {"/auth/login": 5, "POST /orders/direct": 10},
+            "role_limits": {"hospital": 200},
+            "default_limit": 100
+        }
+
+    Endpoint limit keys may be prefixed with an HTTP method and match at any
+    depth of the request path, so ``/catalog/nearby`` limits
+    ``/api/v1/inventory/catalog/nearby``.
+
+    With ``reload_interval`` set, lookups check the config file's mtime at
+    most that often and recompile the policy when it changed.
+    """
+
+    def __init__(
+        self,
+        role_permissions: Dict[Any, Dict[str, Any]] = None,
+        endpoint_limits: Dict[str, int] = None,
+        role_limits: Dict[Any, int] = None,
+        default_limit: int = 100,
+        config_path: Optional[str] = None,
+        reload_interval: float = 0
+    ):
+        self.config_path = config_path
+        self.reload_interval = reload_interval
+        self._next_reload_check = 0.0
+        self._base_config = {
+            "role_permissions": role_permissions or {},
+            "endpoint_limits": endpoint_limits or {},
+            "role_limits": role_limits or {},
+            "default_limit": default_limit
+        }
+        self._config_mtime: Optional[float] = None
+        self._reload_lock = threading.Lock()
+        self._policy = self.compile(self._base_config)
+        self._decisions: Dict[Tuple[Any, str, str, str], PolicyDecision] = {}
+        self.max_cached_decisions = 4096
+
+        if config_path:
+            self.reload()
+
+    @staticmethod
+    def compile(config: Dict[str, Any]) -> _CompiledPolicy:
+        """Compile a policy config into lookup tables."""
+        roles = {}
+        for role, permissions in config.get("role_permissions", {}).items():
+            services = permissions.get("allowed_services", [])
+            methods = permissions.get("allowed_methods", [])
+            roles[_normalize_role(role)] = _CompiledRole(
+                services=None if WILDCARD in services else frozenset(services),
+                methods=None if ANY_METHOD in methods else frozenset(m.upper() for m in methods),
+                restricted=PathTrie((pattern, True) for pattern in permissions.get("restricted_endpoints", []))
+            )
+
+        endpoint_limits = PathTrie(anchored=False)
+        grouped: Dict[str, Dict[str, Tuple[int, str]]] = {}
+        for key, limit in config.get("endpoint_limits", {}).items():
+            method, _, pattern = key.partition(" ") if " " in key else (ANY_METHOD, "", key)
+            grouped.setdefault(pattern, {})[method.upper()] = (int(limit), f"endpoint:{key}")
+        for pattern, by_method in grouped.items():
+            endpoint_limits.insert(pattern, by_method)
+
+        return _CompiledPolicy(
+            roles=roles,
+            endpoint_limits=endpoint_limits,
+            role_limits={
+                _normalize_role(role): (int(limit), f"role:{_normalize_role(role)}")
+                for role, limit in config.get("role_limits", {}).items()
+            },
+            default_limit=(int(config.get("default_limit", 100)), "default")
+        )
+
+    def reload(self, config_path: Optional[str] = None, force: bool = False) -> bool:
+        """Recompile from the config file if it changed; keeps the old policy on error."""
+        config_path = config_path or self.config_path
+        if not config_path:
+            return False
+
+        with self._reload_lock:
+            try:
+                mtime = os.path.getmtime(config_path)
+                if not force and config_path == self.config_path and mtime == self._config_mtime:
+                    return False
+
+                with open(config_path) as f:
+                    file_config = json.load(f)
+
+                config = {**self._base_config, **file_config}
+                policy = self.compile(config)
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                logger.error(f"Failed to reload access policy from {config_path}: {str(e)}")
+                return False
+
+            self._policy = policy
+            self._decisions = {}
+            self.config_path = config_path
+            self._config_mtime = mtime
+            logger.info(f"Access policy reloaded from {config_path}")
+            return True
+
+    def _check_reload(self):
+        """Reload a changed config file, stat-ing it at most once per reload_interval."""
+        if not self.reload_interval or not self.config_path:
+            return
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + self.reload_interval
+        self.reload()
+
+    def is_allowed(self, role: Any, service: str, method: str, path: str) -> bool:
+        """Check if a role may call ``method path`` on ``service``."""
+        self._check_reload()
+        compiled = self._policy.roles.get(_normalize_role(role))
+        if compiled is None:
+            return False
+        if compiled.services is not None and service not in compiled.services:
+            return False
+        if compiled.methods is not None and method not in compiled.methods:
+            return False
+        return not compiled.restricted.match(path, False)
+
+    def get_rate_limit(self, path: str, role: Any = None, method: str = ANY_METHOD) -> Tuple[int, str]:
+        """Get ``(limit, rate_limit_class)`` for a request."""
+        self._check_reload()
+        policy = self._policy
+        by_method = policy.endpoint_limits.match(path)
+        if by_method:
+            limit = by_method.get(method) or by_method.get(ANY_METHOD)
+            if limit:
+                return limit
+
+        return policy.role_limits.get(_normalize_role(role), policy.default_limit)
+
+    def get_role_limit(self, role: Any = None) -> Tuple[int, str]:
+        """Get ``(limit, rate_limit_class)`` for a caller across all endpoints."""
+        self._check_reload()
+        policy = self._policy
+        return policy.role_limits.get(_normalize_role(role), policy.default_limit)
+
+    def evaluate(self, role: Any, service: str, method: str, path: str) -> PolicyDecision:
+        """Evaluate access and rate-limit class for a request in one call."""
+        self._check_reload()
+        key = (role, service, method, path)
+        decision = self._decisions.get(key)
+        if decision is None:
+            limit, limit_class = self.get_rate_limit(path, role, method)
+            decision = PolicyDecision(self.is_allowed(role, service, method, path), limit, limit_class)
+            if len(self._decisions) >= self.max_cached_decisions:
+                self._decisions.clear()
+            self._decisions[key] = decision
+        return decision
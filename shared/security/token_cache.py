@@ -0,0 +1,228 @@
+"""
+Verified Token Cache for the Oxygen Supply Platform
+Bounded LRU/TTL cache of verified JWT claims with a Redis revocation feed
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel that user-service publishes revocations on
+REVOCATION_CHANNEL = "auth:token-revocations"
+
+
+def get_unverified_claims(token: str) -> Dict[str, Any]:
+    """Decode the JWT payload without checking the signature.
+
+    Only used to read ``exp``/``jti``/``user_id`` for cache bookkeeping of a
+    token that has already been verified.
+    """
+    try:
+        payload_segment = token.split(".")[1]
+        padded = payload_segment + "=" * (-len(payload_segment) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        return {}
+
+
+class VerifiedTokenCache:
+    """LRU cache of verified token claims keyed by token hash.
+
+    Entries live for at most ``ttl`` seconds and never past the token's own
+    ``exp``. Revocations (by ``jti`` or by user) drop matching entries and are
+    remembered so that a verification already in flight cannot re-populate
+    the cache with a revoked token.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: int = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._revoked_jtis: Dict[str, float] = {}    # jti -> time the revocation can be forgotten
+        self._revoked_users: Dict[str, float] = {}   # user_id -> revocation timestamp
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.revocations = 0
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        """Hash a raw token so the cache never holds bearer credentials."""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Get cached claims for a token, or None if absent or expired."""
+        key = self.token_key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry["expires_at"] <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry["user_data"]
+
+    def set(self, token: str, user_data: Dict[str, Any]):
+        """Cache verified claims, capped by the token's own expiry."""
+        claims = get_unverified_claims(token)
+        now = time.time()
+
+        jti = claims.get("jti")
+        user_id = str(claims.get("user_id") or user_data.get("user_id") or "")
+        issued_at = claims.get("iat") or 0
+
+        # Do not resurrect a token revoked while it was being verified
+        if jti and jti in self._revoked_jtis:
+            return
+        if user_id in self._revoked_users and issued_at <= self._revoked_users[user_id]:
+            return
+
+        expires_at = now + self.ttl
+        if claims.get("exp"):
+            expires_at = min(expires_at, float(claims["exp"]))
+        if expires_at <= now:
+            return
+
+        key = self.token_key(token)
+        self._entries[key] = {
+            "user_data": user_data,
+            "jti": jti,
+            "user_id": user_id,
+            "expires_at": expires_at
+        }
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def revoke_jti(self, jti: str, exp: Optional[int] = None):
+        """Drop a revoked token and remember the revocation until it expires."""
+        self.revocations += 1
+        self._revoked_jtis[jti] = float(exp) if exp else time.time() + self.ttl
+        for key in [k for k, entry in self._entries.items() if entry["jti"] == jti]:
+            del self._entries[key]
+        self._prune_revocations()
+
+    def revoke_user(self, user_id: str, revoked_at: Optional[float] = None):
+        """Drop every cached token issued to a user before the revocation."""
+        self.revocations += 1
+        self._revoked_users[str(user_id)] = float(revoked_at) if revoked_at else time.time()
+        for key in [k for k, entry in self._entries.items() if entry["user_id"] == str(user_id)]:
+            del self._entries[key]
+        self._prune_revocations()
+
+    def _prune_revocations(self):
+        """Forget revocations that can no longer affect a cached entry."""
+        now = time.time()
+        self._revoked_jtis = {jti: until for jti, until in self._revoked_jtis.items() if until > now}
+        self._revoked_users = {
+            user_id: revoked_at for user_id, revoked_at in self._revoked_users.items()
+            if revoked_at + self.ttl > now
+        }
+
+    def handle_revocation(self, message: Dict[str, Any]):
+        """Apply a revocation message from the feed."""
+        if message.get("jti"):
+            self.revoke_jti(message["jti"], message.get("exp"))
+        if message.get("user_id"):
+            self.revoke_user(message["user_id"], message.get("revoked_at"))
+
+    def clear(self):
+        """Drop all cached entries."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups > 0 else 0,
+            "revocations": self.revocations
+        }
+
+    async def listen_for_revocations(self, redis_url: str, reconnect_delay: float = 5.0):
+        """Subscribe to the revocation feed until cancelled.
+
+        While disconnected the cache is cleared, so revocation latency is never
+        worse than ``ttl``.
+        """
+        await listen_for_revocations(redis_url, self.handle_revocation, self.clear, reconnect_delay)
+
+
+async def listen_for_revocations(
+    redis_url: str,
+    handle: Callable[[Dict[str, Any]], None],
+    on_disconnect: Optional[Callable[[], None]] = None,
+    reconnect_delay: float = 5.0
+):
+    """Pass every message on the revocation feed to ``handle`` until cancelled.
+
+    ``on_disconnect`` runs whenever the subscription is lost, before retrying,
+    so subscribers can drop state that a missed revocation could leave stale.
+    """
+    import redis.asyncio as redis
+
+    while True:
+        client = None
+        try:
+            client = redis.from_url(redis_url, decode_responses=True)
+            pubsub = client.pubsub()
+            await pubsub.subscribe(REVOCATION_CHANNEL)
+            logger.info(f"Subscribed to token revocation feed on {REVOCATION_CHANNEL}")
+
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    handle(json.loads(message["data"]))
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Ignoring malformed revocation message: {str(e)}")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Token revocation feed unavailable: {str(e)}, retrying in {reconnect_delay}s")
+            if on_disconnect is not None:
+                on_disconnect()
+            await asyncio.sleep(reconnect_delay)
+        finally:
+            if client is not None:
+                try:
+                    await client.close()
+                except Exception:
+                    pass
+
+
+async def publish_token_revocation(redis_client, jti: str = None, exp: int = None, user_id: str = None) -> bool:
+    """Publish a revocation so gateway token caches and user-service replicas drop the token(s)."""
+    message = {"revoked_at": int(time.time())}
+    if jti:
+        message["jti"] = jti
+        if exp:
+            message["exp"] = int(exp)
+    if user_id:
+        message["user_id"] = str(user_id)
+
+    try:
+        await redis_client.publish(REVOCATION_CHANNEL, json.dumps(message))
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to publish token revocation: {str(e)}")
+        return False
@@ -0,0 +1,100 @@
+import json
+import os
+import time
+
+import pytest
+
+from shared.middleware.rate_limiting import RateLimiter, RateLimitMiddleware
+from shared.security.policy_engine import PathTrie, PolicyEngine
+
+
+@pytest.fixture
+def rate_limiter(monkeypatch):
+    monkeypatch.delenv("RATE_LIMIT_POLICY_FILE", raising=False)
+    monkeypatch.delenv("MAX_REQUESTS_PER_MINUTE", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_GLOBAL_PER_MINUTE", raising=False)
+    return RateLimiter()
+
+
+@pytest.mark.parametrize("path,expected", [
+    ("/api/v1/inventory/catalog/nearby", 50),
+    ("/catalog/nearby", 50),
+    ("/api/v1/vendors/1/availability", 30),
+    ("/vendors/3f1c2a/availability", 30),
+    ("/api/v1/auth/login", 5),
+    ("/api/v1/orders/direct", 10),
+    ("/api/v1/inventory/reservations/bulk", 15),
+    ("/api/v1/orders", 100),
+    ("/api/v1/vendors/1", 100),
+])
+def test_endpoint_limits_match_below_any_prefix(rate_limiter, path, expected):
+    assert rate_limiter.get_rate_limit(path) == expected
+
+
+def test_role_limit_applies_when_no_endpoint_matches(rate_limiter):
+    assert rate_limiter.get_rate_limit("/api/v1/orders", "HOSPITAL") == 200
+    assert rate_limiter.get_rate_limit("/api/v1/inventory/catalog/nearby", "HOSPITAL") == 50
+
+
+def test_anchored_trie_only_matches_from_root():
+    trie = PathTrie([("/admin/", True)])
+    assert trie.match("/admin/users") is True
+    assert trie.match("/api/v1/admin/users", False) is False
+
+
+def test_floating_trie_prefers_longest_pattern():
+    trie = PathTrie([("/orders", "orders"), ("/orders/*/items", "items"), ("/api/v1/orders/direct", "direct")],
+                    anchored=False)
+    assert trie.match("/api/v1/orders") == "orders"
+    assert trie.match("/api/v1/orders/42/items") == "items"
+    assert trie.match("/api/v1/orders/direct") == "direct"
+    assert trie.match("/api/v1/users") is None
+
+
+def test_policy_file_reloads_when_changed(tmp_path):
+    config_path = tmp_path / "policy.json"
+    config_path.write_text(json.dumps({"endpoint_limits": {"/catalog/nearby": 50}}))
+    engine = PolicyEngine(config_path=str(config_path), reload_interval=0.01)
+    assert engine.get_rate_limit("/api/v1/inventory/catalog/nearby")[0] == 50
+
+    config_path.write_text(json.dumps({"endpoint_limits": {"/catalog/nearby": 25}}))
+    mtime = os.path.getmtime(config_path) + 1
+    os.utime(config_path, (mtime, mtime))
+    time.sleep(0.02)
+    assert engine.get_rate_limit("/api/v1/inventory/catalog/nearby")[0] == 25
+
+
+def test_scopes_cover_caller_endpoint_and_global(rate_limiter):
+    rate_limiter.global_limit = 10000
+    scopes = rate_limiter.get_scopes("user:42", "/api/v1/inventory/catalog/nearby", "HOSPITAL")
+    assert [(scope.key, scope.limit) for scope in scopes] == [
+        ("rate_limit:user:42", 200),
+        ("rate_limit:user:42:endpoint:_catalog_nearby", 50),
+        ("rate_limit:global", 10000),
+    ]
+
+
+def test_scopes_without_endpoint_limit_use_caller_limit_only(rate_limiter):
+    scopes = rate_limiter.get_scopes("ip:10.0.0.1", "/api/v1/orders")
+    assert [(scope.key, scope.limit) for scope in scopes] == [("rate_limit:ip:10.0.0.1", 100)]
+
+
+def http_scope(peer, headers=()):
+    return {"type": "http", "client": (peer, 51234), "headers": list(headers)}
+
+
+def test_client_ip_uses_forwarded_address_from_trusted_proxy(rate_limiter):
+    middleware = RateLimitMiddleware(None, rate_limiter, trusted_proxies=["172.16.0.0/12"])
+    scope = http_scope("172.18.0.5", [(b"x-forwarded-for", b"6.6.6.6, 41.58.10.2"), (b"x-real-ip", b"41.58.10.2")])
+    assert middleware.client_ip(scope) == "41.58.10.2"
+
+
+def test_client_ip_falls_back_to_real_ip_header(rate_limiter):
+    middleware = RateLimitMiddleware(None, rate_limiter, trusted_proxies=["172.16.0.0/12"])
+    assert middleware.client_ip(http_scope("172.18.0.5", [(b"x-real-ip", b"41.58.10.2")])) == "41.58.10.2"
+
+
+def test_client_ip_ignores_forwarded_headers_from_untrusted_peer(rate_limiter):
+    middleware = RateLimitMiddleware(None, rate_limiter, trusted_proxies=["172.16.0.0/12"])
+    scope = http_scope("41.58.10.2", [(b"x-forwarded-for", b"6.6.6.6")])
+    assert middleware.client_ip(scope) == "41.58.10.2"
@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from shared.database.spatial import EARTH_RADIUS_KM, bounding_box, haversine_km
+
+
+def destination(latitude, longitude, distance_km, bearing_degrees):
+    """Point reached travelling distance_km from the start along a bearing."""
+    d = distance_km / EARTH_RADIUS_KM
+    phi1, lambda1 = math.radians(latitude), math.radians(longitude)
+    theta = math.radians(bearing_degrees)
+    phi2 = math.asin(math.sin(phi1) * math.cos(d) + math.cos(phi1) * math.sin(d) * math.cos(theta))
+    lambda2 = lambda1 + math.atan2(
+        math.sin(theta) * math.sin(d) * math.cos(phi1),
+        math.cos(d) - math.sin(phi1) * math.sin(phi2)
+    )
+    return math.degrees(phi2), math.degrees(lambda2)
+
+
+def in_box(box, latitude, longitude):
+    min_lat, max_lat, min_lng, max_lng = box
+    return min_lat <= latitude <= max_lat and min_lng <= longitude <= max_lng
+
+
+def test_point_just_inside_radius_due_north_is_in_box():
+    latitude, longitude = 6.5, 3.4
+    point = (latitude + 49.97 / 111.195, longitude)
+    assert haversine_km(latitude, longitude, *point) < 50
+    assert in_box(bounding_box(latitude, longitude, 50), *point)
+
+
+@pytest.mark.parametrize("latitude", [-60.0, -6.5, 0.0, 6.5, 45.0, 70.0])
+@pytest.mark.parametrize("radius_km", [1, 50, 500])
+def test_box_encloses_whole_circle(latitude, radius_km):
+    longitude = 3.4
+    box = bounding_box(latitude, longitude, radius_km)
+    for bearing in range(0, 360, 5):
+        point = destination(latitude, longitude, radius_km * 0.9999, bearing)
+        assert in_box(box, *point), (bearing, point, box)
+
+
+def test_box_reaching_a_pole_only_bounds_latitude():
+    min_lat, max_lat, min_lng, max_lng = bounding_box(89.5, 10.0, 100)
+    assert max_lat == 90.0
+    assert min_lng is None and max_lng is None
@@ -7,8 +7,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 import redis.asyncio as redis
 import uuid
+import sys
+import os
 from .config import get_settings
 
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from shared.security.token_cache import publish_token_revocation
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Redis connection for token blacklist
@@ -86,6 +93,8 @@ async def blacklist_token(jti: str, exp: int) -> bool:
         ttl = max(0, exp - int(datetime.utcnow().timestamp()))
         if ttl > 0:
             await redis_client.setex(f"blacklist:{jti}", ttl, "1")
+        # Notify gateway token caches
+        await publish_token_revocation(redis_client, jti=jti, exp=exp)
         return True
     except Exception:
         return False
@@ -158,26 +167,29 @@ async def verify_token_with_session(token: str, db: AsyncSession) -> Dict[str, A
     token_type = payload.get("type", "access")
     if token_type == "access":
         from app.models.user import UserSession
-
-        result = await db.execute(
-            select(UserSession).filter(
-                and_(
-                    UserSession.access_token_jti == jti,
-                    UserSession.is_active == True,
-                    UserSession.expires_at > datetime.utcnow()
+        from app.services.session_activity_service import session_activity_tracker
+
+        # Sessions confirmed active moments ago skip the database round trip
+        if not session_activity_tracker.is_session_active(jti):
+            result = await db.execute(
+                select(UserSession.expires_at).filter(
+                    and_(
+                        UserSession.access_token_jti == jti,
+                        UserSession.is_active == True,
+                        UserSession.expires_at > datetime.utcnow()
+                    )
                 )
             )
-        )
 
-        session = result.scalar_one_or_none()
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Session expired or invalid"
-            )
+            session_expires_at = result.scalar_one_or_none()
+            if not session_expires_at:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Session expired or invalid"
+                )
+            session_activity_tracker.mark_session_active(jti, session_expires_at)
 
-        # Update last activity
-        session.last_activity = datetime.utcnow()
-        await db.commit()
+        # Update last activity (written behind in batches)
+        session_activity_tracker.record_activity(jti)
 
     return payload
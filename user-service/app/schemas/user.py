@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 import sys
 import os
@@ -103,6 +103,10 @@ class VendorProfileResponse(VendorProfileCreate):
         from_attributes = True
 
 
+class VendorProfileBulkRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=500)
+
+
 # Password Management Schemas
 class PasswordChangeRequest(BaseModel):
     current_password: str
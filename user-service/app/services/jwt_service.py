@@ -18,7 +18,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 
 from app.models.user import User, UserSession
 from app.core.config import get_settings
+from app.core.security import get_redis_client
+from app.services.session_activity_service import session_activity_tracker
 from shared.models import UserRole
+from shared.security.token_cache import publish_token_revocation
 
 settings = get_settings()
 
@@ -236,12 +239,21 @@ class JWTService:
             ).values(
                 is_active=False,
                 logged_out_at=datetime.utcnow()
-            )
+            ).returning(UserSession.access_token_jti)
             
             result = await db.execute(stmt)
+            revoked_jtis = [row.access_token_jti for row in result.all()]
             await db.commit()
+            for jti in revoked_jtis:
+                session_activity_tracker.invalidate(jti)
+            
+            # Notify gateway token caches
+            if revoked_jtis:
+                redis_client = await get_redis_client()
+                for jti in revoked_jtis:
+                    await publish_token_revocation(redis_client, jti=jti)
             
-            return result.rowcount > 0
+            return len(revoked_jtis) > 0
         except Exception:
             return False
     
@@ -257,6 +269,11 @@ class JWTService:
             
             result = await db.execute(stmt)
             await db.commit()
+            session_activity_tracker.invalidate()
+            
+            # Notify gateway token caches
+            redis_client = await get_redis_client()
+            await publish_token_revocation(redis_client, user_id=user_id)
             
             return result.rowcount
         except Exception:
@@ -0,0 +1,165 @@
+"""
+Write-behind session activity tracking.
+Buffers last-seen timestamps in memory and flushes them to user_sessions in
+batched UPDATEs, and caches active session JTIs for authentication checks.
+Revocations made on any replica arrive over the token revocation feed.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, Optional, Any
+import logging
+
+from sqlalchemy import bindparam
+
+from app.core.database import engine
+from app.models.user import UserSession
+from shared.networking.ttl_cache import TTLCache
+from shared.security.token_cache import listen_for_revocations
+
+logger = logging.getLogger(__name__)
+
+
+class SessionActivityTracker:
+    """Write-behind tracker for session last_activity and active-session lookups."""
+
+    def __init__(self):
+        self.flush_interval = float(os.getenv("SESSION_ACTIVITY_FLUSH_SECONDS", "30"))
+        self.active_cache_ttl = float(os.getenv("SESSION_ACTIVE_CACHE_SECONDS", "30"))
+        self.max_pending = int(os.getenv("SESSION_ACTIVITY_MAX_PENDING", "5000"))
+        self.active_cache_size = int(os.getenv("SESSION_ACTIVE_CACHE_SIZE", "50000"))
+
+        self._pending: Dict[str, datetime] = {}          # jti -> last seen
+        # jti -> True; bounded LRU so sessions that are never checked again age out
+        self._active_sessions = TTLCache(max_size=self.active_cache_size, ttl=self.active_cache_ttl)
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._overflow_flush: Optional[asyncio.Task] = None
+        self._revocation_task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.rows_flushed = 0
+        self.flushes = 0
+
+    def is_session_active(self, jti: str) -> bool:
+        """Check the short-lived cache of sessions recently confirmed active."""
+        return self._active_sessions.get(jti, False)
+
+    def mark_session_active(self, jti: str, session_expires_at: Optional[datetime] = None):
+        """Remember that a session was confirmed active in the database."""
+        ttl = self.active_cache_ttl
+        if session_expires_at is not None:
+            remaining = (session_expires_at.replace(tzinfo=None) - datetime.utcnow()).total_seconds()
+            ttl = min(ttl, remaining)
+        if ttl > 0:
+            self._active_sessions.set(jti, True, ttl)
+
+    def invalidate(self, jti: Optional[str] = None):
+        """Forget a cached active session, or all of them when no jti is given."""
+        if jti is None:
+            self._active_sessions.clear()
+        else:
+            self._active_sessions.invalidate(jti)
+
+    def handle_revocation(self, message: Dict[str, Any]):
+        """Apply a message from the token revocation feed.
+
+        Cached sessions are keyed by jti only, so a per-user revocation
+        forgets every cached session.
+        """
+        if message.get("user_id"):
+            self.invalidate()
+        elif message.get("jti"):
+            self.invalidate(message["jti"])
+            self._pending.pop(message["jti"], None)
+
+    def record_activity(self, jti: str):
+        """Record that a session was used; persisted on the next flush."""
+        self._pending[jti] = datetime.utcnow()
+        if len(self._pending) >= self.max_pending and not self._flush_lock.locked():
+            # One early flush at a time; a flush already running drains the buffer anyway
+            if self._overflow_flush is None or self._overflow_flush.done():
+                self._overflow_flush = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> int:
+        """Write buffered last_activity timestamps in one batched UPDATE."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = self._pending, {}
+            table = UserSession.__table__
+            # Never touch sessions revoked since their activity was recorded
+            stmt = table.update().where(
+                table.c.access_token_jti == bindparam("b_jti"),
+                table.c.is_active == True
+            ).values(last_activity=bindparam("b_last_activity"))
+
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(
+                        stmt,
+                        [{"b_jti": jti, "b_last_activity": seen} for jti, seen in pending.items()]
+                    )
+            except Exception as e:
+                # Put the timestamps back unless newer ones arrived meanwhile
+                for jti, seen in pending.items():
+                    self._pending.setdefault(jti, seen)
+                logger.error(f"Failed to flush session activity for {len(pending)} sessions: {str(e)}")
+                return 0
+
+            self.flushes += 1
+            self.rows_flushed += len(pending)
+            logger.debug(f"Flushed session activity for {len(pending)} sessions")
+            return len(pending)
+
+    async def _run(self):
+        """Flush on an interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self, redis_url: Optional[str] = None):
+        """Start the periodic flush task and, given a Redis URL, the revocation listener."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._run())
+            logger.info(f"Session activity tracker started (flush every {self.flush_interval}s)")
+        if redis_url and (self._revocation_task is None or self._revocation_task.done()):
+            self._revocation_task = asyncio.create_task(
+                listen_for_revocations(redis_url, self.handle_revocation, self.invalidate)
+            )
+
+    async def stop(self):
+        """Stop the background tasks and write out anything still buffered."""
+        if self._revocation_task is not None:
+            self._revocation_task.cancel()
+            try:
+                await self._revocation_task
+            except asyncio.CancelledError:
+                pass
+            self._revocation_task = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get tracker statistics."""
+        cache_stats = self._active_sessions.get_stats()
+        return {
+            "pending_updates": len(self._pending),
+            "cached_active_sessions": cache_stats["size"],
+            "cache_hit_rate": cache_stats["hit_rate"],
+            "cache_evictions": cache_stats["evictions"],
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed
+        }
+
+
+# Global session activity tracker instance
+session_activity_tracker = SessionActivityTracker()
@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 import uuid
 import sys
@@ -135,3 +135,19 @@ class UserService:
             select(VendorProfile).filter(VendorProfile.user_id == uuid.UUID(user_id))
         )
         return result.scalar_one_or_none()
+
+    async def get_vendor_profiles(self, db: AsyncSession, user_ids: List[str]) -> List[VendorProfile]:
+        """Get vendor profiles for many user IDs in one query; unknown or invalid IDs are skipped."""
+        parsed_ids = []
+        for user_id in user_ids:
+            try:
+                parsed_ids.append(uuid.UUID(str(user_id)))
+            except ValueError:
+                continue
+        if not parsed_ids:
+            return []
+
+        result = await db.execute(
+            select(VendorProfile).filter(VendorProfile.user_id.in_(parsed_ids))
+        )
+        return result.scalars().all()
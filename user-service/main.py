@@ -25,7 +25,7 @@ from app.core.security import create_access_token, verify_token, get_password_ha
 from app.core.database import get_db
 from app.models.user import User, UserProfile, VendorProfile, HospitalProfile
 from app.schemas.user import (UserCreate, UserLogin, UserResponse, TokenResponse, UserUpdate,
-                             VendorProfileCreate, VendorProfileResponse, HospitalProfileCreate,
+                             VendorProfileCreate, VendorProfileResponse, VendorProfileBulkRequest, HospitalProfileCreate,
                              PasswordChangeRequest, PasswordResetRequest, PasswordResetConfirm, PasswordValidationResponse,
                              LoginWithRememberMe, RefreshTokenRequest, TokenRefreshResponse, EnhancedTokenResponse, UserSessionResponse,
                              EmailVerificationRequest, EmailVerificationConfirm,
@@ -37,6 +37,7 @@ from app.schemas.user import (UserCreate, UserLogin, UserResponse, TokenResponse
 from app.services.user_service import UserService
 from app.services.password_service import password_service
 from app.services.jwt_service import jwt_service
+from app.services.session_activity_service import session_activity_tracker
 from app.services.email_service import email_service
 from app.services.mfa_service import mfa_service
 from app.services.rate_limit_service import rate_limit_service
@@ -90,6 +91,14 @@ async def startup_event():
     else:
         logger.info("ℹ️ Database already initialized")
 
+    session_activity_tracker.start(get_settings().REDIS_URL)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered session activity on shutdown."""
+    await session_activity_tracker.stop()
+
 # Authentication dependency for admin endpoints
 async def get_current_admin_user(
     x_user_id: str = Header(..., alias="X-User-ID"),
@@ -780,6 +789,7 @@ async def logout(
 
         result = await db.execute(stmt)
         await db.commit()
+        session_activity_tracker.invalidate(jti)
 
         return APIResponse(
             success=True,
@@ -2137,6 +2147,45 @@ async def get_user_for_service(
         )
 
 
+@app.post("/internal/vendor-profiles/bulk", response_model=APIResponse)
+async def get_vendor_profiles_for_service(
+    bulk_request: VendorProfileBulkRequest,
+    key_info: dict = Depends(user_read_auth),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get many vendor profiles in one call for service-to-service enrichment."""
+    try:
+        profiles = await user_service.get_vendor_profiles(db, bulk_request.user_ids)
+
+        return APIResponse(
+            success=True,
+            message="Vendor profiles retrieved successfully",
+            data={
+                "profiles": {
+                    str(profile.user_id): {
+                        "user_id": str(profile.user_id),
+                        "name": profile.business_name,
+                        "business_name": profile.business_name,
+                        "contact_phone": profile.contact_phone,
+                        "business_address": profile.business_address,
+                        "delivery_radius_km": profile.delivery_radius_km,
+                        "emergency_service": profile.emergency_service,
+                        "minimum_order_value": profile.minimum_order_value,
+                        "supplier_onboarding_status": profile.supplier_onboarding_status.value if profile.supplier_onboarding_status else None
+                    }
+                    for profile in profiles
+                },
+                "total": len(profiles)
+            }
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get vendor profiles: {str(e)}"
+        )
+
+
 @app.get("/internal/health", response_model=APIResponse)
 async def service_health_check(
     key_info: dict = Depends(service_auth)